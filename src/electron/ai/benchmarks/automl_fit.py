@@ -0,0 +1,43 @@
+# benchmarks/automl_fit.py
+
+import os
+import tempfile
+import time
+from core.tracking.resources import peak_rss_bytes
+from .dataset_eda import synthetic_frame
+
+MODEL_TYPES = ("logistic_regression", "random_forest", "xgboost")
+
+def benchmark_automl(model_types=MODEL_TYPES, n_rows=5000, n_features=20):
+    """
+    AutoML.fit time and accuracy per model type on synthetic data.
+
+    Tuning, ensembling and cross-validation stay off so the numbers track the base
+    training path; a model type that fails is reported with its error.
+
+    :param model_types: tuple - AutoML model types.
+    :param n_rows: int - Training rows.
+    :param n_features: int - Feature columns.
+    :return: dict - Per model type: fit time, samples/sec, accuracy.
+    """
+    from core.automl.automl import AutoML
+
+    data = synthetic_frame(n_rows, n_features)
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for model_type in model_types:
+            automl = AutoML(model_type=model_type, model_filename=os.path.join(tmp, f"{model_type}.pkl"))
+            try:
+                start = time.perf_counter()
+                accuracy = automl.fit(data.copy(), "label")
+                fit_seconds = time.perf_counter() - start
+            except Exception as e:
+                report[model_type] = {"error": str(e)}
+                continue
+            report[model_type] = {
+                "fit_seconds": fit_seconds,
+                "samples_per_sec": n_rows / fit_seconds,
+                "accuracy": float(accuracy),
+            }
+    report["peak_rss_bytes"] = peak_rss_bytes()
+    return report
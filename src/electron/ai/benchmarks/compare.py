@@ -0,0 +1,122 @@
+# benchmarks/compare.py
+
+import argparse
+import json
+import sys
+
+# Metric name fragments that say which direction is better
+_HIGHER_IS_BETTER = ("per_sec", "throughput", "accuracy", "recall")
+_LOWER_IS_BETTER = ("seconds", "_ms", "ms_per", "bytes", "latency", "diff")
+
+def direction(metric):
+    """+1 if higher is better, -1 if lower is better, 0 if the metric is informational."""
+    name = metric.rsplit(".", 1)[-1]
+    if any(fragment in name for fragment in _HIGHER_IS_BETTER):
+        return 1
+    if any(fragment in name for fragment in _LOWER_IS_BETTER):
+        return -1
+    return 0
+
+def flatten(metrics, prefix=""):
+    """Numeric leaves of a nested metrics dict as {"a.b.c": value}."""
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+# Statuses that fail a comparison, and the order rows are listed in
+FAILING = ("regressed", "missing")
+_ORDER = {"regressed": 0, "missing": 1, "incomparable": 2, "improved": 3, "unchanged": 4, "info": 5}
+
+def _status(metric, base, cur, threshold):
+    """(relative change or None, status) of one metric."""
+    sign = direction(metric)
+    if not base:
+        # No relative change from zero: any move in the bad direction is a regression
+        better = sign * (cur - base)
+        change = None if cur else 0.0
+    else:
+        change = (cur - base) / abs(base)
+        better = sign * change
+    if sign == 0:
+        return change, "info"
+    limit = threshold if base else 0.0
+    if better < -limit:
+        return change, "regressed"
+    if better > limit:
+        return change, "improved"
+    return change, "unchanged"
+
+def compare_results(baseline, current, threshold=0.1):
+    """
+    Compare two suite results metric by metric.
+
+    Benchmarks that had metrics in the baseline but are absent, skipped or failed in
+    current, and metrics that disappeared, are reported as missing. A metric whose
+    baseline is 0 has no relative change; any move in the bad direction regresses.
+
+    :param baseline: dict - Results of the reference commit.
+    :param current: dict - Results of the commit under test.
+    :param threshold: float - Relative change beyond which a metric counts as regressed or improved.
+    :return: list of dicts (benchmark, metric, baseline, current, change, status), failures first.
+    """
+    rows = []
+    for name, base_entry in baseline["benchmarks"].items():
+        if "metrics" not in base_entry:
+            continue
+        entry = current["benchmarks"].get(name)
+        if entry is None or "metrics" not in entry:
+            state = "absent" if entry is None else "error" if "error" in entry else "skipped"
+            rows.append({"benchmark": name, "metric": state, "baseline": None, "current": None,
+                         "change": None, "status": "missing"})
+            continue
+        if entry.get("params") != base_entry.get("params"):
+            rows.append({"benchmark": name, "metric": "params", "baseline": None, "current": None,
+                         "change": None, "status": "incomparable"})
+            continue
+        base, cur = flatten(base_entry["metrics"]), flatten(entry["metrics"])
+        for metric in sorted(base):
+            if metric not in cur:
+                rows.append({"benchmark": name, "metric": metric, "baseline": base[metric], "current": None,
+                             "change": None, "status": "missing"})
+                continue
+            change, status = _status(metric, base[metric], cur[metric], threshold)
+            rows.append({"benchmark": name, "metric": metric, "baseline": base[metric], "current": cur[metric],
+                         "change": change, "status": status})
+    return sorted(rows, key=lambda row: _ORDER[row["status"]])
+
+def format_comparison(rows, show_unchanged=False):
+    """Render a comparison as a plain-text table."""
+    columns = ("benchmark", "metric", "baseline", "current", "change", "status")
+    table = [columns]
+    for row in rows:
+        if row["status"] in ("unchanged", "info") and not show_unchanged:
+            continue
+        table.append((row["benchmark"], row["metric"],
+                      f"{row['baseline']:.4g}" if row["baseline"] is not None else "",
+                      f"{row['current']:.4g}" if row["current"] is not None else "",
+                      f"{row['change']:+.1%}" if row["change"] is not None else "",
+                      row["status"]))
+    widths = [max(len(r[i]) for r in table) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(w) for cell, w in zip(r, widths)) for r in table)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files; exits 1 on regressed or missing metrics.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change that counts (default 10%%)")
+    parser.add_argument("--all", action="store_true", help="Also list unchanged and informational metrics")
+    args = parser.parse_args()
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    with open(args.current, "r") as f:
+        current = json.load(f)
+    print(f"baseline {baseline['environment']['commit'][:12]}  current {current['environment']['commit'][:12]}")
+    rows = compare_results(baseline, current, args.threshold)
+    print(format_comparison(rows, args.all))
+    sys.exit(1 if any(row["status"] in FAILING for row in rows) else 0)
@@ -0,0 +1,62 @@
+# benchmarks/dataset_eda.py
+
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+def synthetic_frame(n_rows, n_features=20, seed=0):
+    """Numeric classification data with a binary 'label' column."""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_rows, n_features)).astype(np.float32)
+    weights = rng.standard_normal(n_features)
+    frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(n_features)])
+    frame["label"] = (X @ weights + 0.5 * rng.standard_normal(n_rows) > 0).astype(int)
+    return frame
+
+def benchmark_dataset(sizes=(1000, 10000, 100000), n_features=20):
+    """
+    Upload and EDA time of the dataset server on synthetic CSVs of growing size.
+
+    Each CSV goes through /upload-data/ (write, parse, EDA) and /load-data/ (parse, EDA,
+    JSON cleanup) on the FastAPI app in-process. Uploaded files are removed afterwards.
+
+    :param sizes: tuple - Row counts.
+    :param n_features: int - Feature columns per CSV.
+    :return: dict - Per size: CSV size, endpoint times and rows/sec.
+    """
+    from fastapi.testclient import TestClient
+    from datasets import dataset as dataset_server
+
+    client = TestClient(dataset_server.app)
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            csv_path = os.path.join(tmp, f"synthetic_{n_rows}.csv")
+            synthetic_frame(n_rows, n_features).to_csv(csv_path, index=False)
+
+            with open(csv_path, "rb") as f:
+                start = time.perf_counter()
+                response = client.post("/upload-data/", files={"file": (os.path.basename(csv_path), f, "text/csv")})
+                upload_seconds = time.perf_counter() - start
+            if response.status_code != 200:
+                raise RuntimeError(f"/upload-data/ failed: {response.text}")
+            filename = response.json()["filename"]
+
+            try:
+                start = time.perf_counter()
+                response = client.post("/load-data/", json={"file_path": filename})
+                load_seconds = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise RuntimeError(f"/load-data/ failed: {response.text}")
+            finally:
+                os.remove(os.path.join(dataset_server.UPLOAD_DIR, filename))
+
+            report[f"rows_{n_rows}"] = {
+                "csv_bytes": os.path.getsize(csv_path),
+                "upload_seconds": upload_seconds,
+                "load_seconds": load_seconds,
+                "load_rows_per_sec": n_rows / load_seconds,
+            }
+    return report
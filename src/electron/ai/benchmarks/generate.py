@@ -0,0 +1,72 @@
+# benchmarks/generate.py
+
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+DEFAULT_PROMPT = "Write one sentence about why small language models are useful."
+
+def _post_generate(client, prompt, max_tokens):
+    start = time.perf_counter()
+    response = client.post("/generate", json={"prompt": prompt, "max_tokens": max_tokens})
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"/generate failed: {response.get_json()}")
+    return elapsed
+
+def benchmark_generate(gguf_path, n_requests=20, max_tokens=32, concurrency=4, prompt=DEFAULT_PROMPT):
+    """
+    Latency and throughput of the /generate endpoint on a local GGUF model.
+
+    Requests go through the Flask app in-process (test client), so the numbers include
+    routing, templating and serialization but no network. Token counts come from the
+    server's own generated_tokens_total counter.
+
+    :param gguf_path: str - A small local .gguf model (e.g. a tiny llama checkpoint).
+    :param n_requests: int - Sequential requests timed for latency.
+    :param max_tokens: int - Tokens generated per request.
+    :param concurrency: int - Parallel clients for the throughput run.
+    :param prompt: str - Prompt sent with every request.
+    :return: dict - Load time, latency percentiles and throughput.
+    """
+    import server
+
+    if not os.path.exists(gguf_path):
+        raise FileNotFoundError(f"Model not found: {gguf_path}")
+    server.MODEL_FOLDER = os.path.dirname(os.path.abspath(gguf_path))
+    model_name = os.path.basename(gguf_path)
+    client = server.app.test_client()
+
+    start = time.perf_counter()
+    response = client.post("/start", json={"model_name": model_name})
+    load_seconds = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"/start failed: {response.get_json()}")
+    tokens = server.GENERATED_TOKENS.labels(model_name)
+
+    try:
+        _post_generate(client, prompt, max_tokens)  # Warm up the prompt cache and allocator
+
+        tokens_before = tokens.get()
+        latencies = [_post_generate(client, prompt, max_tokens) for _ in range(n_requests)]
+        sequential_tokens = tokens.get() - tokens_before
+
+        tokens_before = tokens.get()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: _post_generate(server.app.test_client(), prompt, max_tokens), range(n_requests)))
+        concurrent_seconds = time.perf_counter() - start
+        concurrent_tokens = tokens.get() - tokens_before
+    finally:
+        client.post("/stop")
+
+    return {
+        "load_seconds": load_seconds,
+        "latency_ms_p50": statistics.median(latencies) * 1000,
+        "latency_ms_p90": float(np.percentile(latencies, 90)) * 1000,
+        "tokens_per_sec": sequential_tokens / sum(latencies),
+        "concurrent_requests_per_sec": n_requests / concurrent_seconds,
+        "concurrent_tokens_per_sec": concurrent_tokens / concurrent_seconds,
+    }
@@ -0,0 +1,40 @@
+# benchmarks/prompts.py
+
+def benchmark_prompt_evaluation(n_items=500, batch_size=64, num_workers=None, baseline_items=50,
+                                n_vectors=20000, dim=384, k=10, nprobes=(1, 4, 16)):
+    """
+    Prompt evaluation throughput: batched response scoring and vector search.
+
+    Reuses core.prompts.benchmark. Scoring needs the embedding model in the local
+    Hugging Face cache and uses its own temporary embedding cache, so results do not
+    depend on what earlier runs stored; vector search runs on synthetic vectors.
+
+    :return: dict - Scoring items/sec and, per nprobe, recall and query latency.
+    """
+    import tempfile
+    from core.prompts.benchmark import benchmark_scoring, benchmark_vector_index
+
+    report = {}
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            scoring = benchmark_scoring(n_items, batch_size, num_workers, baseline_items, cache_dir=cache_dir)
+        report["scoring"] = {
+            "per_item_items_per_sec": scoring["per_item_items_per_sec"],
+            "batched_items_per_sec": scoring["batched_items_per_sec"],
+            "batched_cold_cache_items_per_sec": scoring["batched_cold_cache_items_per_sec"],
+            "batched_warm_cache_items_per_sec": scoring["batched_warm_cache_items_per_sec"],
+        }
+    except Exception as e:
+        report["scoring"] = {"error": str(e)}
+
+    index = benchmark_vector_index(n_vectors=n_vectors, dim=dim, k=k, nprobes=nprobes)
+    report["vector_index"] = {
+        "build_seconds": index["build_seconds"],
+        "brute_force_ms_per_query": index["brute_force_ms_per_query"],
+    }
+    for entry in index["ivf"]:
+        report["vector_index"][f"nprobe_{entry['nprobe']}"] = {
+            "recall_at_k": entry["recall_at_k"],
+            "ms_per_query": entry["ms_per_query"],
+        }
+    return report
@@ -0,0 +1,74 @@
+# benchmarks/quantization.py
+
+import functools
+import os
+import tempfile
+import time
+import numpy as np
+import torch
+from torch import nn
+
+GGUF_TYPES = ("Q8_0", "Q5_K", "Q4_K")
+TORCH_TYPES = ("fp16", "bf16", "int8")
+
+def tiny_mlp(hidden=512, n_layers=4):
+    """Small fp32 MLP used as the quantization and conversion subject (top-level so spawned workers can build it)."""
+    torch.manual_seed(0)
+    layers = []
+    for _ in range(n_layers):
+        layers += [nn.Linear(hidden, hidden), nn.ReLU()]
+    return nn.Sequential(*layers, nn.Linear(hidden, 2))
+
+def benchmark_quantization_speed(hidden=512, n_layers=4, batch_size=8, gguf_shape=(2048, 2048), n_runs=20):
+    """
+    Quantization, GGUF encoding and ONNX conversion time on synthetic weights.
+
+    - torch: quantize_model time per type, plus size/load/latency/accuracy from
+      core.quantization.benchmark (one spawned process per type).
+    - gguf: block encoding throughput of one weight matrix per GGUF type.
+    - onnx: torch_to_onnx export (with validation) of the same model.
+
+    :return: dict - Timings per quantization type and for the conversion.
+    """
+    from core.quantization.quantize import quantize_model
+    from core.quantization.checkpoint import save_sharded
+    from core.quantization.benchmark import benchmark_quantization
+    from core.quantization.gguf_writer import QUANT_TYPES, encode_tensor
+    from core.conversion.convert_onnx import torch_to_onnx
+
+    factory = functools.partial(tiny_mlp, hidden, n_layers)
+    sample = torch.randn(batch_size, hidden)
+    report = {"torch": {}, "gguf": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for quant_type in TORCH_TYPES:
+            model = factory().eval()
+            start = time.perf_counter()
+            quantize_model(model, quant_type, os.path.join(tmp, f"quantize-{quant_type}"))
+            report["torch"][quant_type] = {"quantize_seconds": time.perf_counter() - start}
+
+        for result in benchmark_quantization(factory, [sample], os.path.join(tmp, "inference"),
+                                             ("fp32",) + TORCH_TYPES, n_runs):
+            entry = report["torch"].setdefault(result["quant_type"], {})
+            if "error" in result:
+                entry["error"] = result["error"]
+                continue
+            for key in ("size_bytes", "load_seconds", "latency_ms_p50", "throughput_samples_per_sec", "max_abs_diff"):
+                entry[key] = result[key]
+
+        weights = np.random.default_rng(0).standard_normal(gguf_shape).astype(np.float32)
+        for quant_type in GGUF_TYPES:
+            start = time.perf_counter()
+            encoded = encode_tensor(weights, QUANT_TYPES[quant_type])
+            seconds = time.perf_counter() - start
+            report["gguf"][quant_type] = {
+                "encode_seconds": seconds,
+                "encode_mb_per_sec": weights.nbytes / seconds / 1e6,
+                "bytes_per_weight": encoded.nbytes / weights.size,
+            }
+
+        checkpoint = os.path.join(tmp, "fp32")
+        save_sharded(factory().state_dict(), checkpoint)
+        start = time.perf_counter()
+        torch_to_onnx(factory(), checkpoint, os.path.join(tmp, "model.onnx"), sample_batch=sample)
+        report["onnx"] = {"convert_seconds": time.perf_counter() - start}
+    return report
@@ -0,0 +1,144 @@
+# benchmarks/suite.py
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Never reach out to the Hugging Face Hub; every model must already be local
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def _generate(**kwargs):
+    from .generate import benchmark_generate
+    return benchmark_generate(**kwargs)
+
+def _dataset(**kwargs):
+    from .dataset_eda import benchmark_dataset
+    return benchmark_dataset(**kwargs)
+
+def _automl(**kwargs):
+    from .automl_fit import benchmark_automl
+    return benchmark_automl(**kwargs)
+
+def _prompts(**kwargs):
+    from .prompts import benchmark_prompt_evaluation
+    return benchmark_prompt_evaluation(**kwargs)
+
+def _quantization(**kwargs):
+    from .quantization import benchmark_quantization_speed
+    return benchmark_quantization_speed(**kwargs)
+
+BENCHMARKS = {
+    "generate": _generate,
+    "dataset": _dataset,
+    "automl": _automl,
+    "prompts": _prompts,
+    "quantization": _quantization,
+}
+
+# Parameters per benchmark and scale; "small" finishes in a few minutes on a laptop
+SCALES = {
+    "small": {
+        "generate": {"n_requests": 10, "max_tokens": 16, "concurrency": 2},
+        "dataset": {"sizes": (1000, 10000)},
+        "automl": {"n_rows": 2000},
+        "prompts": {"n_items": 200, "baseline_items": 20, "n_vectors": 5000},
+        "quantization": {"hidden": 256, "gguf_shape": (1024, 1024), "n_runs": 10},
+    },
+    "full": {
+        "generate": {"n_requests": 50, "max_tokens": 64, "concurrency": 4},
+        "dataset": {"sizes": (1000, 10000, 100000, 1000000)},
+        "automl": {"n_rows": 50000},
+        "prompts": {"n_items": 2000, "baseline_items": 100, "n_vectors": 50000},
+        "quantization": {"hidden": 1024, "gguf_shape": (4096, 4096), "n_runs": 50},
+    },
+}
+
+def _git(*args):
+    try:
+        return subprocess.check_output(["git", *args], stderr=subprocess.DEVNULL).decode("utf-8").strip()
+    except Exception:
+        return None
+
+def environment():
+    """Commit and machine the results were produced on."""
+    status = _git("status", "--porcelain")
+    return {
+        "commit": _git("rev-parse", "HEAD") or "N/A",
+        "dirty": bool(status) if status is not None else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def run_suite(names=None, scale="small", gguf_path=None):
+    """
+    Run benchmarks and collect their results.
+
+    A benchmark whose dependencies are missing (or that needs a GGUF model when none is
+    given) is recorded as skipped; one that fails is recorded with its error, so a broken
+    benchmark never hides the others.
+
+    :param names: list - Benchmarks to run (all of BENCHMARKS if None).
+    :param scale: str - Key of SCALES.
+    :param gguf_path: str - Local GGUF model for the generate benchmark.
+    :return: dict - Environment, parameters and metrics per benchmark.
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale: {scale}")
+    names = list(names or BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown}")
+
+    results = {"timestamp": datetime.now().isoformat(timespec="seconds"), "scale": scale,
+               "environment": environment(), "benchmarks": {}}
+    for name in names:
+        params = dict(SCALES[scale].get(name, {}))
+        if name == "generate":
+            if not gguf_path:
+                results["benchmarks"][name] = {"params": params, "skipped": "no --gguf model given"}
+                continue
+            params["gguf_path"] = gguf_path
+        print(f"[benchmarks] {name} ...", file=sys.stderr, flush=True)
+        entry = {"params": params}
+        start = time.perf_counter()
+        try:
+            entry["metrics"] = BENCHMARKS[name](**params)
+        except ImportError as e:
+            entry["skipped"] = str(e)
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["wall_seconds"] = time.perf_counter() - start
+        results["benchmarks"][name] = entry
+    return results
+
+def save_results(results, results_dir=DEFAULT_RESULTS_DIR):
+    """Write results to <results_dir>/<timestamp>-<commit>.json and return the path."""
+    os.makedirs(results_dir, exist_ok=True)
+    commit = results["environment"]["commit"][:12]
+    stamp = results["timestamp"].replace(":", "").replace("-", "")
+    path = os.path.join(results_dir, f"{stamp}-{commit}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=list)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite (from the ai directory: python -m benchmarks.suite).")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--scale", default="small", choices=sorted(SCALES))
+    parser.add_argument("--gguf", help="Small local GGUF model for the /generate benchmark")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    args = parser.parse_args()
+
+    results = run_suite(args.only.split(",") if args.only else None, args.scale, args.gguf)
+    print(json.dumps(results["benchmarks"], indent=2, default=list))
+    print(f"Results written to {save_results(results, args.results_dir)}")
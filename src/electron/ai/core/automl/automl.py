@@ -11,6 +11,8 @@ from sklearn.preprocessing import StandardScaler
 import optuna
 import joblib
 import os
+import time
+from ..tracking.resources import peak_rss_bytes
 
 class AutoML:
     def __init__(self, model_type='random_forest', tuning=False, ensemble=False, cross_val=False, model_filename="model.pkl"):
@@ -29,6 +31,7 @@ class AutoML:
         self.cross_val = cross_val
         self.model_filename = model_filename
         self.model = None
+        self.timings = {}
 
     def preprocess_data(self, data: pd.DataFrame, target_column: str):
         """
@@ -73,12 +76,13 @@ class AutoML:
         else:
             self.model = base_model
 
-    def tune_hyperparameters(self, X, y):
+    def tune_hyperparameters(self, X, y, tracker=None):
         """
         Perform hyperparameter tuning using Optuna for the RandomForest model.
 
         :param X: np.array - Features.
         :param y: np.array - Target.
+        :param tracker: ExperimentTracker - Log each trial's accuracy and duration.
         :return: dict - Best hyperparameters found by Optuna.
         """
         def objective(trial):
@@ -96,23 +100,35 @@ class AutoML:
             accuracy = accuracy_score(y_test, y_pred)
             return accuracy
         
+        def log_trial(study, trial):
+            tracker.log_metrics({
+                "trial_accuracy": trial.value,
+                "trial_seconds": trial.duration.total_seconds(),
+            }, step=trial.number)
+
         study = optuna.create_study(direction='maximize')
-        study.optimize(objective, n_trials=100)
+        study.optimize(objective, n_trials=100, callbacks=[log_trial] if tracker is not None else None)
         return study.best_params
 
-    def train_model(self, X, y):
+    def train_model(self, X, y, tracker=None):
         """
         Train the model with or without hyperparameter tuning.
 
         :param X: np.array - Features.
         :param y: np.array - Target.
-        :return: None - Trains self.model.
+        :param tracker: ExperimentTracker - Log tuning trials.
+        :return: None - Trains self.model; tuning and final fit times are kept in self.timings.
         """
+        self.timings = {}
         if self.tuning:
-            best_params = self.tune_hyperparameters(X, y)
+            start = time.perf_counter()
+            best_params = self.tune_hyperparameters(X, y, tracker)
             self.model.set_params(**best_params)
-        
+            self.timings["tune_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
         self.model.fit(X, y)
+        self.timings["fit_seconds"] = time.perf_counter() - start
 
     def evaluate_model(self, X, y):
         """
@@ -143,17 +159,44 @@ class AutoML:
         else:
             raise FileNotFoundError(f"{self.model_filename} does not exist!")
 
-    def fit(self, data: pd.DataFrame, target_column: str):
+    def fit(self, data: pd.DataFrame, target_column: str, tracker=None):
         """
         Full workflow: Preprocess, choose model, train model, evaluate, and save the model.
 
         :param data: pd.DataFrame - The input dataset.
         :param target_column: str - The column name for the target variable.
+        :param tracker: ExperimentTracker - Log configuration, per-phase timings, throughput, memory and accuracy.
         :return: float - Model accuracy after training.
         """
+        timings = {}
+        start = time.perf_counter()
         X, y = self.preprocess_data(data, target_column)
+        timings["preprocess_seconds"] = time.perf_counter() - start
         self.choose_model()
-        self.train_model(X, y)
+        start = time.perf_counter()
+        self.train_model(X, y, tracker)
+        timings["train_seconds"] = time.perf_counter() - start
+        timings.update(self.timings)
         self.save_model()  # Save model after training
+        start = time.perf_counter()
         accuracy = self.evaluate_model(X, y)
+        timings["evaluate_seconds"] = time.perf_counter() - start
+
+        if tracker is not None:
+            tracker.log_parameters({
+                "model_type": self.model_type,
+                "tuning": self.tuning,
+                "ensemble": self.ensemble,
+                "cross_val": self.cross_val,
+                "n_samples": int(X.shape[0]),
+                "n_features": int(X.shape[1]),
+            })
+            tracker.log_metrics(dict(
+                timings,
+                # Throughput of the final fit only, not of the tuning trials
+                samples_per_sec=X.shape[0] / timings["fit_seconds"] if timings["fit_seconds"] else 0.0,
+                peak_rss_bytes=peak_rss_bytes(),
+                accuracy=float(accuracy),
+            ))
+            tracker.flush()
         return accuracy
@@ -1,17 +1,35 @@
 # conversion/convert_gguf.py
 
+import os
 import torch
 import tensorflow as tf
 import onnx
+from ..quantization.gguf_writer import StateDictSource, convert_checkpoint_to_gguf, write_gguf
 
-def torch_to_gguf(model: torch.nn.Module, model_path: str):
+def torch_to_gguf(model: torch.nn.Module, model_path: str, quant_type: str = "F16", tokenizer_dir: str = None):
     """
-    Convert PyTorch model to GGUF format (Placeholder).
+    Convert a PyTorch (Hugging Face llama-family) model to GGUF format.
     :param model: PyTorch model to convert.
     :param model_path: Path to save the GGUF model.
+    :param quant_type: GGUF tensor type ('F16', 'Q8_0', 'Q5_K', 'Q4_K').
+    :param tokenizer_dir: Directory with the tokenizer files (defaults to the model's name_or_path).
+    :return: Conversion summary (sizes and tensor types).
     """
-    # Placeholder: Implement logic to convert a PyTorch model to GGUF
-    pass
+    tokenizer_dir = tokenizer_dir or getattr(model.config, "_name_or_path", None)
+    if not tokenizer_dir or not os.path.isdir(tokenizer_dir):
+        raise ValueError("torch_to_gguf needs a local tokenizer_dir so llama.cpp can load the vocabulary")
+    with torch.no_grad():
+        return write_gguf(StateDictSource(model), model_path, tokenizer_dir, quant_type)
+
+def checkpoint_to_gguf(checkpoint_dir: str, model_path: str, quant_type: str = "F16"):
+    """
+    Convert a Hugging Face checkpoint directory to GGUF, streaming one tensor at a time.
+    :param checkpoint_dir: Directory with config.json, weights and tokenizer.
+    :param model_path: Path to save the GGUF model.
+    :param quant_type: GGUF tensor type ('F16', 'Q8_0', 'Q5_K', 'Q4_K').
+    :return: Conversion summary (sizes and tensor types).
+    """
+    return convert_checkpoint_to_gguf(checkpoint_dir, model_path, quant_type)
 
 def tf_to_gguf(tf_model: tf.Module, model_path: str):
     """
@@ -3,23 +3,51 @@
 import torch
 import onnx
 from torch import nn
+from ..quantization.checkpoint import load_into_model
+from .signature import infer_input_signature, export_onnx, validate_onnx, checkpoint_hash, conversion_key, cached_conversion
 import tf2onnx
-import tensorflow as t
+import tensorflow as tf
 import onnx
 import torch.onnx
 from onnx import numpy_helper
 
-def torch_to_onnx(model: nn.Module, model_path: str, onnx_path: str):
+def torch_to_onnx(model: nn.Module, model_path: str, onnx_path: str, sample_batch=None, cache_dir: str = None,
+                  validate: bool = True):
     """
     Convert PyTorch model to ONNX format.
+
+    Inputs are derived from sample_batch or the model config (text models get dynamic
+    batch and sequence axes), and the export is checked against PyTorch on the same inputs.
+
     :param model: PyTorch model to convert.
-    :param model_path: Path to the model weights.
+    :param model_path: Path to the model weights (sharded safetensors dir, .safetensors or torch.save file).
     :param onnx_path: Path to save the ONNX model.
+    :param sample_batch: Example input (tensor, tuple or dict of tensors) used for tracing and validation.
+    :param cache_dir: Reuse a previous export of the same checkpoint and signature from here.
+    :param validate: Raise if the ONNX outputs do not match PyTorch.
+    :return: dict - Input specs, cache hit flag and validation result.
     """
-    model.load_state_dict(torch.load(model_path))
+    load_into_model(model, model_path)  # Memory-mapped, no second copy of the weights
     model.eval()  # Set the model to evaluation mode
-    dummy_input = torch.randn(1, 3, 224, 224)  # Adjust based on your model's input
-    torch.onnx.export(model, dummy_input, onnx_path, input_names=["input"], output_names=["output"])
+    specs = infer_input_signature(model, sample_batch)
+    inputs = {}
+
+    def export(path):
+        inputs.update(export_onnx(model, path, specs, sample_batch))
+
+    if cache_dir:
+        key = conversion_key("onnx", checkpoint_hash(model_path), type(model).__name__, [s.to_dict() for s in specs])
+        cache_hit = cached_conversion(cache_dir, key, onnx_path, export)
+    else:
+        export(onnx_path)
+        cache_hit = False
+
+    report = {"inputs": [s.to_dict() for s in specs], "cache_hit": cache_hit}
+    if validate and not cache_hit:
+        report["validation"] = validate_onnx(model, onnx_path, inputs)
+        if not report["validation"]["ok"]:
+            raise ValueError(f"ONNX export diverges from PyTorch (max abs diff {report['validation']['max_abs_diff']})")
+    return report
 
 def onnx_to_torch(onnx_path: str):
     """
@@ -41,5 +69,5 @@ def tf_to_onnx(tf_model: tf.Module, onnx_path: str):
     :param onnx_path: Path to save the ONNX model.
     """
     # Convert the TensorFlow model to ONNX
-    onnx_model = tf2onnx.convert.from_keras(tf_model)
+    onnx_model, _ = tf2onnx.convert.from_keras(tf_model)
     onnx.save_model(onnx_model, onnx_path)
@@ -2,36 +2,37 @@
 
 import tensorflow as tf
 import torch
-import tf2onnx
 from torch import nn
-import tf2onnx
 import onnx
-import tf2onnx
+from .convert_onnx import torch_to_onnx
 
-def torch_to_tf(model: nn.Module, model_path: str):
+def torch_to_tf(model: nn.Module, model_path: str, export_dir: str = None, sample_batch=None, cache_dir: str = None):
     """
-    Convert a PyTorch model to TensorFlow format.
+    Convert a PyTorch model to TensorFlow format (via ONNX).
     :param model: PyTorch model to convert.
-    :param model_path: Path to the PyTorch model weights.
+    :param model_path: Path to the PyTorch model weights (sharded safetensors dir, .safetensors or torch.save file).
+    :param export_dir: Directory to write the TensorFlow SavedModel to (optional).
+    :param sample_batch: Example input used to derive the input signature.
+    :param cache_dir: Reuse a previous ONNX export of the same checkpoint from here.
     :return: TensorFlow model.
     """
-    model.load_state_dict(torch.load(model_path))
-    model.eval()  # Set the model to evaluation mode
-    dummy_input = torch.randn(1, 3, 224, 224)  # Adjust as necessary for input
-    model_onnx = torch.onnx.export(model, dummy_input, model_path + ".onnx")
-    
+    onnx_path = model_path.rstrip("/") + ".onnx"
+    torch_to_onnx(model, model_path, onnx_path, sample_batch=sample_batch, cache_dir=cache_dir)
+
     # Convert ONNX to TensorFlow
-    
-    tf_model = tf2onnx.convert.from_onnx(model_onnx)
-    return tf_model
+    return onnx_to_tf(onnx_path, export_dir)
 
-def onnx_to_tf(onnx_model_path: str):
+def onnx_to_tf(onnx_model_path: str, export_dir: str = None):
     """
     Convert ONNX model to TensorFlow.
     :param onnx_model_path: Path to the ONNX model.
+    :param export_dir: Directory to write the TensorFlow SavedModel to (optional).
     :return: TensorFlow model.
     """
+    from onnx_tf.backend import prepare
 
     onnx_model = onnx.load(onnx_model_path)
-    tf_model = tf2onnx.convert.from_onnx(onnx_model)
+    tf_model = prepare(onnx_model)
+    if export_dir:
+        tf_model.export_graph(export_dir)
     return tf_model
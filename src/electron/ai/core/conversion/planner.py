@@ -0,0 +1,179 @@
+# conversion/planner.py
+
+import heapq
+import importlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from .signature import checkpoint_hash, conversion_key, copy_artifact
+
+FORMAT_EXTENSIONS = {
+    "torch": "",        # sharded safetensors directory or torch.save file
+    "hf": "",           # Hugging Face checkpoint directory
+    "onnx": ".onnx",
+    "tf": "",           # TensorFlow SavedModel directory
+    "gguf": ".gguf",
+}
+
+# ---------- conversion steps (top-level so they can run in worker processes) ----------
+
+def _load_factory(spec):
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+def _sample_batch(context):
+    if not context.get("sample_batch"):
+        return None
+    import torch
+    return torch.load(context["sample_batch"])
+
+def _torch_to_onnx(src, dst, context):
+    from .convert_onnx import torch_to_onnx
+    model = _load_factory(context["model_factory"])()
+    torch_to_onnx(model, src, dst, sample_batch=_sample_batch(context))
+
+def _hf_to_onnx(src, dst, context):
+    from transformers import AutoModel
+    from .signature import infer_input_signature, export_onnx, validate_onnx
+    model = AutoModel.from_pretrained(src)
+    specs = infer_input_signature(model, _sample_batch(context))
+    inputs = export_onnx(model, dst, specs)
+    if not validate_onnx(model, dst, inputs)["ok"]:
+        raise ValueError("ONNX export diverges from PyTorch")
+
+def _onnx_to_tf(src, dst, context):
+    from .convert_tf import onnx_to_tf
+    onnx_to_tf(src, export_dir=dst)
+
+def _tf_to_onnx(src, dst, context):
+    import tensorflow as tf
+    from .convert_onnx import tf_to_onnx
+    tf_to_onnx(tf.keras.models.load_model(src), dst)
+
+def _hf_to_gguf(src, dst, context):
+    from .convert_gguf import checkpoint_to_gguf
+    checkpoint_to_gguf(src, dst, context.get("gguf_quant_type", "F16"))
+
+# (source, target): (function, relative cost)
+DEFAULT_EDGES = {
+    ("torch", "onnx"): (_torch_to_onnx, 2),
+    ("hf", "onnx"): (_hf_to_onnx, 3),
+    ("onnx", "tf"): (_onnx_to_tf, 2),
+    ("tf", "onnx"): (_tf_to_onnx, 2),
+    ("hf", "gguf"): (_hf_to_gguf, 2),
+}
+
+def _run_step(fn, src, dst, context):
+    start = time.perf_counter()
+    tmp = dst + ".tmp"
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    fn(src, tmp, context)
+    os.replace(tmp, dst)
+    return time.perf_counter() - start
+
+class ConversionPlanner:
+    def __init__(self, cache_dir: str = "conversion_cache", max_workers: int = None, edges: dict = None):
+        """
+        Plan and run multi-step format conversions over a graph of converters.
+
+        Intermediate artifacts are cached by input checkpoint hash and conversion path,
+        so shared prefixes (e.g. one ONNX export feeding both TF and another target)
+        run once, and independent branches run in parallel processes.
+
+        :param cache_dir: Where intermediate and final artifacts are cached.
+        :param max_workers: Process pool size for independent branches.
+        :param edges: {(source, target): (fn(src, dst, context), cost)} (defaults to DEFAULT_EDGES).
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.edges = dict(edges or DEFAULT_EDGES)
+
+    def register(self, source: str, target: str, fn, cost: float = 1):
+        self.edges[(source, target)] = (fn, cost)
+
+    def shortest_path(self, source: str, target: str) -> list:
+        """Cheapest list of formats from source to target (Dijkstra)."""
+        queue = [(0, source, [source])]
+        best = {source: 0}
+        while queue:
+            cost, node, path = heapq.heappop(queue)
+            if node == target:
+                return path
+            if cost > best.get(node, float("inf")):
+                continue
+            for (src, dst), (_, edge_cost) in self.edges.items():
+                if src == node and cost + edge_cost < best.get(dst, float("inf")):
+                    best[dst] = cost + edge_cost
+                    heapq.heappush(queue, (cost + edge_cost, dst, path + [dst]))
+        raise ValueError(f"No conversion path from {source} to {target}")
+
+    def plan(self, source: str, targets) -> list:
+        """
+        Merge the shortest paths to every target into a tree of steps.
+
+        :return: list of (prefix, parent_prefix) tuples, parents before children.
+        """
+        steps = []
+        for target in targets:
+            path = tuple(self.shortest_path(source, target))
+            for i in range(1, len(path)):
+                step = (path[:i + 1], path[:i])
+                if step not in steps:
+                    steps.append(step)
+        return steps
+
+    def _artifact_path(self, input_key, prefix):
+        key = conversion_key(input_key, prefix)
+        return os.path.join(self.cache_dir, key, "model" + FORMAT_EXTENSIONS.get(prefix[-1], ""))
+
+    def run(self, source_format: str, source_path: str, targets, output_dir: str, context: dict = None) -> dict:
+        """
+        Convert source_path into every target format.
+
+        :param source_format: Format of source_path (a key of FORMAT_EXTENSIONS).
+        :param source_path: Checkpoint file or directory.
+        :param targets: Target formats.
+        :param output_dir: Where the final artifacts are copied.
+        :param context: Options for the steps (model_factory, sample_batch, gguf_quant_type).
+        :return: dict - Output paths and per-step timings.
+        """
+        context = context or {}
+        input_key = conversion_key(checkpoint_hash(source_path), context)
+        steps = self.plan(source_format, targets)
+        artifacts = {(source_format,): source_path}
+        timings = []
+
+        pending = list(steps)
+        running = {}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for step in [s for s in pending if s[1] in artifacts]:
+                    pending.remove(step)
+                    prefix, parent = step
+                    dst = self._artifact_path(input_key, prefix)
+                    if os.path.exists(dst):
+                        artifacts[prefix] = dst
+                        timings.append({"step": f"{parent[-1]}->{prefix[-1]}", "seconds": 0.0, "cached": True})
+                        continue
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    fn, _ = self.edges[(parent[-1], prefix[-1])]
+                    running[pool.submit(_run_step, fn, artifacts[parent], dst, context)] = (prefix, parent, dst)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    prefix, parent, dst = running.pop(future)
+                    seconds = future.result()
+                    artifacts[prefix] = dst
+                    timings.append({"step": f"{parent[-1]}->{prefix[-1]}", "seconds": seconds, "cached": False})
+
+        os.makedirs(output_dir, exist_ok=True)
+        outputs = {}
+        for target in targets:
+            prefix = tuple(self.shortest_path(source_format, target))
+            output_path = os.path.join(output_dir, "model-" + target + FORMAT_EXTENSIONS.get(target, ""))
+            copy_artifact(artifacts[prefix], output_path)
+            outputs[target] = output_path
+        return {"outputs": outputs, "steps": timings}
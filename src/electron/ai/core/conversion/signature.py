@@ -0,0 +1,256 @@
+# conversion/signature.py
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import numpy as np
+import torch
+
+class InputSpec:
+    def __init__(self, name: str, shape, dtype: torch.dtype, dynamic_axes: dict = None):
+        """
+        Shape and dtype of one model input.
+
+        :param name: Input name (also the keyword passed to the model's forward).
+        :param shape: Example shape used for the dummy input.
+        :param dtype: Tensor dtype.
+        :param dynamic_axes: {axis: name} of axes allowed to vary at runtime.
+        """
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.dynamic_axes = dynamic_axes or {0: "batch"}
+
+    def dummy(self) -> torch.Tensor:
+        if self.dtype.is_floating_point:
+            return torch.randn(self.shape, dtype=self.dtype)
+        if self.name == "attention_mask":
+            return torch.ones(self.shape, dtype=self.dtype)
+        return torch.randint(0, 100, self.shape, dtype=self.dtype)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "shape": list(self.shape), "dtype": str(self.dtype),
+                "dynamic_axes": {str(k): v for k, v in self.dynamic_axes.items()}}
+
+def _spec_from_tensor(name, tensor):
+    axes = {0: "batch"}
+    # Integer matrices are token ids or masks; their second axis is the sequence
+    if tensor.dim() >= 2 and not tensor.is_floating_point():
+        axes[1] = "sequence"
+    return InputSpec(name, tensor.shape, tensor.dtype, axes)
+
+# Input the original exporter traced with when nothing else describes the model
+DEFAULT_INPUT_SHAPE = (1, 3, 224, 224)
+
+def forward_parameter_names(model: torch.nn.Module) -> list:
+    """Names of the positional parameters of model.forward ([] if it only takes *args/**kwargs)."""
+    try:
+        parameters = inspect.signature(model.forward).parameters.values()
+    except (TypeError, ValueError):
+        return []
+    return [p.name for p in parameters
+            if p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+
+def _positional_names(count, names=None):
+    names = list(names or [])
+    if len(names) >= count:
+        return names[:count]
+    if count == 1:
+        return ["input"]
+    return names + [f"input_{i}" for i in range(len(names), count)]
+
+def signature_from_sample(sample_batch, names=None) -> list:
+    """
+    Derive input specs from a sample batch (tensor, tuple/list of tensors or dict of tensors).
+
+    :param names: Names for positional samples, usually forward_parameter_names(model);
+                  'input' / 'input_<i>' when not given.
+    """
+    if isinstance(sample_batch, torch.Tensor):
+        return [_spec_from_tensor(_positional_names(1, names)[0], sample_batch)]
+    if isinstance(sample_batch, dict):
+        return [_spec_from_tensor(name, t) for name, t in sample_batch.items() if isinstance(t, torch.Tensor)]
+    return [_spec_from_tensor(name, t) for name, t in zip(_positional_names(len(sample_batch), names), sample_batch)]
+
+def signature_from_config(config, batch_size: int = 1, seq_len: int = 16) -> list:
+    """
+    Derive input specs from a Hugging Face style config.
+
+    Text models get input_ids/attention_mask with dynamic batch and sequence axes;
+    vision models get pixel_values with a dynamic batch axis.
+    """
+    config = config.to_dict() if hasattr(config, "to_dict") else dict(config)
+    text_axes = {0: "batch", 1: "sequence"}
+    if "vocab_size" in config:
+        return [
+            InputSpec("input_ids", (batch_size, seq_len), torch.int64, text_axes),
+            InputSpec("attention_mask", (batch_size, seq_len), torch.int64, text_axes),
+        ]
+    if "image_size" in config:
+        size = config["image_size"]
+        height, width = (size, size) if isinstance(size, int) else size
+        return [InputSpec("pixel_values", (batch_size, config.get("num_channels", 3), height, width), torch.float32)]
+    raise ValueError("Cannot infer inputs from config; pass a sample batch")
+
+def infer_input_signature(model: torch.nn.Module, sample_batch=None) -> list:
+    """
+    Input specs from a sample batch if given, otherwise from model.config, otherwise a
+    single float image batch of DEFAULT_INPUT_SHAPE (the exporter's historical default).
+    """
+    names = forward_parameter_names(model)
+    if sample_batch is not None:
+        return signature_from_sample(sample_batch, names)
+    if hasattr(model, "config"):
+        return signature_from_config(model.config)
+    return [InputSpec(_positional_names(1, names)[0], DEFAULT_INPUT_SHAPE, torch.float32)]
+
+def dummy_inputs(specs) -> dict:
+    return {spec.name: spec.dummy() for spec in specs}
+
+def model_call_args(model: torch.nn.Module, inputs: dict):
+    """
+    Split named inputs into (args, kwargs) for calling model.forward.
+
+    Inputs named after forward's leading parameters are passed positionally and the
+    rest by keyword; if any name is not a forward parameter, everything is passed
+    positionally in order.
+    """
+    parameters = forward_parameter_names(model)
+    if not parameters or any(name not in parameters for name in inputs):
+        return tuple(inputs.values()), {}
+    args = []
+    for name in parameters:
+        if name not in inputs:
+            break
+        args.append(inputs[name])
+    positional = set(parameters[:len(args)])
+    kwargs = {name: inputs[name] for name in parameters if name in inputs and name not in positional}
+    return tuple(args), kwargs
+
+def export_onnx(model: torch.nn.Module, onnx_path: str, specs, sample_batch=None, output_names=("output",), opset: int = 17):
+    """
+    Export a model to ONNX using its input specs, with the specs' dynamic axes.
+
+    :param sample_batch: Real inputs to trace with (defaults to dummy inputs from the specs).
+    """
+    inputs = dummy_inputs(specs) if sample_batch is None else _as_named(sample_batch, specs)
+    args, kwargs = model_call_args(model, inputs)
+    # ONNX inputs follow the call order: positional first, then keywords
+    input_names = [spec.name for spec in specs if spec.name not in kwargs] + list(kwargs)
+    dynamic_axes = {spec.name: spec.dynamic_axes for spec in specs}
+    dynamic_axes[output_names[0]] = {0: "batch"}
+    model.eval()
+    with torch.no_grad():
+        # A trailing dict is read as keyword arguments, so only add one for real keywords
+        torch.onnx.export(model, args + ((kwargs,) if kwargs else ()), onnx_path, input_names=input_names,
+                          output_names=list(output_names), dynamic_axes=dynamic_axes, opset_version=opset)
+    return inputs
+
+def _as_named(sample_batch, specs):
+    if isinstance(sample_batch, dict):
+        return {spec.name: sample_batch[spec.name] for spec in specs}
+    if isinstance(sample_batch, torch.Tensor):
+        sample_batch = [sample_batch]
+    return {spec.name: t for spec, t in zip(specs, sample_batch)}
+
+def _first_output(output):
+    if isinstance(output, torch.Tensor):
+        return output
+    if isinstance(output, dict):
+        return next(v for v in output.values() if isinstance(v, torch.Tensor))
+    return next(v for v in output if isinstance(v, torch.Tensor))
+
+def validate_onnx(model: torch.nn.Module, onnx_path: str, inputs: dict, rtol: float = 1e-3, atol: float = 1e-4) -> dict:
+    """
+    Check that the ONNX model reproduces the PyTorch model's first output on the given inputs.
+
+    :return: dict with max_abs_diff and ok.
+    """
+    import onnxruntime as ort
+
+    model.eval()
+    with torch.no_grad():
+        args, kwargs = model_call_args(model, inputs)
+        expected = _first_output(model(*args, **kwargs)).float().numpy()
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    feed = {i.name: inputs[i.name].numpy() for i in session.get_inputs()}
+    actual = session.run(None, feed)[0]
+    return {
+        "max_abs_diff": float(np.abs(actual - expected).max()),
+        "ok": bool(np.allclose(actual, expected, rtol=rtol, atol=atol)),
+    }
+
+# (path, ((file, mtime, size), ...)) -> digest, so unchanged checkpoints are hashed once
+_hash_cache = {}
+
+def checkpoint_hash(model_path: str) -> str:
+    """
+    sha256 over a checkpoint file, or over every file of a checkpoint directory.
+
+    Digests are memoized by path and the mtime/size of every file, so repeated calls on
+    an unchanged checkpoint do not re-read it.
+    """
+    if os.path.isdir(model_path):
+        paths = sorted(os.path.join(root, f) for root, _, files in os.walk(model_path) for f in files)
+    else:
+        paths = [model_path]
+    stats = tuple((path, st.st_mtime_ns, st.st_size) for path, st in ((p, os.stat(p)) for p in paths))
+    cache_key = (os.path.abspath(model_path), stats)
+    if cache_key in _hash_cache:
+        return _hash_cache[cache_key]
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.relpath(path, model_path).encode() if path != model_path else b"")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    _hash_cache[cache_key] = digest.hexdigest()
+    return _hash_cache[cache_key]
+
+def conversion_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+def cached_conversion(cache_dir: str, key: str, output_path: str, convert_fn) -> bool:
+    """
+    Reuse a cached conversion output if one exists for key, otherwise run convert_fn and cache it.
+
+    convert_fn writes into a fresh directory that is cached as a whole, so files written
+    next to the artifact (ONNX external data of models over 2GB) are cached and restored
+    with it.
+
+    :param convert_fn: callable(path) writing the converted artifact to path.
+    :return: True if the output came from the cache.
+    """
+    name = os.path.basename(output_path)
+    cached_dir = os.path.join(cache_dir, key)
+    hit = os.path.exists(os.path.join(cached_dir, name))
+    if not hit:
+        staging = f"{cached_dir}.tmp-{os.getpid()}"
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+        os.makedirs(staging)
+        try:
+            convert_fn(os.path.join(staging, name))
+            if os.path.exists(cached_dir):
+                # Left by an interrupted run without the artifact, or cached concurrently
+                shutil.rmtree(cached_dir)
+            os.replace(staging, cached_dir)
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+    output_dir = os.path.dirname(output_path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+    for entry in os.listdir(cached_dir):
+        copy_artifact(os.path.join(cached_dir, entry), os.path.join(output_dir, entry))
+    return hit
+
+def copy_artifact(src, dst):
+    """Copy a file or directory artifact, replacing dst."""
+    if os.path.isdir(src):
+        if os.path.exists(dst):
+            shutil.rmtree(dst)
+        shutil.copytree(src, dst)
+    else:
+        shutil.copyfile(src, dst)
@@ -0,0 +1,107 @@
+# deployment/adapters.py
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import llama_cpp
+from llama_cpp import LlamaRAMCache
+
+# llama-cpp-python renamed the LoRA bindings in 0.3.x; resolve whichever this build has
+if hasattr(llama_cpp, "llama_adapter_lora_init"):
+    _lora_init = llama_cpp.llama_adapter_lora_init
+    _lora_free = llama_cpp.llama_adapter_lora_free
+    _lora_set = llama_cpp.llama_set_adapter_lora
+    _lora_clear = llama_cpp.llama_clear_adapter_lora
+else:
+    _lora_init = llama_cpp.llama_lora_adapter_init
+    _lora_free = llama_cpp.llama_lora_adapter_free
+    _lora_set = llama_cpp.llama_lora_adapter_set
+    _lora_clear = llama_cpp.llama_lora_adapter_clear
+
+class AdapterManager:
+    def __init__(self, llm, adapter_dir: str = "adapters", max_loaded: int = 4, cache_capacity_bytes: int = 512 << 20):
+        """
+        Serve many LoRA adapters on top of one base model.
+
+        The base weights are loaded once; adapters (GGUF LoRA files, e.g. from llama.cpp's
+        convert_lora_to_gguf.py) are attached to the context per request. Loaded adapters
+        are kept in an LRU cache of max_loaded entries. Each adapter gets its own prompt
+        KV cache, since KV state computed under one adapter is wrong for another.
+
+        :param llm: Llama - The running base model.
+        :param adapter_dir: Directory of adapter .gguf files.
+        :param max_loaded: Adapters kept in memory before the least recently used is freed.
+        :param cache_capacity_bytes: Prompt cache size per adapter.
+        """
+        self.llm = llm
+        self.adapter_dir = adapter_dir
+        self.max_loaded = max_loaded
+        self.cache_capacity_bytes = cache_capacity_bytes
+        self.base_cache = llm.cache
+        self.active = None
+        self.active_scale = None
+        self._loaded = OrderedDict()    # name -> (adapter pointer, prompt cache)
+        self._lock = threading.Lock()
+
+    def loaded(self) -> list:
+        return list(self._loaded)
+
+    def _load(self, name):
+        if name in self._loaded:
+            self._loaded.move_to_end(name)
+            return self._loaded[name]
+        path = os.path.join(self.adapter_dir, name + ".gguf")
+        if os.path.basename(name) != name or not os.path.exists(path):
+            raise FileNotFoundError(f"Adapter not found: {name}")
+        adapter = _lora_init(self.llm.model, path.encode("utf-8"))
+        if not adapter:
+            raise RuntimeError(f"Failed to load adapter: {name}")
+        while len(self._loaded) >= self.max_loaded:
+            self._evict(next(iter(self._loaded)))
+        self._loaded[name] = (adapter, LlamaRAMCache(capacity_bytes=self.cache_capacity_bytes))
+        return self._loaded[name]
+
+    def _evict(self, name):
+        if name == self.active:
+            self._activate(None, None)
+        adapter, _ = self._loaded.pop(name)
+        _lora_free(adapter)
+
+    def _activate(self, name, scale):
+        if name == self.active and scale == self.active_scale:
+            return
+        # Load first: a missing or broken adapter leaves the current one attached
+        adapter, cache = self._load(name) if name is not None else (None, self.base_cache)
+        _lora_clear(self.llm.ctx)
+        # The context is on the base model until the new adapter is attached
+        self.active = self.active_scale = None
+        # Drop the evaluated tokens so the next prompt is not matched against KV from another adapter
+        self.llm.reset()
+        self.llm.set_cache(self.base_cache)
+        if adapter is not None and _lora_set(self.llm.ctx, adapter, scale) != 0:
+            raise RuntimeError(f"Failed to attach adapter: {name}")
+        self.llm.set_cache(cache)
+        self.active, self.active_scale = name, scale
+
+    @contextmanager
+    def use(self, name: str = None, scale: float = 1.0):
+        """
+        Hold the model with the given adapter attached (None for the base model).
+
+        Requests are serialized: the context is shared, so only one adapter can be active.
+        """
+        with self._lock:
+            self._activate(name, scale if name else None)
+            yield self.llm
+
+    def unload(self, name: str):
+        with self._lock:
+            if name in self._loaded:
+                self._evict(name)
+
+    def close(self):
+        """Detach and free every adapter; call before releasing the base model."""
+        with self._lock:
+            for name in list(self._loaded):
+                self._evict(name)
@@ -0,0 +1,154 @@
+# deployment/onnx_runtime.py
+
+import hashlib
+import os
+import queue
+import statistics
+import time
+from contextlib import contextmanager
+import numpy as np
+import onnxruntime as ort
+
+OPTIMIZATION_LEVELS = {
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ifusionone", "onnx")
+
+def _file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def optimize_model(onnx_path: str, cache_dir: str = DEFAULT_CACHE_DIR, level: str = "all") -> str:
+    """
+    Run ONNX Runtime graph optimizations offline and cache the optimized model.
+
+    The cache key covers the model bytes, the optimization level and the onnxruntime
+    version, so a re-export or an upgrade produces a fresh file.
+
+    :param onnx_path: Path to the exported ONNX model.
+    :param cache_dir: Directory for optimized models.
+    :param level: 'basic', 'extended' or 'all'.
+    :return: Path to the optimized model.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha256(f"{_file_hash(onnx_path)}:{level}:{ort.__version__}".encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(onnx_path))[0]
+    optimized_path = os.path.join(cache_dir, f"{stem}-{key}.opt.onnx")
+    if not os.path.exists(optimized_path):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = OPTIMIZATION_LEVELS[level]
+        options.optimized_model_filepath = optimized_path
+        ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+    return optimized_path
+
+class OnnxInferenceBackend:
+    def __init__(self, onnx_path: str, pool_size: int = 1, intra_op_threads: int = None, inter_op_threads: int = 1,
+                 optimization_level: str = "all", cache_dir: str = DEFAULT_CACHE_DIR, providers=None):
+        """
+        Pooled ONNX Runtime sessions over an offline-optimized model.
+
+        :param onnx_path: Path to the exported ONNX model.
+        :param pool_size: Number of sessions; concurrent callers each borrow one.
+        :param intra_op_threads: Threads per operator (default: CPU count / pool_size).
+        :param inter_op_threads: Threads for running independent graph branches.
+        :param optimization_level: Graph optimization level applied offline.
+        :param cache_dir: Directory for optimized models.
+        :param providers: ONNX Runtime execution providers (default CPU).
+        """
+        self.onnx_path = onnx_path
+        self.optimized_path = optimize_model(onnx_path, cache_dir, optimization_level)
+        options = ort.SessionOptions()
+        # The cached model is already optimized; skip re-running the passes per session
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        options.intra_op_num_threads = intra_op_threads or max(1, (os.cpu_count() or 1) // pool_size)
+        options.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        providers = providers or ["CPUExecutionProvider"]
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(ort.InferenceSession(self.optimized_path, options, providers=providers))
+        probe = self._pool.queue[0]
+        self.input_names = [i.name for i in probe.get_inputs()]
+        self.output_names = [o.name for o in probe.get_outputs()]
+
+    @contextmanager
+    def session(self):
+        session = self._pool.get()
+        try:
+            yield session
+        finally:
+            self._pool.put(session)
+
+    def run(self, inputs: dict) -> dict:
+        """Run one forward pass on a dict of input arrays."""
+        with self.session() as session:
+            outputs = session.run(self.output_names, inputs)
+        return dict(zip(self.output_names, outputs))
+
+    def predict(self, inputs, batch_size: int = 32) -> dict:
+        """
+        Batched inference, splitting inputs along the batch axis.
+
+        :param inputs: dict of input name -> np.ndarray, or a single array for single-input models.
+        :param batch_size: Rows per session run.
+        :return: dict of output name -> np.ndarray.
+        """
+        if not isinstance(inputs, dict):
+            inputs = {self.input_names[0]: inputs}
+        n_rows = len(next(iter(inputs.values())))
+        chunks = {name: [] for name in self.output_names}
+        for start in range(0, n_rows, batch_size):
+            batch = {name: np.ascontiguousarray(array[start:start + batch_size]) for name, array in inputs.items()}
+            for name, output in self.run(batch).items():
+                chunks[name].append(output)
+        return {name: np.concatenate(parts) for name, parts in chunks.items()}
+
+def _time_calls(fn, n_runs):
+    fn()  # Warm-up
+    latencies = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def benchmark_against_torch(model, backend: OnnxInferenceBackend, sample_inputs: dict, batch_sizes=(1, 8, 32), n_runs: int = 20) -> list:
+    """
+    Compare ONNX Runtime and PyTorch eager latency on the same inputs.
+
+    :param model: The PyTorch model the ONNX file was exported from.
+    :param backend: Backend serving the exported model.
+    :param sample_inputs: dict of input name -> np.ndarray with at least max(batch_sizes) rows.
+    :param batch_sizes: Batch sizes to measure.
+    :param n_runs: Timed runs per batch size.
+    :return: One row per batch size with p50 latencies and the speedup.
+    """
+    import torch
+    from ..conversion.signature import model_call_args
+
+    model.eval()
+    results = []
+    for batch_size in batch_sizes:
+        batch = {name: array[:batch_size] for name, array in sample_inputs.items()}
+        # Same call the export traced: graph inputs in order, positionally where forward allows
+        args, kwargs = model_call_args(model, {name: torch.from_numpy(batch[name]) for name in backend.input_names})
+        with torch.inference_mode():
+            torch_latencies = _time_calls(lambda: model(*args, **kwargs), n_runs)
+        ort_latencies = _time_calls(lambda: backend.run(batch), n_runs)
+        torch_ms = statistics.median(torch_latencies) * 1000
+        ort_ms = statistics.median(ort_latencies) * 1000
+        results.append({
+            "batch_size": batch_size,
+            "torch_ms_p50": torch_ms,
+            "onnxruntime_ms_p50": ort_ms,
+            "speedup": torch_ms / ort_ms,
+        })
+    return results
@@ -1,5 +1,8 @@
-from transformers import AutoModelWithHeads, AutoTokenizer, Trainer, TrainingArguments
+from transformers import AutoModelWithHeads, AutoTokenizer
 from datasets import load_dataset
+from .data import prepare_dataset
+from .training import build_trainer
+from .checkpointing import run_output_dir, train_resumable
 from transformers.adapters import AdapterConfig
 
 class AdapterFineTuner:
@@ -34,31 +37,18 @@ class AdapterFineTuner:
         self.model.train_adapter(self.task)
         return self.model
 
-    def fine_tune(self, dataset):
+    def fine_tune(self, dataset, num_proc=None, profile=None, run_name=None, tracker=None):
         """
         Fine-tune the model with an adapter on the dataset.
         :param dataset: Dataset - The dataset to fine-tune on.
+        :param num_proc: int - Tokenization processes (see prepare_dataset).
+        :param profile: TrainingProfile - Training settings (defaults to TrainingProfile()).
+        :param run_name: str - Name of the run; re-running a named run resumes from its latest checkpoint.
+        :param tracker: ExperimentTracker - Stream loss, throughput and memory into this experiment.
         :return: Trainer - The fine-tuning trainer.
         """
-        tokenized_data = dataset.map(lambda e: self.tokenizer(e['sentence'], padding=True, truncation=True), batched=True)
-        tokenized_data.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
-
-        training_args = TrainingArguments(
-            output_dir='./results',          # output directory
-            evaluation_strategy="epoch",     # evaluation is done after each epoch
-            learning_rate=2e-5,              # learning rate
-            per_device_train_batch_size=16,  # batch size for training
-            per_device_eval_batch_size=64,   # batch size for evaluation
-            num_train_epochs=3,              # number of training epochs
-            weight_decay=0.01,               # strength of weight decay
-            logging_dir='./logs',            # directory for storing logs
-        )
-
-        trainer = Trainer(
-            model=self.model,
-            args=training_args,
-            train_dataset=tokenized_data["train"],
-            eval_dataset=tokenized_data["validation"],
-        )
-        trainer.train()
+        tokenized_data = prepare_dataset(dataset, self.tokenizer, num_proc=num_proc)
+        run_dir = run_output_dir('adapter', self.model_name, run_name)
+        trainer = build_trainer(self.model, self.tokenizer, tokenized_data, profile, output_dir=run_dir, tracker=tracker)
+        train_resumable(trainer)
         return trainer
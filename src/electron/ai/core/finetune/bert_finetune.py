@@ -1,7 +1,10 @@
 # ai/core/finetune/bert_finetune.py
 
-from transformers import BertForSequenceClassification, BertTokenizer, Trainer, TrainingArguments
+from transformers import BertForSequenceClassification, BertTokenizer
 from datasets import load_dataset
+from .data import prepare_dataset
+from .training import build_trainer
+from .checkpointing import run_output_dir, train_resumable
 
 class BERTFineTuner:
     def __init__(self, model_name='bert-base-uncased', task='mrpc'):
@@ -32,31 +35,18 @@ class BERTFineTuner:
         self.model = BertForSequenceClassification.from_pretrained(self.model_name, num_labels=2)
         return self.model
 
-    def fine_tune(self, dataset):
+    def fine_tune(self, dataset, num_proc=None, profile=None, run_name=None, tracker=None):
         """
         Fine-tune the BERT model with the dataset.
         :param dataset: Dataset - The dataset to fine-tune on.
+        :param num_proc: int - Tokenization processes (see prepare_dataset).
+        :param profile: TrainingProfile - Training settings (defaults to TrainingProfile()).
+        :param run_name: str - Name of the run; re-running a named run resumes from its latest checkpoint.
+        :param tracker: ExperimentTracker - Stream loss, throughput and memory into this experiment.
         :return: Trainer - The fine-tuning trainer.
         """
-        tokenized_data = dataset.map(lambda e: self.tokenizer(e['sentence'], padding=True, truncation=True), batched=True)
-        tokenized_data.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
-
-        training_args = TrainingArguments(
-            output_dir='./results',          # output directory
-            evaluation_strategy="epoch",     # evaluation is done after each epoch
-            learning_rate=2e-5,              # learning rate
-            per_device_train_batch_size=16, 
-            per_device_eval_batch_size=64,   # batch size for evaluation
-            num_train_epochs=3,              # number of training epochs
-            weight_decay=0.01,               # strength of weight decay
-            logging_dir='./logs',            # directory for storing logs
-        )
-
-        trainer = Trainer(
-            model=self.model,
-            args=training_args,
-            train_dataset=tokenized_data["train"],
-            eval_dataset=tokenized_data["validation"],
-        )
-        trainer.train()
+        tokenized_data = prepare_dataset(dataset, self.tokenizer, num_proc=num_proc)
+        run_dir = run_output_dir('bert', self.model_name, run_name)
+        trainer = build_trainer(self.model, self.tokenizer, tokenized_data, profile, output_dir=run_dir, tracker=tracker)
+        train_resumable(trainer)
         return trainer
\ No newline at end of file
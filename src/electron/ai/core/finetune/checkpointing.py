@@ -0,0 +1,174 @@
+# ai/core/finetune/checkpointing.py
+
+import dataclasses
+import json
+import os
+import random
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from safetensors.torch import save_file
+from transformers import TrainerCallback
+
+DEFAULT_RUNS_DIR = "runs"
+
+_CHECKPOINT_PATTERN = re.compile(r"^checkpoint-(\d+)$")
+
+def run_output_dir(method: str, model_name: str, run_name: str = None, runs_dir: str = DEFAULT_RUNS_DIR) -> str:
+    """
+    Output directory of one finetuning run.
+
+    A named run always maps to the same directory, so re-running it resumes from its
+    checkpoints; unnamed runs get a fresh timestamped directory.
+
+    :param method: str - Finetuning method (e.g. 'lora').
+    :param model_name: str - Base model name.
+    :param run_name: str - Stable run name, or None for a new run.
+    :param runs_dir: str - Parent directory of all runs.
+    :return: str - The run directory (created).
+    """
+    if run_name is None:
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "-", model_name).strip("-")
+        run_name = f"{method}-{slug}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    path = os.path.join(runs_dir, run_name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def list_checkpoints(run_dir: str) -> list:
+    """Completed checkpoints of a run as (step, path), oldest first."""
+    if not os.path.isdir(run_dir):
+        return []
+    checkpoints = []
+    for name in os.listdir(run_dir):
+        match = _CHECKPOINT_PATTERN.match(name)
+        if match:
+            checkpoints.append((int(match.group(1)), os.path.join(run_dir, name)))
+    return sorted(checkpoints)
+
+def find_latest_checkpoint(run_dir: str) -> str:
+    """Path of the newest completed checkpoint of a run, or None."""
+    checkpoints = list_checkpoints(run_dir)
+    return checkpoints[-1][1] if checkpoints else None
+
+def _to_cpu(obj):
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+def _rng_state():
+    state = {"python": random.getstate(), "numpy": np.random.get_state(), "cpu": torch.random.get_rng_state()}
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.random.get_rng_state_all()
+    return state
+
+def _is_peft(model):
+    return hasattr(model, "peft_config")
+
+class AsyncCheckpointCallback(TrainerCallback):
+    def __init__(self, save_steps: int = 500, save_total_limit: int = 2, keep_every: int = None):
+        """
+        Write checkpoints from a background thread in the Trainer's own checkpoint layout.
+
+        The training loop only pays for copying tensors to CPU; serialization happens on
+        a writer thread, into a temporary directory renamed into place when complete, so a
+        crash never leaves a half-written checkpoint. PEFT models save only their adapter
+        weights, and frozen-backbone models only their trainable parameters. At most one
+        snapshot is pending at a time, which bounds the extra memory to one copy.
+
+        Use with save_strategy='no' so the Trainer does not also save synchronously.
+
+        :param save_steps: int - Steps between checkpoints (a checkpoint is also written at the end).
+        :param save_total_limit: int - Most recent checkpoints to keep.
+        :param keep_every: int - Also keep checkpoints whose step is a multiple of this.
+        """
+        self.save_steps = save_steps
+        self.save_total_limit = save_total_limit
+        self.keep_every = keep_every
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-writer")
+        self._pending = None
+        self._last_saved_step = None
+
+    def on_step_end(self, args, state, control, **kwargs):
+        if self.save_steps and state.global_step % self.save_steps == 0:
+            self._save(args, state, **kwargs)
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if state.global_step != self._last_saved_step:
+            self._save(args, state, **kwargs)
+        self.wait()
+
+    def wait(self):
+        """Block until the pending checkpoint is on disk."""
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def _save(self, args, state, model=None, optimizer=None, lr_scheduler=None, **kwargs):
+        if not state.is_world_process_zero:
+            return
+        self.wait()
+        if _is_peft(model):
+            from peft import get_peft_model_state_dict
+            weights = _to_cpu(get_peft_model_state_dict(model))
+        else:
+            weights = _to_cpu({name: p for name, p in model.named_parameters() if p.requires_grad})
+        snapshot = {
+            "peft": _is_peft(model),
+            "weights": {name: t.contiguous() for name, t in weights.items()},
+            "optimizer": _to_cpu(optimizer.state_dict()) if optimizer is not None else None,
+            "scheduler": lr_scheduler.state_dict() if lr_scheduler is not None else None,
+            "trainer_state": json.dumps(dataclasses.asdict(state), indent=2, sort_keys=True) + "\n",
+            "rng": _rng_state(),
+        }
+        if snapshot["peft"]:
+            snapshot["peft_config"] = model.peft_config[model.active_adapter]
+        self._last_saved_step = state.global_step
+        self._pending = self._executor.submit(self._write, args.output_dir, state.global_step, snapshot)
+
+    def _write(self, output_dir, step, snapshot):
+        final = os.path.join(output_dir, f"checkpoint-{step}")
+        tmp = final + ".tmp"
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(tmp)
+        if snapshot["peft"]:
+            save_file(snapshot["weights"], os.path.join(tmp, "adapter_model.safetensors"), metadata={"format": "pt"})
+            snapshot["peft_config"].save_pretrained(tmp)
+        else:
+            save_file(snapshot["weights"], os.path.join(tmp, "model.safetensors"), metadata={"format": "pt"})
+        if snapshot["optimizer"] is not None:
+            torch.save(snapshot["optimizer"], os.path.join(tmp, "optimizer.pt"))
+        if snapshot["scheduler"] is not None:
+            torch.save(snapshot["scheduler"], os.path.join(tmp, "scheduler.pt"))
+        torch.save(snapshot["rng"], os.path.join(tmp, "rng_state.pth"))
+        with open(os.path.join(tmp, "trainer_state.json"), "w") as f:
+            f.write(snapshot["trainer_state"])
+        if os.path.exists(final):
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+        self._apply_retention(output_dir)
+
+    def _apply_retention(self, output_dir):
+        checkpoints = list_checkpoints(output_dir)
+        for step, path in checkpoints[:-self.save_total_limit] if self.save_total_limit else []:
+            if self.keep_every and step % self.keep_every == 0:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+
+def train_resumable(trainer, resume: bool = True):
+    """
+    Run trainer.train(), resuming from the run directory's latest checkpoint if there is one.
+
+    :param trainer: Trainer - Trainer whose output_dir is the run directory.
+    :param resume: bool - Set False to start from scratch even if checkpoints exist.
+    :return: TrainOutput - Result of trainer.train().
+    """
+    checkpoint = find_latest_checkpoint(trainer.args.output_dir) if resume else None
+    return trainer.train(resume_from_checkpoint=checkpoint)
@@ -0,0 +1,92 @@
+# ai/core/finetune/data.py
+
+import hashlib
+import json
+import os
+from datasets import DatasetDict, load_from_disk
+from transformers import DataCollatorWithPadding
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ifusionone", "tokenized")
+
+# Below this many rows the worker start-up costs more than it saves
+_MIN_ROWS_FOR_WORKERS = 10000
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Hash identifying a tokenizer's vocabulary and settings."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([
+        type(tokenizer).__name__,
+        getattr(tokenizer, "name_or_path", ""),
+        len(tokenizer),
+        tokenizer.model_max_length,
+        tokenizer.padding_side,
+    ], default=str).encode())
+    if hasattr(tokenizer, "backend_tokenizer"):
+        digest.update(tokenizer.backend_tokenizer.to_str().encode())
+    return digest.hexdigest()
+
+def dataset_fingerprint(dataset) -> str:
+    if isinstance(dataset, DatasetDict):
+        return json.dumps({split: ds._fingerprint for split, ds in sorted(dataset.items())})
+    return dataset._fingerprint
+
+def _num_rows(dataset):
+    if isinstance(dataset, DatasetDict):
+        return max(dataset.num_rows.values())
+    return dataset.num_rows
+
+def prepare_dataset(dataset, tokenizer, text_column='sentence', text_pair_column=None, label_column='label',
+                    max_length=None, num_proc=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Tokenize a dataset once and cache the result on disk.
+
+    Sequences are truncated but not padded; padding happens per batch in the collator
+    (see build_collator), and a 'length' column is added so the Trainer can group
+    similar lengths into the same batch (group_by_length=True).
+
+    :param dataset: Dataset or DatasetDict - Raw dataset.
+    :param tokenizer: Tokenizer to apply.
+    :param text_column: str - Column holding the text.
+    :param text_pair_column: str - Optional second text column for sentence-pair tasks.
+    :param label_column: str - Column holding the labels (kept as is).
+    :param max_length: int - Truncation length (defaults to the tokenizer's limit).
+    :param num_proc: int - Tokenization processes (defaults to the CPU count for large datasets).
+    :param cache_dir: str - Directory of cached tokenized datasets, or None to disable caching.
+    :return: Dataset or DatasetDict - Tokenized dataset.
+    """
+    key = hashlib.sha256(json.dumps([
+        tokenizer_fingerprint(tokenizer), dataset_fingerprint(dataset),
+        text_column, text_pair_column, label_column, max_length,
+    ]).encode()).hexdigest()[:24]
+    cache_path = os.path.join(cache_dir, key) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        return load_from_disk(cache_path)
+
+    if num_proc is None and _num_rows(dataset) >= _MIN_ROWS_FOR_WORKERS:
+        num_proc = min(8, os.cpu_count() or 1)
+
+    def tokenize(batch):
+        pair = batch[text_pair_column] if text_pair_column else None
+        encoded = tokenizer(batch[text_column], pair, truncation=True, max_length=max_length)
+        encoded["length"] = [len(ids) for ids in encoded["input_ids"]]
+        return encoded
+
+    columns = dataset.column_names
+    if isinstance(columns, dict):
+        columns = next(iter(columns.values()))
+    tokenized = dataset.map(tokenize, batched=True, num_proc=num_proc,
+                            remove_columns=[c for c in columns if c != label_column])
+
+    if cache_path:
+        tokenized.save_to_disk(cache_path + ".tmp")
+        os.replace(cache_path + ".tmp", cache_path)
+        tokenized = load_from_disk(cache_path)
+    return tokenized
+
+def build_collator(tokenizer, pad_to_multiple_of=8):
+    """
+    Collator that pads each batch to its own longest sequence.
+
+    :param pad_to_multiple_of: int - Round padded lengths up to this multiple (helps tensor-core kernels).
+    """
+    return DataCollatorWithPadding(tokenizer, pad_to_multiple_of=pad_to_multiple_of)
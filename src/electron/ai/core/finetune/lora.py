@@ -1,12 +1,59 @@
 # ai/core/finetune/lora.py
 
-from peft import get_peft_model, LoraConfig
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, Trainer, TrainingArguments
+from peft import get_peft_model, LoraConfig, TaskType
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
 from datasets import load_dataset
+from .data import prepare_dataset
+from .training import build_trainer
+from .checkpointing import run_output_dir, train_resumable
 import torch
 
+# Leaf names of attention projection layers across common architectures
+ATTENTION_PROJECTIONS = (
+    "query", "key", "value",                      # BERT, RoBERTa
+    "q_lin", "k_lin", "v_lin",                    # DistilBERT
+    "q_proj", "k_proj", "v_proj", "o_proj",       # Llama, Mistral, OPT
+    "c_attn",                                     # GPT-2
+    "query_key_value",                            # GPT-NeoX, Falcon, BLOOM
+)
+
+def default_target_modules(model: torch.nn.Module) -> list:
+    """
+    Names of the attention projections present in a model, for LoRA's target_modules.
+
+    :raises ValueError: If none of the known projection names are found.
+    """
+    leaves = {name.rsplit(".", 1)[-1] for name, _ in model.named_modules()}
+    targets = [name for name in ATTENTION_PROJECTIONS if name in leaves]
+    if not targets:
+        raise ValueError(f"No known attention projections in {type(model).__name__}; pass target_modules")
+    return targets
+
+def build_lora_model(base_model, r=8, alpha=16, dropout=0.1, target_modules=None, task_type=TaskType.SEQ_CLS):
+    """
+    Wrap a model with LoRA adapters on its attention projections.
+
+    Only the adapters (and, for classification, the task head) are trainable.
+
+    :param base_model: Model to adapt.
+    :param r: int - The rank of LoRA.
+    :param alpha: int - LoRA scaling factor.
+    :param dropout: float - Dropout rate on the adapter input.
+    :param target_modules: list - Module names to adapt (defaults to default_target_modules).
+    :param task_type: TaskType - PEFT task type.
+    :return: PeftModel - The LoRA-adapted model.
+    """
+    lora_config = LoraConfig(
+        r=r,
+        lora_alpha=alpha,
+        lora_dropout=dropout,
+        target_modules=target_modules or default_target_modules(base_model),
+        task_type=task_type,
+    )
+    return get_peft_model(base_model, lora_config)
+
 class LoRAFineTuner:
-    def __init__(self, model_name='bert-base-uncased', task='mrpc', r=8, alpha=16, dropout=0.1):
+    def __init__(self, model_name='bert-base-uncased', task='mrpc', r=8, alpha=16, dropout=0.1, target_modules=None):
         """
         Initialize LoRA Fine-Tuner for transformer-based models.
 
@@ -15,12 +62,14 @@ class LoRAFineTuner:
         :param r: int - The rank of LoRA.
         :param alpha: int - LoRA scaling factor.
         :param dropout: float - Dropout rate.
+        :param target_modules: list - Module names to adapt (defaults to the attention projections).
         """
         self.model_name = model_name
         self.task = task
         self.r = r
         self.alpha = alpha
         self.dropout = dropout
+        self.target_modules = target_modules
         self.model = None
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
 
@@ -38,39 +87,21 @@ class LoRAFineTuner:
         :return: model - The LoRA-adapted model.
         """
         base_model = AutoModelForSequenceClassification.from_pretrained(self.model_name, num_labels=2)
-        lora_config = LoraConfig(
-            r=self.r,
-            alpha=self.alpha,
-            dropout=self.dropout,
-        )
-        self.model = get_peft_model(base_model, lora_config)
+        self.model = build_lora_model(base_model, self.r, self.alpha, self.dropout, self.target_modules)
         return self.model
 
-    def fine_tune(self, dataset):
+    def fine_tune(self, dataset, num_proc=None, profile=None, run_name=None, tracker=None):
         """
         Fine-tune the model with the dataset.
         :param dataset: Dataset - The dataset to fine-tune on.
+        :param num_proc: int - Tokenization processes (see prepare_dataset).
+        :param profile: TrainingProfile - Training settings (defaults to TrainingProfile()).
+        :param run_name: str - Name of the run; re-running a named run resumes from its latest checkpoint.
+        :param tracker: ExperimentTracker - Stream loss, throughput and memory into this experiment.
         :return: Trainer - The fine-tuning trainer.
         """
-        tokenized_data = dataset.map(lambda e: self.tokenizer(e['sentence'], padding=True, truncation=True), batched=True)
-        tokenized_data.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
-
-        training_args = TrainingArguments(
-            output_dir='./results',          # output directory
-            evaluation_strategy="epoch",     # evaluation is done after each epoch
-            learning_rate=2e-5,              # learning rate
-            per_device_train_batch_size=16,  # batch size for training
-            per_device_eval_batch_size=64,   # batch size for evaluation
-            num_train_epochs=3,              # number of training epochs
-            weight_decay=0.01,               # strength of weight decay
-            logging_dir='./logs',            # directory for storing logs
-        )
-
-        trainer = Trainer(
-            model=self.model,
-            args=training_args,
-            train_dataset=tokenized_data["train"],
-            eval_dataset=tokenized_data["validation"],
-        )
-        trainer.train()
+        tokenized_data = prepare_dataset(dataset, self.tokenizer, num_proc=num_proc)
+        run_dir = run_output_dir('lora', self.model_name, run_name)
+        trainer = build_trainer(self.model, self.tokenizer, tokenized_data, profile, output_dir=run_dir, tracker=tracker)
+        train_resumable(trainer)
         return trainer
@@ -1,9 +1,112 @@
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, Trainer, TrainingArguments
+# ai/core/finetune/prompt_tuning.py
+
+import json
+import os
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
 from datasets import load_dataset
+from safetensors.torch import load_file, save_file
+from .data import prepare_dataset
+from .training import build_trainer
+from .checkpointing import run_output_dir, train_resumable
 import torch
 
+HEAD_NAMES = ("classifier", "score")
+
+class SoftPromptModel(torch.nn.Module):
+    def __init__(self, backbone, prompt_length=20, n_prompts=1, train_head=True):
+        """
+        Prompt tuning: learned vectors prepended to the input embeddings of a frozen backbone.
+
+        The model holds a bank of soft prompts, so one backbone can serve several tasks;
+        each row of a batch selects its prompt through prompt_ids. Prompts in one batch
+        share the task head, so prompts meant to be served together should be trained
+        with train_head=False.
+
+        :param backbone: PreTrainedModel - The model to prompt; all its weights are frozen.
+        :param prompt_length: int - Number of soft prompt vectors.
+        :param n_prompts: int - Initial size of the prompt bank.
+        :param train_head: bool - Also train the classification head (needed when it is freshly initialized).
+        """
+        super().__init__()
+        self.backbone = backbone
+        self.prompt_length = prompt_length
+        for name, param in backbone.named_parameters():
+            param.requires_grad = train_head and name.split(".")[0] in HEAD_NAMES
+        self.prompts = torch.nn.Parameter(torch.cat([self._init_prompt() for _ in range(n_prompts)]))
+
+    @property
+    def config(self):
+        return self.backbone.config
+
+    def _init_prompt(self):
+        # Start from embeddings of random vocabulary tokens; this trains far better than randn
+        embeddings = self.backbone.get_input_embeddings().weight
+        ids = torch.randint(0, embeddings.shape[0], (self.prompt_length,))
+        return embeddings[ids].detach().clone().unsqueeze(0)
+
+    def add_prompt(self, prompt=None) -> int:
+        """
+        Append a prompt to the bank (a fresh one if prompt is None).
+
+        :return: int - Index of the new prompt, to pass as prompt_ids.
+        """
+        prompt = self._init_prompt() if prompt is None else prompt.reshape(1, self.prompt_length, -1)
+        self.prompts = torch.nn.Parameter(torch.cat([self.prompts.data, prompt.to(self.prompts)]))
+        return self.prompts.shape[0] - 1
+
+    def forward(self, input_ids, attention_mask=None, token_type_ids=None, labels=None, prompt_ids=None):
+        batch_size = input_ids.shape[0]
+        if prompt_ids is None:
+            prompt_ids = torch.zeros(batch_size, dtype=torch.long, device=input_ids.device)
+        embeds = self.backbone.get_input_embeddings()(input_ids)
+        prompt = self.prompts[prompt_ids].to(embeds.dtype)
+        inputs_embeds = torch.cat([prompt, embeds], dim=1)
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        attention_mask = torch.cat([attention_mask.new_ones(batch_size, self.prompt_length), attention_mask], dim=1)
+        kwargs = {}
+        if token_type_ids is not None:
+            kwargs["token_type_ids"] = torch.cat(
+                [token_type_ids.new_zeros(batch_size, self.prompt_length), token_type_ids], dim=1)
+        return self.backbone(inputs_embeds=inputs_embeds, attention_mask=attention_mask, labels=labels, **kwargs)
+
+    def save_prompt(self, path: str, index: int = 0):
+        """
+        Save one soft prompt (and the head, if it is trained) as safetensors.
+
+        :param path: str - Output directory.
+        :param index: int - Prompt to save.
+        """
+        os.makedirs(path, exist_ok=True)
+        tensors = {"prompt": self.prompts[index].detach().contiguous()}
+        for name, param in self.backbone.named_parameters():
+            if param.requires_grad:
+                tensors["head." + name] = param.detach().contiguous()
+        save_file(tensors, os.path.join(path, "soft_prompt.safetensors"))
+        with open(os.path.join(path, "soft_prompt.json"), "w") as f:
+            json.dump({"prompt_length": self.prompt_length,
+                       "backbone": getattr(self.backbone.config, "_name_or_path", None)}, f, indent=2)
+
+    def load_prompt(self, path: str, index: int = None) -> int:
+        """
+        Load a saved soft prompt into the bank, restoring its head weights if saved.
+
+        :param index: int - Slot to overwrite; appended to the bank if None.
+        :return: int - Index of the loaded prompt.
+        """
+        tensors = load_file(os.path.join(path, "soft_prompt.safetensors"))
+        prompt = tensors.pop("prompt")
+        if prompt.shape[0] != self.prompt_length:
+            raise ValueError(f"Prompt length {prompt.shape[0]} does not match {self.prompt_length}")
+        if tensors:
+            self.backbone.load_state_dict({name[len("head."):]: t for name, t in tensors.items()}, strict=False)
+        if index is None:
+            return self.add_prompt(prompt)
+        self.prompts.data[index] = prompt.to(self.prompts)
+        return index
+
 class PromptTuning:
-    def __init__(self, model_name='bert-base-uncased', task='mrpc', prompt_length=5):
+    def __init__(self, model_name='bert-base-uncased', task='mrpc', prompt_length=20):
         """
         Initialize Prompt Tuning for BERT-like models.
 
@@ -27,50 +130,35 @@ class PromptTuning:
 
     def apply_prompt_tuning(self):
         """
-        Add prompt tokens to the model.
-        :return: model - The model with prompt tokens applied.
+        Wrap the model with a trainable soft prompt; the backbone is frozen.
+        :return: SoftPromptModel - The model with the soft prompt applied.
         """
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name, num_labels=2)
-        # Initialize trainable prompt tokens
-        self.prompt_tokens = torch.nn.Parameter(torch.randn(self.prompt_length, self.model.config.hidden_size))
+        backbone = AutoModelForSequenceClassification.from_pretrained(self.model_name, num_labels=2)
+        self.model = SoftPromptModel(backbone, self.prompt_length)
         return self.model
 
-    def forward_with_prompt(self, inputs):
+    def save_prompt(self, path):
         """
-        Modify forward pass to include prompt tokens.
-        :param inputs: dict - The input dictionary for the model.
-        :return: outputs - Model outputs with prompt tokens.
+        Save the trained soft prompt.
+        :param path: str - Output directory.
         """
-        prompt = self.prompt_tokens.unsqueeze(0).expand(inputs['input_ids'].shape[0], -1, -1)
-        input_ids = torch.cat([prompt, inputs['input_ids']], dim=1)
-        attention_mask = torch.cat([torch.ones(input_ids.shape[0], self.prompt_length), inputs['attention_mask']], dim=1)
-        return self.model(input_ids=input_ids, attention_mask=attention_mask)
+        self.model.save_prompt(path)
 
-    def fine_tune(self, dataset):
+    def fine_tune(self, dataset, num_proc=None, profile=None, run_name=None, tracker=None):
         """
         Fine-tune the model with prompt tokens.
         :param dataset: Dataset - The dataset to fine-tune on.
+        :param num_proc: int - Tokenization processes (see prepare_dataset).
+        :param profile: TrainingProfile - Training settings (defaults to TrainingProfile()).
+        :param run_name: str - Name of the run; re-running a named run resumes from its latest checkpoint.
+        :param tracker: ExperimentTracker - Stream loss, throughput and memory into this experiment.
         :return: Trainer - The fine-tuning trainer.
         """
-        tokenized_data = dataset.map(lambda e: self.tokenizer(e['sentence'], padding=True, truncation=True), batched=True)
-        tokenized_data.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
-
-        training_args = TrainingArguments(
-            output_dir='./results',          # output directory
-            evaluation_strategy="epoch",     # evaluation is done after each epoch
-            learning_rate=2e-5,              # learning rate
-            per_device_train_batch_size=16,  # batch size for training
-            per_device_eval_batch_size=64,   # batch size for evaluation
-            num_train_epochs=3,              # number of training epochs
-            weight_decay=0.01,               # strength of weight decay
-            logging_dir='./logs',            # directory for storing logs
-        )
-
-        trainer = Trainer(
-            model=self.model,
-            args=training_args,
-            train_dataset=tokenized_data["train"],
-            eval_dataset=tokenized_data["validation"],
-        )
-        trainer.train()
+        # Leave room for the prompt within the backbone's position limit
+        max_length = min(self.tokenizer.model_max_length,
+                         getattr(self.model.config, "max_position_embeddings", self.tokenizer.model_max_length)) - self.prompt_length
+        tokenized_data = prepare_dataset(dataset, self.tokenizer, max_length=max_length, num_proc=num_proc)
+        run_dir = run_output_dir('prompt_tuning', self.model_name, run_name)
+        trainer = build_trainer(self.model, self.tokenizer, tokenized_data, profile, output_dir=run_dir, tracker=tracker)
+        train_resumable(trainer)
         return trainer
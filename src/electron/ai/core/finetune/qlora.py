@@ -1,12 +1,48 @@
 # ai/core/finetune/qlora.py
 
-from peft import get_peft_model, QLoRAConfig
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, Trainer, TrainingArguments
+import importlib.util
+from peft import prepare_model_for_kbit_training
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, BitsAndBytesConfig
 from datasets import load_dataset
+from .data import prepare_dataset
+from .training import build_trainer, bf16_available
+from .checkpointing import run_output_dir, train_resumable
+from .lora import build_lora_model
+from ..quantization.quantize_nf4 import replace_linear_with_nf4
 import torch
 
+def load_4bit_model(model_name, num_labels=2, compute_dtype=None):
+    """
+    Load a sequence classifier with NF4 base weights.
+
+    On CUDA with bitsandbytes installed the bitsandbytes 4-bit kernels are used. Otherwise
+    (our CPU nodes) every linear layer except the task head is swapped for an Int4Linear,
+    which stores NF4 codes and dequantizes in forward.
+
+    :param model_name: str - Model name or local path.
+    :param num_labels: int - Number of classes.
+    :param compute_dtype: torch.dtype - Dtype of the dequantized weights (bf16 where supported).
+    :return: model - The quantized model; its base weights are frozen.
+    """
+    compute_dtype = compute_dtype or (torch.bfloat16 if bf16_available() else torch.float32)
+    if torch.cuda.is_available() and importlib.util.find_spec("bitsandbytes") is not None:
+        quantization_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_use_double_quant=True,
+            bnb_4bit_compute_dtype=compute_dtype,
+        )
+        model = AutoModelForSequenceClassification.from_pretrained(
+            model_name, num_labels=num_labels, quantization_config=quantization_config)
+        return prepare_model_for_kbit_training(model)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=num_labels)
+    replace_linear_with_nf4(model, compute_dtype=compute_dtype)
+    for param in model.parameters():
+        param.requires_grad = False
+    return model
+
 class QLoRAFineTuner:
-    def __init__(self, model_name='bert-base-uncased', task='mrpc', r=8, alpha=16, dropout=0.1):
+    def __init__(self, model_name='bert-base-uncased', task='mrpc', r=8, alpha=16, dropout=0.1, target_modules=None):
         """
         Initialize QLoRA Fine-Tuner for transformer-based models with quantization.
 
@@ -15,12 +51,14 @@ class QLoRAFineTuner:
         :param r: int - The rank of QLoRA.
         :param alpha: int - QLoRA scaling factor.
         :param dropout: float - Dropout rate.
+        :param target_modules: list - Module names to adapt (defaults to the attention projections).
         """
         self.model_name = model_name
         self.task = task
         self.r = r
         self.alpha = alpha
         self.dropout = dropout
+        self.target_modules = target_modules
         self.model = None
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
 
@@ -37,40 +75,22 @@ class QLoRAFineTuner:
         Apply QLoRA to the base transformer model with quantization.
         :return: model - The QLoRA-adapted model.
         """
-        base_model = AutoModelForSequenceClassification.from_pretrained(self.model_name, num_labels=2)
-        qlora_config = QLoRAConfig(
-            r=self.r,
-            alpha=self.alpha,
-            dropout=self.dropout,
-        )
-        self.model = get_peft_model(base_model, qlora_config)
+        base_model = load_4bit_model(self.model_name, num_labels=2)
+        self.model = build_lora_model(base_model, self.r, self.alpha, self.dropout, self.target_modules)
         return self.model
 
-    def fine_tune(self, dataset):
+    def fine_tune(self, dataset, num_proc=None, profile=None, run_name=None, tracker=None):
         """
         Fine-tune the model with the dataset.
         :param dataset: Dataset - The dataset to fine-tune on.
+        :param num_proc: int - Tokenization processes (see prepare_dataset).
+        :param profile: TrainingProfile - Training settings (defaults to TrainingProfile()).
+        :param run_name: str - Name of the run; re-running a named run resumes from its latest checkpoint.
+        :param tracker: ExperimentTracker - Stream loss, throughput and memory into this experiment.
         :return: Trainer - The fine-tuning trainer.
         """
-        tokenized_data = dataset.map(lambda e: self.tokenizer(e['sentence'], padding=True, truncation=True), batched=True)
-        tokenized_data.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
-
-        training_args = TrainingArguments(
-            output_dir='./results',          # output directory
-            evaluation_strategy="epoch",     # evaluation is done after each epoch
-            learning_rate=2e-5,              # learning rate
-            per_device_train_batch_size=16,  # batch size for training
-            per_device_eval_batch_size=64,   # batch size for evaluation
-            num_train_epochs=3,              # number of training epochs
-            weight_decay=0.01,               # strength of weight decay
-            logging_dir='./logs',            # directory for storing logs
-        )
-
-        trainer = Trainer(
-            model=self.model,
-            args=training_args,
-            train_dataset=tokenized_data["train"],
-            eval_dataset=tokenized_data["validation"],
-        )
-        trainer.train()
+        tokenized_data = prepare_dataset(dataset, self.tokenizer, num_proc=num_proc)
+        run_dir = run_output_dir('qlora', self.model_name, run_name)
+        trainer = build_trainer(self.model, self.tokenizer, tokenized_data, profile, output_dir=run_dir, tracker=tracker)
+        train_resumable(trainer)
         return trainer
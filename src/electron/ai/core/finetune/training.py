@@ -0,0 +1,189 @@
+# ai/core/finetune/training.py
+
+import dataclasses
+import json
+import math
+import os
+import time
+import torch
+from transformers import Trainer, TrainerCallback, TrainingArguments
+from .data import build_collator
+from .checkpointing import AsyncCheckpointCallback
+from ..tracking.resources import peak_rss_bytes
+from ..tracking.callbacks import TrackerCallback
+
+PERFORMANCE_FILE = "performance.json"
+# transformers 4.41 renamed evaluation_strategy to eval_strategy (and later dropped the old name)
+EVAL_STRATEGY_ARG = ("eval_strategy" if "eval_strategy" in {f.name for f in dataclasses.fields(TrainingArguments)}
+                     else "evaluation_strategy")
+
+def cpu_supports_bf16() -> bool:
+    """True if the CPU has native bf16 instructions (AVX512-BF16 or AMX)."""
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+def bf16_available() -> bool:
+    if torch.cuda.is_available():
+        return torch.cuda.is_bf16_supported()
+    return cpu_supports_bf16()
+
+class TrainingProfile:
+    def __init__(self, target_batch_size=32, per_device_batch_size=8, eval_batch_size=64, precision="auto",
+                 gradient_checkpointing=True, num_threads=None, dataloader_workers=2,
+                 learning_rate=2e-5, num_train_epochs=3, weight_decay=0.01, checkpoint_steps=500, checkpoint_limit=2):
+        """
+        Training settings shared by the finetuners, tuned for CPU-only nodes.
+
+        :param target_batch_size: int - Effective batch size, reached through gradient accumulation.
+        :param per_device_batch_size: int - Samples per forward/backward pass.
+        :param eval_batch_size: int - Samples per evaluation pass.
+        :param precision: str - 'auto' (bf16 where the hardware supports it), 'bf16' or 'fp32'.
+        :param gradient_checkpointing: bool - Recompute activations in the backward pass to save memory.
+        :param num_threads: int - Intra-op threads for torch (defaults to the CPU count).
+        :param dataloader_workers: int - Collation workers; kept low so they don't compete with compute threads.
+        :param learning_rate: float - Learning rate.
+        :param num_train_epochs: int - Number of training epochs.
+        :param weight_decay: float - Strength of weight decay.
+        :param checkpoint_steps: int - Steps between (background) checkpoints.
+        :param checkpoint_limit: int - Most recent checkpoints kept per run.
+        """
+        if precision not in ("auto", "bf16", "fp32"):
+            raise ValueError(f"Unsupported precision: {precision}")
+        self.target_batch_size = target_batch_size
+        self.per_device_batch_size = per_device_batch_size
+        self.eval_batch_size = eval_batch_size
+        self.bf16 = bf16_available() if precision == "auto" else precision == "bf16"
+        self.gradient_checkpointing = gradient_checkpointing
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.dataloader_workers = dataloader_workers
+        self.learning_rate = learning_rate
+        self.num_train_epochs = num_train_epochs
+        self.weight_decay = weight_decay
+        self.checkpoint_steps = checkpoint_steps
+        self.checkpoint_limit = checkpoint_limit
+
+    @property
+    def gradient_accumulation_steps(self) -> int:
+        return max(1, math.ceil(self.target_batch_size / self.per_device_batch_size))
+
+    def apply_threads(self):
+        torch.set_num_threads(self.num_threads)
+
+    def to_training_args(self, output_dir='./results', **overrides) -> TrainingArguments:
+        """
+        Build TrainingArguments for this profile.
+
+        :param overrides: Any TrainingArguments field, taking precedence over the profile.
+        """
+        kwargs = dict(
+            output_dir=output_dir,
+            **{EVAL_STRATEGY_ARG: "epoch"},
+            learning_rate=self.learning_rate,
+            per_device_train_batch_size=self.per_device_batch_size,
+            per_device_eval_batch_size=self.eval_batch_size,
+            gradient_accumulation_steps=self.gradient_accumulation_steps,
+            num_train_epochs=self.num_train_epochs,
+            weight_decay=self.weight_decay,
+            logging_dir=os.path.join(output_dir, 'logs'),
+            # Checkpoints are written by AsyncCheckpointCallback instead
+            save_strategy="no",
+            group_by_length=True,
+            bf16=self.bf16,
+            use_cpu=not torch.cuda.is_available(),
+            gradient_checkpointing=self.gradient_checkpointing,
+            # Non-reentrant checkpointing still produces gradients when the embeddings are frozen (LoRA, adapters)
+            gradient_checkpointing_kwargs={"use_reentrant": False} if self.gradient_checkpointing else None,
+            dataloader_num_workers=self.dataloader_workers,
+            dataloader_pin_memory=torch.cuda.is_available(),
+        )
+        kwargs.update(overrides)
+        return TrainingArguments(**kwargs)
+
+    def to_dict(self) -> dict:
+        return {
+            "target_batch_size": self.target_batch_size,
+            "per_device_batch_size": self.per_device_batch_size,
+            "gradient_accumulation_steps": self.gradient_accumulation_steps,
+            "bf16": self.bf16,
+            "gradient_checkpointing": self.gradient_checkpointing,
+            "num_threads": self.num_threads,
+            "dataloader_workers": self.dataloader_workers,
+        }
+
+class PerformanceCallback(TrainerCallback):
+    def __init__(self, profile: TrainingProfile = None):
+        """Measure training throughput and peak memory, and write them to output_dir/performance.json."""
+        self.profile = profile
+        self.report = None
+        self._start = None
+        self._start_step = 0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._start = time.perf_counter()
+        # global_step is already restored when resuming; only steps run here count towards throughput
+        self._start_step = state.global_step
+
+    def on_train_end(self, args, state, control, **kwargs):
+        elapsed = time.perf_counter() - self._start
+        steps = state.global_step - self._start_step
+        samples = steps * args.train_batch_size * args.gradient_accumulation_steps * args.world_size
+        self.report = {
+            "train_seconds": elapsed,
+            "global_steps": state.global_step,
+            "steps": steps,
+            "samples": samples,
+            "samples_per_sec": samples / elapsed if elapsed else 0.0,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "profile": self.profile.to_dict() if self.profile else None,
+        }
+        if state.is_world_process_zero:
+            os.makedirs(args.output_dir, exist_ok=True)
+            with open(os.path.join(args.output_dir, PERFORMANCE_FILE), "w") as f:
+                json.dump(self.report, f, indent=2)
+
+def build_trainer(model, tokenizer, tokenized_data, profile: TrainingProfile = None, output_dir='./results',
+                  callbacks=None, tracker=None, **overrides) -> Trainer:
+    """
+    Build a Trainer with the shared profile, the dynamic-padding collator and a performance report.
+
+    :param model: Model to train.
+    :param tokenizer: Tokenizer used for padding.
+    :param tokenized_data: DatasetDict - Output of prepare_dataset with 'train' and 'validation' splits.
+    :param profile: TrainingProfile - Defaults to TrainingProfile().
+    :param output_dir: str - Trainer output directory.
+    :param callbacks: list - Extra TrainerCallbacks.
+    :param tracker: ExperimentTracker - Stream training telemetry into this experiment.
+    :param overrides: TrainingArguments fields overriding the profile.
+    :return: Trainer - The trainer; its PerformanceCallback holds the report after train().
+    """
+    profile = profile or TrainingProfile()
+    callbacks = list(callbacks or [])
+    if tracker is not None:
+        callbacks.append(TrackerCallback(tracker))
+    if any(isinstance(callback, TrackerCallback) for callback in callbacks):
+        # Token counting gathers input sizes every step; only pay for it when something reads it
+        overrides.setdefault("include_num_input_tokens_seen", True)
+    profile.apply_threads()
+    if not getattr(model, "supports_gradient_checkpointing", False):
+        overrides.setdefault("gradient_checkpointing", False)
+        overrides.setdefault("gradient_checkpointing_kwargs", None)
+    return Trainer(
+        model=model,
+        args=profile.to_training_args(output_dir, **overrides),
+        train_dataset=tokenized_data["train"],
+        eval_dataset=tokenized_data["validation"],
+        data_collator=build_collator(tokenizer),
+        callbacks=[PerformanceCallback(profile), AsyncCheckpointCallback(profile.checkpoint_steps, profile.checkpoint_limit)]
+        + callbacks,
+    )
+
+def performance_report(trainer: Trainer) -> dict:
+    """The PerformanceCallback report of a trained Trainer, or None."""
+    for callback in trainer.callback_handler.callbacks:
+        if isinstance(callback, PerformanceCallback):
+            return callback.report
+    return None
@@ -0,0 +1,335 @@
+# monitoring/metrics.py
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from ..tracking.resources import current_rss_bytes, peak_rss_bytes
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from a cached template lookup up to a long generation
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function = None
+
+    def inc(self, amount=1.0):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    def set_function(self, function):
+        """Read a total that only increases (e.g. CPU time) from function() at scrape time."""
+        self._function = function
+
+    def get(self):
+        return float(self._function()) if self._function is not None else self._value
+
+class _GaugeChild:
+    __slots__ = ("_value", "_lock", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function = None
+
+    def set(self, value):
+        self._value = float(value)
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function):
+        """Read the value from function() at scrape time instead of storing it."""
+        self._function = function
+
+    def get(self):
+        return float(self._function()) if self._function is not None else self._value
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def time(self):
+        """Context manager observing the duration of its block in seconds."""
+        return _Timer(self)
+
+    def get(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """
+        Child metric for one combination of label values.
+
+        Keep the returned child around on hot paths; the lookup itself is a dict access.
+
+        :param values: Label values, positionally in labelnames order (or pass them by name).
+        """
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield "", _format_labels(self.labelnames, key), child.get()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default.set(value)
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default.dec(amount)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            counts, total = child.get()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", _format_labels(self.labelnames, key, ("le", _format_value(bound))), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Named metrics rendered together in the Prometheus text format.
+
+        Registering a name twice returns the existing metric, so modules can declare the
+        metrics they use at import time (and survive a reload) without coordinating.
+        """
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+def register_process_metrics(registry=REGISTRY):
+    """Process memory, CPU time, threads and start time, all read at scrape time."""
+    start_time = time.time()
+    registry.gauge("process_resident_memory_bytes", "Resident memory size in bytes.").set_function(current_rss_bytes)
+    registry.gauge("process_peak_resident_memory_bytes", "Peak resident memory size in bytes.").set_function(peak_rss_bytes)
+    registry.counter("process_cpu_seconds_total", "User and system CPU time spent in seconds.").set_function(
+        lambda: sum(os.times()[:2]))
+    registry.gauge("process_threads", "Number of Python threads.").set_function(threading.active_count)
+    registry.gauge("process_start_time_seconds", "Start time of the process since the epoch in seconds.").set(start_time)
+
+def _http_metrics(registry):
+    return (
+        registry.counter("http_requests_total", "HTTP requests handled.", ("app", "method", "endpoint", "status")),
+        registry.histogram("http_request_duration_seconds", "HTTP request latency in seconds.", ("app", "method", "endpoint")),
+        registry.gauge("http_requests_in_progress", "HTTP requests currently being handled.", ("app",)),
+    )
+
+def instrument_flask(app, app_name, registry=REGISTRY):
+    """
+    Count requests and time them per endpoint on a Flask app.
+
+    Endpoints are labelled by their route rule (e.g. /experiments/<experiment_name>/series),
+    not the raw path, so the number of series stays bounded.
+
+    :param app: Flask - Application to instrument.
+    :param app_name: str - Value of the "app" label.
+    :param registry: MetricsRegistry - Destination registry.
+    """
+    from flask import g, request
+
+    requests_total, duration, in_progress = _http_metrics(registry)
+    in_progress = in_progress.labels(app_name)
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        in_progress.inc()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            duration.labels(app_name, request.method, endpoint).observe(time.perf_counter() - start)
+            requests_total.labels(app_name, request.method, endpoint, response.status_code).inc()
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        in_progress.dec()
+
+def instrument_fastapi(app, app_name, registry=REGISTRY):
+    """
+    Count requests and time them per endpoint on a FastAPI (Starlette) app.
+
+    :param app: FastAPI - Application to instrument.
+    :param app_name: str - Value of the "app" label.
+    :param registry: MetricsRegistry - Destination registry.
+    """
+    requests_total, duration, in_progress = _http_metrics(registry)
+    in_progress = in_progress.labels(app_name)
+
+    @app.middleware("http")
+    async def _record_request(request, call_next):
+        start = time.perf_counter()
+        in_progress.inc()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            in_progress.dec()
+            # The router stores the matched route in the scope
+            route = request.scope.get("route")
+            endpoint = getattr(route, "path", "<unmatched>")
+            duration.labels(app_name, request.method, endpoint).observe(time.perf_counter() - start)
+            requests_total.labels(app_name, request.method, endpoint, status).inc()
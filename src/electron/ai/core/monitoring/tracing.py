@@ -0,0 +1,249 @@
+# monitoring/tracing.py
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+_current_trace = ContextVar("current_trace", default=None)
+
+class Trace:
+    def __init__(self, name):
+        """Spans recorded while handling one request."""
+        self.name = name
+        self.start_time = time.time()
+        self.status = None
+        self.duration = None
+        self.spans = []         # [name, depth, start offset, duration] in start order
+        self._start = time.perf_counter()
+        self._depth = 0
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "status": self.status,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "spans": [{"name": name, "depth": depth, "start_ms": round(start * 1000, 3),
+                       "duration_ms": round(duration * 1000, 3) if duration is not None else None}
+                      for name, depth, start, duration in self.spans],
+        }
+
+class _Span:
+    __slots__ = ("_trace", "_record", "_start")
+
+    def __init__(self, trace, name):
+        self._trace = trace
+        self._record = [name, trace._depth, 0.0, None]
+
+    def __enter__(self):
+        trace = self._trace
+        self._start = time.perf_counter()
+        self._record[2] = self._start - trace._start
+        trace.spans.append(self._record)
+        trace._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._record[3] = time.perf_counter() - self._start
+        self._trace._depth -= 1
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NO_SPAN = _NoSpan()
+
+class Tracer:
+    def __init__(self, enabled=False, slow_threshold=1.0, keep=100):
+        """
+        Opt-in per-request trace spans with slow-request logging.
+
+        While disabled, span() returns a shared no-op context manager, so instrumented
+        code pays one context variable lookup. While enabled, every request records its
+        spans; requests slower than slow_threshold are logged with their spans and kept
+        (the last `keep` of them) for inspection.
+
+        :param enabled: bool - Record traces.
+        :param slow_threshold: float - Seconds above which a request counts as slow.
+        :param keep: int - Slow traces kept in memory.
+        """
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+        self.slow_traces = deque(maxlen=keep)
+
+    def configure(self, enabled=None, slow_threshold=None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if slow_threshold is not None:
+            if slow_threshold < 0:
+                raise ValueError("slow_threshold must be non-negative")
+            self.slow_threshold = float(slow_threshold)
+
+    def state(self):
+        return {"enabled": self.enabled, "slow_ms": self.slow_threshold * 1000, "slow_traces": len(self.slow_traces)}
+
+    def start(self, name):
+        """
+        Begin a trace for the current request (None while disabled).
+
+        :return: (Trace, token) - Pass both to finish().
+        """
+        if not self.enabled:
+            return None, None
+        trace = Trace(name)
+        return trace, _current_trace.set(trace)
+
+    def finish(self, trace, token, status=None):
+        if trace is None:
+            return
+        _current_trace.reset(token)
+        trace.duration = time.perf_counter() - trace._start
+        trace.status = status
+        if trace.duration >= self.slow_threshold:
+            self.slow_traces.append(trace)
+            logger.warning("Slow request %s (%.1f ms): %s", trace.name, trace.duration * 1000,
+                           json.dumps(trace.to_dict()["spans"]))
+
+    def recent(self, limit=20):
+        """The most recent slow traces, newest first."""
+        return [trace.to_dict() for trace in list(self.slow_traces)[::-1][:limit]]
+
+def span(name):
+    """Time a block as a span of the current request's trace (no-op outside a trace)."""
+    trace = _current_trace.get()
+    return _Span(trace, name) if trace is not None else _NO_SPAN
+
+def tracing_active():
+    """Whether the current request is being traced."""
+    return _current_trace.get() is not None
+
+TRACER = Tracer()
+
+def trace_flask(app, tracer=TRACER):
+    """Open a trace around every request of a Flask app while the tracer is enabled."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_trace():
+        g._trace = tracer.start(f"{request.method} {request.path}")
+
+    @app.after_request
+    def _record_status(response):
+        g._trace_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_trace(exc):
+        trace, token = g.pop("_trace", (None, None))
+        tracer.finish(trace, token, g.pop("_trace_status", 500))
+
+def trace_fastapi(app, tracer=TRACER):
+    """Open a trace around every request of a FastAPI (Starlette) app while the tracer is enabled."""
+    @app.middleware("http")
+    async def _trace_request(request, call_next):
+        trace, token = tracer.start(f"{request.method} {request.url.path}")
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            tracer.finish(trace, token, status)
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005):
+        """
+        Statistical profiler for a running process.
+
+        A background thread samples the stacks of all other threads every interval seconds
+        (sys._current_frames) and counts identical stacks. The result is in the collapsed
+        stack format ("root;...;leaf count" per line) read by flamegraph.pl, speedscope and
+        inferno. Nothing is installed into the profiled threads, so overhead is limited to
+        the sampler's own work and stays flat regardless of how hot the code is.
+
+        :param interval: float - Seconds between samples.
+        """
+        self.interval = interval
+        self.samples = 0
+        self.started_at = None
+        self._stacks = Counter()
+        self._codes = {}
+        self._lock = threading.Lock()          # guards start/stop
+        self._data_lock = threading.Lock()     # guards the stack counts
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=None):
+        """Start sampling (clears previous samples)."""
+        with self._lock:
+            if self._thread is not None:
+                raise ValueError("Profiler is already running")
+            if interval is not None:
+                if interval <= 0:
+                    raise ValueError("interval must be positive")
+                self.interval = interval
+            with self._data_lock:
+                self._stacks.clear()
+                self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling and return the collapsed stacks."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            raise ValueError("Profiler is not running")
+        self._stop.set()
+        thread.join()
+        return self.collapsed()
+
+    def _frame_name(self, code):
+        name = self._codes.get(code)
+        if name is None:
+            name = self._codes[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+        return name
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            sample = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                sample.append(";".join(reversed(stack)))
+            with self._data_lock:
+                self._stacks.update(sample)
+                self.samples += 1
+
+    def collapsed(self):
+        """Samples so far in collapsed stack format."""
+        with self._data_lock:
+            stacks = list(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks))
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,115 @@
+# prompts/benchmark.py
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import numpy as np
+
+from .embeddings import EmbeddingCache, EmbeddingService
+from .scorer import score_bleu, score_rouge, score_embedding
+from .evaluator import score_responses
+from .vector_index import VectorIndex
+
+_WORDS = ("model", "token", "prompt", "answer", "data", "train", "vector", "layer",
+          "output", "input", "score", "quantize", "graph", "batch", "server", "cache")
+
+def _synthetic_pairs(n_items, length=24, seed=0):
+    rng = random.Random(seed)
+    references, candidates = [], []
+    for _ in range(n_items):
+        ref = [rng.choice(_WORDS) for _ in range(length)]
+        cand = [w if rng.random() < 0.7 else rng.choice(_WORDS) for w in ref]
+        references.append(" ".join(ref))
+        candidates.append(" ".join(cand))
+    return references, candidates
+
+def benchmark_scoring(n_items=1000, batch_size=64, num_workers=None, baseline_items=100, cache_dir=None):
+    """
+    Measure scoring throughput of the batched engine against the per-item loop.
+
+    Neither path touches the shared on-disk embedding cache, so results do not depend
+    on earlier runs: the per-item loop and the batched pass encode without a cache, then
+    the batched pass runs twice more on an empty cache (cold, encoding and storing) and
+    on the now filled one (warm, lookups only).
+
+    :param n_items: int - Synthetic pairs scored by the batched engine.
+    :param batch_size: int - Embedding batch size.
+    :param num_workers: int - Process pool size for BLEU/ROUGE.
+    :param baseline_items: int - Pairs scored by the per-item loop (it is slow).
+    :param cache_dir: str - Empty directory for the cold/warm cache runs (default: a temporary one).
+    :return: dict - Items/sec for each path.
+    """
+    references, candidates = _synthetic_pairs(n_items)
+    service = EmbeddingService(cache_dir=None, batch_size=batch_size)
+    service.model  # Load outside the timed sections
+
+    def batched():
+        start = time.perf_counter()
+        score_responses(references, candidates, batch_size=batch_size, num_workers=num_workers, service=service)
+        return n_items / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for ref, cand in zip(references[:baseline_items], candidates[:baseline_items]):
+        score_bleu(ref, cand)
+        score_rouge(ref, cand)
+        score_embedding(ref, cand, service=service)
+    baseline_elapsed = time.perf_counter() - start
+    report = {
+        "n_items": n_items,
+        "batch_size": batch_size,
+        "per_item_items_per_sec": baseline_items / baseline_elapsed,
+        "batched_items_per_sec": batched(),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service.cache = EmbeddingCache(cache_dir or tmp, service.dim)
+        report["batched_cold_cache_items_per_sec"] = batched()
+        report["batched_warm_cache_items_per_sec"] = batched()
+    return report
+
+def benchmark_vector_index(n_vectors=20000, dim=384, k=10, n_queries=200, n_lists=128, nprobes=(1, 4, 8, 16), seed=0):
+    """
+    Measure recall@k and query latency of the IVF index against brute force.
+
+    Synthetic vectors are drawn around random cluster centres so the data has the
+    kind of structure real embeddings do.
+
+    :return: dict - Brute-force latency and, per nprobe, recall and latency.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_lists, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, n_lists, n_vectors)] + 0.5 * rng.standard_normal((n_vectors, dim)).astype(np.float32)
+    queries = vectors[rng.choice(n_vectors, n_queries, replace=False)] + 0.1 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+    index = VectorIndex(dim, n_lists=n_lists)
+    start = time.perf_counter()
+    index.add(list(range(n_vectors)), vectors)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    truth = [{i for i, _ in index.brute_force_search(q, k)} for q in queries]
+    brute_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    report = {"n_vectors": n_vectors, "dim": dim, "k": k, "build_seconds": build_seconds,
+              "brute_force_ms_per_query": brute_ms, "ivf": []}
+    for nprobe in nprobes:
+        start = time.perf_counter()
+        found = [{i for i, _ in index.search(q, k, nprobe)} for q in queries]
+        ivf_ms = (time.perf_counter() - start) * 1000 / n_queries
+        recall = sum(len(f & t) for f, t in zip(found, truth)) / (k * n_queries)
+        report["ivf"].append({"nprobe": nprobe, "recall_at_k": recall, "ms_per_query": ivf_ms})
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark prompt evaluation scoring and vector search.")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--index", action="store_true", help="Benchmark the vector index instead of scoring.")
+    args = parser.parse_args()
+    if args.index:
+        print(json.dumps(benchmark_vector_index(), indent=2))
+    else:
+        print(json.dumps(benchmark_scoring(args.items, args.batch_size, args.workers), indent=2))
@@ -0,0 +1,196 @@
+# prompts/embeddings.py
+
+import hashlib
+import os
+import platform
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process writers are serialized
+    fcntl = None
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ifusionone", "embeddings")
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    def __init__(self, cache_dir, dim):
+        """
+        Append-only on-disk embedding cache keyed by content hash.
+
+        Vectors live in a flat float16 file that is memory-mapped for reads; hashes are
+        appended to index.txt in the same row order. Appends hold an exclusive lock on
+        cache_dir/lock, so processes sharing the directory do not interleave rows.
+
+        :param cache_dir: str - Directory holding the cache files.
+        :param dim: int - Embedding dimension.
+        """
+        self.cache_dir = cache_dir
+        self.dim = dim
+        self.vectors_path = os.path.join(cache_dir, "vectors.f16")
+        self.index_path = os.path.join(cache_dir, "index.txt")
+        self.lock_path = os.path.join(cache_dir, "lock")
+        self.rows = {}
+        self._vectors = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._locked():
+            self._load()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Read the index, cutting both files back to the rows they agree on. Call with the lock held."""
+        hashes = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                hashes = f.read().split()
+        row_bytes = self.dim * 2
+        vector_bytes = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        # A crash between the two appends leaves one file ahead of the other
+        n_rows = min(len(hashes), vector_bytes // row_bytes)
+        if vector_bytes != n_rows * row_bytes:
+            os.truncate(self.vectors_path, n_rows * row_bytes)
+        if len(hashes) != n_rows:
+            with open(self.index_path, "w") as f:
+                f.write("".join(h + "\n" for h in hashes[:n_rows]))
+        self.rows = {h: i for i, h in enumerate(hashes[:n_rows])}
+        self._vectors = None
+
+    def _mapped(self):
+        if self._vectors is None and self.rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(len(self.rows), self.dim))
+        return self._vectors
+
+    def get(self, hashes):
+        """Return a float32 array for hashes that are all present in the cache."""
+        rows = [self.rows[h] for h in hashes]
+        return np.asarray(self._mapped()[rows], dtype=np.float32)
+
+    def add(self, hashes, vectors):
+        with self._locked():
+            # Pick up rows other processes appended since the last load
+            self._load()
+            new = {}
+            for h, v in zip(hashes, vectors):
+                if h not in self.rows:
+                    new.setdefault(h, v)
+            if not new:
+                return
+            with open(self.vectors_path, "ab") as f:
+                # Rows are numbered from the vector file, which _load cut back to the index
+                first_row = f.tell() // (self.dim * 2)
+                f.write(np.stack(list(new.values())).astype(np.float16).tobytes())
+            with open(self.index_path, "a") as f:
+                f.write("".join(h + "\n" for h in new))
+            for i, h in enumerate(new):
+                self.rows[h] = first_row + i
+
+class EmbeddingService:
+    def __init__(self, model_name=DEFAULT_MODEL, cache_dir=DEFAULT_CACHE_DIR, backend="torch", quantized=False,
+                 onnx_file=None, batch_size=64):
+        """
+        Shared sentence embedder with batching and a persistent cache.
+
+        :param model_name: str - SentenceTransformer model to load.
+        :param cache_dir: str - Root directory of the on-disk cache (None disables it).
+        :param backend: str - 'torch' or 'onnx' (ONNX Runtime on CPU).
+        :param quantized: bool - With the onnx backend, load the int8 export of the model.
+        :param onnx_file: str - Explicit ONNX file inside the model repo (overrides quantized).
+        :param batch_size: int - Encoder batch size.
+        """
+        self.model_name = model_name
+        self.backend = backend
+        self.quantized = quantized
+        self.onnx_file = onnx_file
+        self.batch_size = batch_size
+        self.cache_root = cache_dir
+        self.cache = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _onnx_file(self):
+        if self.onnx_file:
+            return self.onnx_file
+        if not self.quantized:
+            return None
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            return "onnx/model_qint8_arm64.onnx"
+        return "onnx/model_quint8_avx2.onnx"
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            if self.backend == "onnx":
+                onnx_file = self._onnx_file()
+                model_kwargs = {"file_name": onnx_file} if onnx_file else None
+                self._model = SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+            else:
+                self._model = SentenceTransformer(self.model_name)
+            if self.cache_root:
+                variant = self.backend + ("-int8" if self._onnx_file() else "")
+                cache_dir = os.path.join(self.cache_root, self.model_name.replace("/", "__"), variant)
+                self.cache = EmbeddingCache(cache_dir, self._model.get_sentence_embedding_dimension())
+        return self._model
+
+    def _encode(self, texts, batch_size=None):
+        return self.model.encode(texts, batch_size=batch_size or self.batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True)
+
+    def encode(self, texts, batch_size=None):
+        """
+        Encode texts into L2-normalized float32 embeddings, using the cache where possible.
+
+        :param texts: list[str] - Texts to encode (duplicates are encoded once).
+        :param batch_size: int - Encoder batch size for this call (defaults to the service's).
+        :return: np.ndarray - (n, dim) embeddings.
+        """
+        texts = list(texts)
+        with self._lock:
+            self.model  # loads the model and opens its cache
+            if not texts:
+                return np.zeros((0, self.dim), dtype=np.float32)
+            if self.cache is None:
+                return self._encode(texts, batch_size)
+            hashes = [content_hash(t) for t in texts]
+            missing = {}
+            for h, t in zip(hashes, texts):
+                if h not in self.cache.rows:
+                    missing.setdefault(h, t)
+            if missing:
+                self.cache.add(list(missing), self._encode(list(missing.values()), batch_size))
+            return self.cache.get(hashes)
+
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_embedding_service(**kwargs):
+    """
+    Return the process-wide EmbeddingService, creating it on first use.
+
+    Keyword arguments configure the service the first time only.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService(**kwargs)
+    return _service
@@ -1,24 +1,153 @@
 # prompts/evaluator.py
 
-from prompts.scorer import score_bleu, score_rouge, score_embedding
-from prompts.templates import format_prompt
+from .scorer import score_lexical_batch, score_embedding_batch
+from .templates import format_prompt
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import os
+import time
+import urllib.request
 
-def evaluate_model_response(model_func, eval_set, template_name):
+def score_responses(references, generated, batch_size=64, num_workers=None, service=None):
+    """
+    Score generated texts against references in batches.
+
+    :param references: list[str] - Expected outputs.
+    :param generated: list[str] - Model outputs, aligned with references.
+    :param batch_size: int - Embedding batch size.
+    :param num_workers: int - Process pool size for BLEU/ROUGE.
+    :param service: EmbeddingService - Encoder to use instead of the shared one.
+    :return: list[dict] - Score dict per item.
+    """
+    bleu, rouge = score_lexical_batch(references, generated, num_workers=num_workers)
+    embedding_sim = score_embedding_batch(references, generated, batch_size=batch_size, service=service)
+    return [
+        {"bleu": b, "rouge": r, "embedding_sim": e}
+        for b, r, e in zip(bleu, rouge, embedding_sim)
+    ]
+
+def evaluate_model_response(model_func, eval_set, template_name, batch_size=64, num_workers=None):
+    items = list(eval_set)
+    generated = [model_func(format_prompt(template_name, **item)) for item in items]
+    references = [item.get("expected", "") for item in items]
+
+    scores = score_responses(references, generated, batch_size=batch_size, num_workers=num_workers)
     results = []
-    for item in eval_set:
-        prompt = format_prompt(template_name, **item)
-        generated = model_func(prompt)
-        reference = item.get("expected", "")
-
-        scores = {
-            "bleu": score_bleu(reference, generated),
-            "rouge": score_rouge(reference, generated),
-            "embedding_sim": score_embedding(reference, generated),
-        }
+    for item, text, item_scores in zip(items, generated, scores):
         results.append({
             "input": item,
-            "generated": generated,
-            "scores": scores
+            "generated": text,
+            "scores": item_scores
         })
     return results
+
+def server_model_func(base_url="http://localhost:5000", max_tokens=100, timeout=120):
+    """
+    Build a model_func that calls the /generate endpoint of server.py.
+
+    :param base_url: str - Address of the running server.
+    :param max_tokens: int - Generation budget per request.
+    :param timeout: float - Request timeout in seconds.
+    :return: callable - prompt -> generated text.
+    """
+    def model_func(prompt):
+        body = json.dumps({"prompt": prompt, "max_tokens": max_tokens}).encode("utf-8")
+        req = urllib.request.Request(f"{base_url}/generate", data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read())["response"]
+    return model_func
+
+def _generate_with_retries(model_func, prompt, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            return model_func(prompt)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+def _load_checkpoint(checkpoint_path):
+    done = {}
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    done[record["index"]] = record
+    return done
+
+def evaluate_model_response_concurrent(model_func, eval_set, template_name, max_concurrency=8, retries=2,
+                                       backoff=1.0, checkpoint_path=None, score_batch_size=64, num_workers=None):
+    """
+    Evaluate a model with concurrent generation, scoring finished items while others are still generating.
+
+    Completed items are appended to checkpoint_path as JSONL; rerunning with the same
+    checkpoint skips them, so an interrupted evaluation resumes where it stopped.
+
+    :param model_func: callable - prompt -> generated text (e.g. server_model_func()).
+    :param eval_set: list[dict] - Items with template variables and an "expected" answer.
+    :param template_name: str - Prompt template to format each item with.
+    :param max_concurrency: int - Maximum in-flight model calls.
+    :param retries: int - Retries per item on model errors, with exponential backoff.
+    :param backoff: float - Initial backoff in seconds.
+    :param checkpoint_path: str - JSONL file of completed items (optional).
+    :param score_batch_size: int - Generated items scored together.
+    :param num_workers: int - Process pool size for BLEU/ROUGE.
+    :return: list[dict] - Results in eval_set order.
+    """
+    items = list(eval_set)
+    done = _load_checkpoint(checkpoint_path)
+    checkpoint = open(checkpoint_path, "a") if checkpoint_path else None
+
+    def flush(pending):
+        scores = score_responses([items[i].get("expected", "") for i, _ in pending],
+                                 [text for _, text in pending],
+                                 batch_size=score_batch_size, num_workers=num_workers)
+        for (index, text), item_scores in zip(pending, scores):
+            record = {"index": index, "input": items[index], "generated": text, "scores": item_scores}
+            done[index] = record
+            if checkpoint:
+                checkpoint.write(json.dumps(record) + "\n")
+        if checkpoint:
+            checkpoint.flush()
+
+    pending = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            futures = {
+                pool.submit(_generate_with_retries, model_func, format_prompt(template_name, **item), retries, backoff): index
+                for index, item in enumerate(items) if index not in done
+            }
+            error = None
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                try:
+                    pending.append((futures[future], future.result()))
+                except Exception as e:
+                    if error is None:
+                        # Stop starting new items, but keep draining the ones already running
+                        error = e
+                        for other in futures:
+                            other.cancel()
+                    continue
+                if len(pending) >= score_batch_size:
+                    # Taken off pending first, so a failing flush is not retried in finally
+                    batch, pending = pending, []
+                    flush(batch)
+            if error is not None:
+                raise error
+    finally:
+        # Score whatever finished before a failure so it lands in the checkpoint
+        if pending:
+            flush(pending)
+        if checkpoint:
+            checkpoint.close()
+
+    results = []
+    for index in range(len(items)):
+        record = dict(done[index])
+        record.pop("index")
+        results.append(record)
+    return results
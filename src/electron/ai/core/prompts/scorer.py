@@ -1,10 +1,11 @@
 # prompts/scorer.py
 
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from nltk.translate.bleu_score import sentence_bleu
 from rouge import Rouge
-from sentence_transformers import SentenceTransformer, util
+from .embeddings import get_embedding_service
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
 rouge = Rouge()
 
 def score_bleu(reference, candidate):
@@ -13,7 +14,49 @@ def score_bleu(reference, candidate):
 def score_rouge(reference, candidate):
     return rouge.get_scores(candidate, reference)[0]
 
-def score_embedding(reference, candidate):
-    emb1 = model.encode(reference, convert_to_tensor=True)
-    emb2 = model.encode(candidate, convert_to_tensor=True)
-    return float(util.pytorch_cos_sim(emb1, emb2)[0][0])
+def score_embedding(reference, candidate, service=None):
+    emb = (service or get_embedding_service()).encode([reference, candidate])
+    return float(emb[0] @ emb[1])
+
+def _score_lexical_pair(pair):
+    reference, candidate = pair
+    return score_bleu(reference, candidate), score_rouge(reference, candidate)
+
+def score_lexical_batch(references, candidates, num_workers=None, chunksize=32):
+    """
+    Compute BLEU and ROUGE for many pairs, spreading the work across a process pool.
+
+    :param references: list[str] - Reference texts.
+    :param candidates: list[str] - Generated texts, aligned with references.
+    :param num_workers: int - Pool size (None = CPU count, 1 = run in-process).
+    :param chunksize: int - Pairs handed to a worker at a time.
+    :return: (list[float], list[dict]) - BLEU scores and ROUGE score dicts.
+    """
+    pairs = list(zip(references, candidates))
+    if num_workers == 1 or len(pairs) <= chunksize:
+        results = [_score_lexical_pair(pair) for pair in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            results = list(pool.map(_score_lexical_pair, pairs, chunksize=chunksize))
+    bleu = [r[0] for r in results]
+    rouge_scores = [r[1] for r in results]
+    return bleu, rouge_scores
+
+def score_embedding_batch(references, candidates, batch_size=None, service=None):
+    """
+    Cosine similarity between aligned reference/candidate pairs, encoded in batches.
+
+    Embeddings come from the shared EmbeddingService, so repeated references and
+    candidates are served from its on-disk cache.
+
+    :param references: list[str] - Reference texts.
+    :param candidates: list[str] - Generated texts, aligned with references.
+    :param batch_size: int - Encoder batch size (defaults to the service's).
+    :param service: EmbeddingService - Encoder to use instead of the shared one.
+    :return: list[float] - One similarity per pair.
+    """
+    if not references:
+        return []
+    emb = (service or get_embedding_service()).encode(list(references) + list(candidates), batch_size=batch_size)
+    ref_emb, cand_emb = emb[:len(references)], emb[len(references):]
+    return np.einsum("ij,ij->i", ref_emb, cand_emb).astype(float).tolist()
@@ -1,5 +1,9 @@
 # prompts/templates.py
 
+import json
+import os
+from string import Formatter
+
 PROMPT_TEMPLATES = {
     "qa": "Question: {question}\nAnswer:",
     "summarize": "Summarize the following text:\n{text}\nSummary:",
@@ -8,7 +12,138 @@ PROMPT_TEMPLATES = {
     "code_gen": "Write a {language} function that {task}:"
 }
 
+TEMPLATE_EXTENSIONS = (".txt", ".prompt")
+
+class PromptTemplate:
+    def __init__(self, name, template):
+        """
+        Parse and validate a prompt template once so rendering only has to fill it in.
+
+        :param name: str - Template name.
+        :param template: str - str.format-style template with named fields.
+        """
+        self.name = name
+        self.template = template
+        self.variables = ()
+        self.static_prefix = ""
+        self._prefix_tokens = {}
+        self._compile()
+
+    def _compile(self):
+        variables = []
+        prefix_done = False
+        for literal, field, _, _ in Formatter().parse(self.template):
+            if not prefix_done:
+                self.static_prefix += literal
+            if field is None:
+                continue
+            prefix_done = True
+            if not field.isidentifier():
+                raise ValueError(f"Template '{self.name}' has an unsupported field: {{{field}}}")
+            if field not in variables:
+                variables.append(field)
+        self.variables = tuple(variables)
+
+    def render(self, **kwargs):
+        return self.render_variables(kwargs)
+
+    def render_variables(self, variables):
+        """Render from a dict, so variable names cannot collide with keyword parameters."""
+        if not isinstance(variables, dict):
+            raise TypeError(f"Template variables must be a dict, got {type(variables).__name__}")
+        missing = [v for v in self.variables if v not in variables]
+        if missing:
+            raise KeyError(f"Template '{self.name}' is missing variables: {', '.join(missing)}")
+        return self.template.format_map(variables)
+
+    def prefix_tokens(self, model_key, tokenize):
+        """
+        Tokens of the static prefix, cached per model.
+
+        :param model_key: str - Identifies the tokenizer (e.g. the loaded model name).
+        :param tokenize: callable - text -> list of token ids, including BOS if the model uses one.
+        :return: list[int] - Prefix tokens.
+        """
+        if model_key not in self._prefix_tokens:
+            self._prefix_tokens[model_key] = list(tokenize(self.static_prefix))
+        return self._prefix_tokens[model_key]
+
+    def count_tokens(self, model_key, tokenize, tokenize_continuation, variables):
+        """
+        Estimate the prompt length, tokenizing only the part after the cached static prefix.
+
+        :param tokenize_continuation: callable - text -> token ids without BOS.
+        :param variables: dict - Template variables.
+        :return: (str, int) - Rendered prompt and its token count.
+        """
+        prompt = self.render_variables(variables)
+        rest = prompt[len(self.static_prefix):]
+        n_tokens = len(self.prefix_tokens(model_key, tokenize))
+        if rest:
+            n_tokens += len(tokenize_continuation(rest))
+        return prompt, n_tokens
+
+class TemplateRegistry:
+    def __init__(self, templates=None):
+        self._templates = {}
+        for name, template in (templates or {}).items():
+            self.register(name, template)
+
+    def register(self, name, template):
+        compiled = PromptTemplate(name, template)
+        self._templates[name] = compiled
+        return compiled
+
+    def get(self, template_name):
+        if template_name not in self._templates:
+            raise ValueError(f"Unknown template: {template_name}")
+        return self._templates[template_name]
+
+    def names(self):
+        return sorted(self._templates)
+
+    def load_dir(self, path):
+        """
+        Load user templates from a directory.
+
+        .json files hold a {name: template} mapping; .txt/.prompt files hold a single
+        template named after the file.
+
+        :param path: str - Directory to scan.
+        :return: list[str] - Names of the loaded templates.
+        """
+        loaded = []
+        if not os.path.isdir(path):
+            return loaded
+        for filename in sorted(os.listdir(path)):
+            full_path = os.path.join(path, filename)
+            stem, ext = os.path.splitext(filename)
+            if ext == ".json":
+                with open(full_path, "r") as f:
+                    for name, template in json.load(f).items():
+                        self.register(name, template)
+                        loaded.append(name)
+            elif ext in TEMPLATE_EXTENSIONS:
+                with open(full_path, "r") as f:
+                    self.register(stem, f.read())
+                loaded.append(stem)
+        return loaded
+
+    def budget_max_tokens(self, template_name, model_key, tokenize, tokenize_continuation, n_ctx, max_tokens, variables=None):
+        """
+        Render a template and clamp max_tokens so prompt + completion fit the context window.
+
+        :param variables: dict - Template variables (any names, including ones like max_tokens).
+        :return: (str, int, int) - Prompt, prompt token count, clamped max_tokens.
+        :raise KeyError: If variables are missing; ValueError for an unknown template or a prompt over n_ctx.
+        """
+        prompt, n_prompt = self.get(template_name).count_tokens(model_key, tokenize, tokenize_continuation,
+                                                                variables or {})
+        if n_prompt >= n_ctx:
+            raise ValueError(f"Prompt uses {n_prompt} tokens, context window is {n_ctx}")
+        return prompt, n_prompt, min(max_tokens, n_ctx - n_prompt)
+
+registry = TemplateRegistry(PROMPT_TEMPLATES)
+
 def format_prompt(template_name, **kwargs):
-    if template_name not in PROMPT_TEMPLATES:
-        raise ValueError(f"Unknown template: {template_name}")
-    return PROMPT_TEMPLATES[template_name].format(**kwargs)
+    return registry.get(template_name).render(**kwargs)
@@ -0,0 +1,244 @@
+# prompts/vector_index.py
+
+import json
+import numpy as np
+from .embeddings import get_embedding_service
+
+def _normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class VectorIndex:
+    def __init__(self, dim, n_lists=64, nprobe=8, train_size=None):
+        """
+        IVF (inverted file) cosine-similarity index over NumPy arrays.
+
+        Vectors are searched by brute force until train_size vectors are stored; then
+        k-means centroids are trained and each query only scans the nprobe closest lists.
+
+        :param dim: int - Vector dimension.
+        :param n_lists: int - Number of k-means clusters.
+        :param nprobe: int - Clusters scanned per query.
+        :param train_size: int - Vectors needed before training (default 39 * n_lists).
+        """
+        self.dim = dim
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.train_size = train_size or 39 * n_lists
+        self.ids = []
+        self.id_to_row = {}
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._lists = None
+
+    def __len__(self):
+        return len(self.id_to_row)
+
+    def _assign(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def train(self, n_iter=10, seed=0):
+        """Run spherical k-means over the live vectors and reassign every row."""
+        live = self.vectors[self.alive]
+        n_lists = min(self.n_lists, len(live))
+        rng = np.random.default_rng(seed)
+        centroids = live[rng.choice(len(live), n_lists, replace=False)]
+        for _ in range(n_iter):
+            labels = np.argmax(live @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, live)
+            empty = ~np.bincount(labels, minlength=n_lists).astype(bool)
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        self.centroids = centroids
+        self.assignments = self._assign(self.vectors)
+        self._lists = None
+
+    def add(self, ids, vectors):
+        """
+        Insert vectors; an id that already exists is replaced.
+
+        :param ids: list - External ids (str or int).
+        :param vectors: np.ndarray - (n, dim) vectors, normalized on insert.
+        """
+        vectors = _normalize(vectors)
+        self.remove([i for i in ids if i in self.id_to_row])
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self.id_to_row.update((i, start + n) for n, i in enumerate(ids))
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+        if self.centroids is not None:
+            self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+            self._lists = None
+        elif len(self) >= self.train_size:
+            self.train()
+
+    def remove(self, ids):
+        """Delete ids from the index; storage is compacted once a third of it is dead."""
+        for i in ids:
+            row = self.id_to_row.pop(i, None)
+            if row is not None:
+                self.alive[row] = False
+        self._lists = None
+        if len(self.alive) and (~self.alive).sum() > len(self.alive) / 3:
+            self.compact()
+
+    def compact(self):
+        keep = np.flatnonzero(self.alive)
+        self.ids = [self.ids[r] for r in keep]
+        self.id_to_row = {i: n for n, i in enumerate(self.ids)}
+        self.vectors = self.vectors[keep]
+        self.alive = self.alive[keep]
+        if self.centroids is not None:
+            self.assignments = self.assignments[keep]
+        self._lists = None
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            order = order[self.alive[order]]
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        return self._lists
+
+    def _top_k(self, rows, query, k):
+        if len(rows) == 0:
+            return []
+        scores = self.vectors[rows] @ query
+        k = min(k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.ids[rows[b]], float(scores[b])) for b in best]
+
+    def brute_force_search(self, query, k=10):
+        query = _normalize(query)[0]
+        return self._top_k(np.flatnonzero(self.alive), query, k)
+
+    def search(self, query, k=10, nprobe=None):
+        """
+        Approximate k nearest neighbours by cosine similarity.
+
+        :param query: np.ndarray - (dim,) query vector.
+        :param k: int - Number of results.
+        :param nprobe: int - Clusters to scan (defaults to self.nprobe).
+        :return: list[(id, float)] - Best matches first.
+        """
+        if self.centroids is None:
+            return self.brute_force_search(query, k)
+        query = _normalize(query)[0]
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        lists = self._inverted_lists()
+        rows = np.concatenate([lists[c] for c in probes])
+        return self._top_k(rows, query, k)
+
+    def save(self, path):
+        """Persist the index to a single file; path should end in .npz."""
+        if self.centroids is None:
+            centroids = np.zeros((0, self.dim), dtype=np.float32)
+        else:
+            centroids = self.centroids
+        meta = {"dim": self.dim, "n_lists": self.n_lists, "nprobe": self.nprobe,
+                "train_size": self.train_size, "ids": self.ids}
+        np.savez(path, vectors=self.vectors, alive=self.alive, centroids=centroids,
+                 assignments=self.assignments, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        meta = json.loads(str(data["meta"]))
+        index = cls(meta["dim"], meta["n_lists"], meta["nprobe"], meta["train_size"])
+        index.ids = meta["ids"]
+        index.vectors = data["vectors"]
+        index.alive = data["alive"]
+        index.id_to_row = {i: n for n, i in enumerate(index.ids) if index.alive[n]}
+        if len(data["centroids"]):
+            index.centroids = data["centroids"]
+            index.assignments = data["assignments"]
+        return index
+
+class TextIndex:
+    def __init__(self, index=None, **index_kwargs):
+        """
+        VectorIndex over texts embedded with the shared EmbeddingService.
+
+        :param index: VectorIndex - Existing index to wrap (optional).
+        """
+        self.service = get_embedding_service()
+        self.index = index if index is not None else VectorIndex(self.service.dim, **index_kwargs)
+
+    def add(self, ids, texts):
+        self.index.add(list(ids), self.service.encode(texts))
+
+    def remove(self, ids):
+        self.index.remove(ids)
+
+    def search(self, text, k=10, nprobe=None):
+        return self.index.search(self.service.encode([text])[0], k, nprobe)
+
+def dedup_texts(texts, threshold=0.95):
+    """
+    Indices of texts to keep after dropping near-duplicates of earlier texts.
+
+    :param texts: list[str] - Texts in priority order.
+    :param threshold: float - Cosine similarity at or above which a text is a duplicate.
+    :return: list[int] - Kept positions.
+    """
+    vectors = get_embedding_service().encode(texts)
+    index = VectorIndex(vectors.shape[1])
+    kept = []
+    for position, vector in enumerate(vectors):
+        match = index.search(vector, k=1)
+        if match and match[0][1] >= threshold:
+            continue
+        index.add([position], vector[None, :])
+        kept.append(position)
+    return kept
+
+def dedup_eval_set(eval_set, key="question", threshold=0.95):
+    """Drop eval items whose `key` field is a near-duplicate of an earlier item."""
+    items = list(eval_set)
+    kept = dedup_texts([str(item.get(key, "")) for item in items], threshold)
+    return [items[i] for i in kept]
+
+class SemanticCache:
+    def __init__(self, threshold=0.92, path=None):
+        """
+        Cache of generations looked up by prompt similarity rather than exact match.
+
+        :param threshold: float - Minimum cosine similarity for a hit.
+        :param path: str - .npz file to load from and save to (optional).
+                           Responses are kept next to it in <path>.responses.json.
+        """
+        self.threshold = threshold
+        self.path = path
+        self.responses = {}
+        index = None
+        if path:
+            try:
+                index = VectorIndex.load(path)
+                with open(path + ".responses.json", "r") as f:
+                    self.responses = json.load(f)
+            except FileNotFoundError:
+                index = None
+        self.text_index = TextIndex(index)
+
+    def get(self, prompt):
+        match = self.text_index.search(prompt, k=1)
+        if match and match[0][1] >= self.threshold:
+            return self.responses.get(match[0][0])
+        return None
+
+    def put(self, prompt, response):
+        key = str(len(self.responses))
+        self.responses[key] = response
+        self.text_index.add([key], [prompt])
+
+    def save(self):
+        self.text_index.index.save(self.path)
+        with open(self.path + ".responses.json", "w") as f:
+            json.dump(self.responses, f)
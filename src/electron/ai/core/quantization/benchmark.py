@@ -0,0 +1,232 @@
+# quantization/benchmark.py
+
+import argparse
+import gc
+import importlib
+import json
+import multiprocessing
+import os
+import queue as queue_module
+import statistics
+import time
+import numpy as np
+import torch
+from torch.quantization import quantize_dynamic
+from .quantize import quantize_model
+from .checkpoint import checkpoint_size, load_state_dict, save_sharded
+from ..tracking.resources import current_rss_bytes, peak_rss_bytes
+
+DEFAULT_TYPES = ("fp32", "fp16", "bf16", "int8")
+RELOADABLE_TYPES = ("fp32", "fp16", "bf16", "int8")
+
+_DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16}
+
+def _cast_inputs(inputs, dtype):
+    if dtype is None:
+        return inputs
+    return [x.to(dtype) if torch.is_floating_point(x) else x for x in inputs]
+
+def _first_tensor(output):
+    if isinstance(output, torch.Tensor):
+        return output
+    if isinstance(output, dict):
+        return next(v for v in output.values() if isinstance(v, torch.Tensor))
+    return next(v for v in output if isinstance(v, torch.Tensor))
+
+def _skeleton(model_factory, quant_type, meta=True):
+    """A fresh model with the module structure the saved state dict expects (weights on the meta device if meta)."""
+    with torch.device("meta" if meta else "cpu"):
+        model = model_factory().eval()
+    if quant_type in _DTYPES:
+        model = model.to(_DTYPES[quant_type])
+    elif quant_type == "int8":
+        model = quantize_dynamic(model, dtype=torch.qint8)
+    return model
+
+def _materialize(state_dict):
+    """Read every tensor, so memory-mapped pages are loaded inside the timed block."""
+    for value in state_dict.values():
+        for tensor in value if isinstance(value, (tuple, list)) else (value,):
+            if isinstance(tensor, torch.Tensor):
+                (tensor.int_repr() if tensor.is_quantized else tensor).sum()
+
+def _on_meta(model):
+    return any(t.is_meta for t in list(model.parameters()) + list(model.buffers()))
+
+def _model_path(output_dir, quant_type):
+    return os.path.join(output_dir, f"model-{quant_type}")
+
+def _quantize_one(model_factory, quant_type, output_dir, quant_kwargs):
+    """Quantize and save; the returned model is only meant for types that cannot be reloaded."""
+    torch.manual_seed(0)
+    model = model_factory().eval()
+    model_path = _model_path(output_dir, quant_type)
+    if quant_type == "fp32":
+        save_sharded(model.state_dict(), model_path)
+        return model
+    return quantize_model(model, quant_type, model_path, **quant_kwargs.get(quant_type, {}))
+
+def _save_one(model_factory, sample_inputs, quant_type, output_dir, n_runs, baseline, quant_kwargs):
+    _quantize_one(model_factory, quant_type, output_dir, quant_kwargs)
+    return {"quant_type": quant_type}
+
+def _run_one(model_factory, sample_inputs, quant_type, output_dir, n_runs, baseline, quant_kwargs):
+    model_path = _model_path(output_dir, quant_type)
+    # Dynamic quantization packs real weights, so the int8 skeleton is built from fp32
+    materialized = quant_type not in RELOADABLE_TYPES or quant_type == "int8"
+    if quant_type in RELOADABLE_TYPES:
+        # Saved by a previous process, so this one never held the fp32 model
+        start = time.perf_counter()
+        state_dict = load_state_dict(model_path)
+        # Mapped checkpoints are read lazily; without this load time would exclude the disk reads
+        _materialize(state_dict)
+        model = _skeleton(model_factory, quant_type, meta=not materialized)
+        model.load_state_dict(state_dict, assign=True)
+        if _on_meta(model):
+            # Buffers missing from the state dict (non-persistent) need a real skeleton
+            materialized = True
+            model = _skeleton(model_factory, quant_type, meta=False)
+            model.load_state_dict(state_dict, assign=True)
+        load_seconds = time.perf_counter() - start
+        del state_dict
+    else:
+        # Statically quantized graphs can only be rebuilt by re-calibrating, so they are
+        # quantized here, timed on the state dict read and benchmarked on the returned model.
+        model = _quantize_one(model_factory, quant_type, output_dir, quant_kwargs)
+        start = time.perf_counter()
+        _materialize(load_state_dict(model_path))
+        load_seconds = time.perf_counter() - start
+    gc.collect()
+
+    inputs = _cast_inputs(sample_inputs, _DTYPES.get(quant_type))
+    latencies = []
+    with torch.inference_mode():
+        output = _first_tensor(model(*inputs))
+        for _ in range(n_runs):
+            start = time.perf_counter()
+            model(*inputs)
+            latencies.append(time.perf_counter() - start)
+
+    output = output.float().numpy()
+    # The peak of a process that only loaded the saved model; where fp32 weights had to
+    # be materialized (int8 skeleton, in-process quantization), the RSS once they are freed
+    rss = current_rss_bytes() if materialized else peak_rss_bytes()
+    batch_size = sample_inputs[0].shape[0] if sample_inputs and sample_inputs[0].dim() else 1
+    result = {
+        "quant_type": quant_type,
+        "size_bytes": checkpoint_size(model_path),
+        "load_seconds": load_seconds,
+        "peak_rss_bytes": rss,
+        "latency_ms_p50": statistics.median(latencies) * 1000,
+        "latency_ms_p90": float(np.percentile(latencies, 90)) * 1000,
+        "throughput_samples_per_sec": batch_size / statistics.mean(latencies),
+    }
+    if baseline is None:
+        result["output"] = output
+    else:
+        diff = output - baseline
+        result["max_abs_diff"] = float(np.abs(diff).max())
+        result["relative_l2"] = float(np.linalg.norm(diff) / max(np.linalg.norm(baseline), 1e-12))
+    return result
+
+def _child(queue, fn, *args):
+    try:
+        queue.put(fn(*args))
+    except Exception as e:
+        queue.put({"quant_type": args[2], "error": str(e)})
+
+def _in_process(context, fn, args, timeout):
+    """Run fn(*args) in a spawned process; an error result if it crashes or exceeds timeout seconds."""
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(queue, fn) + args)
+    process.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                return queue.get(timeout=1.0)
+            except queue_module.Empty:
+                pass
+            if process.exitcode is not None:
+                # The result may have been queued just before exit
+                try:
+                    return queue.get(timeout=1.0)
+                except queue_module.Empty:
+                    return {"quant_type": args[2], "error": f"worker exited with code {process.exitcode}"}
+            if deadline is not None and time.monotonic() > deadline:
+                return {"quant_type": args[2], "error": f"timed out after {timeout}s"}
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+def benchmark_quantization(model_factory, sample_inputs, output_dir, quant_types=DEFAULT_TYPES, n_runs=20, quant_kwargs=None,
+                           timeout=None):
+    """
+    Quantize a model with every requested type and compare size, speed and accuracy.
+
+    Each type is quantized and saved in one spawned process, then loaded and timed in a
+    fresh one, so load time and peak RSS reflect the saved model alone and not the fp32
+    model it came from or the other runs; model_factory must therefore be a top-level
+    callable. Where fp32 weights cannot be avoided (the int8 skeleton, and int8_static,
+    which is quantized and timed in one process) the RSS after they are freed is reported.
+
+    :param model_factory: callable - Returns a fresh fp32 nn.Module.
+    :param sample_inputs: list[torch.Tensor] - Positional inputs for one forward pass.
+    :param output_dir: str - Where the quantized checkpoints are written.
+    :param quant_types: tuple - Types to compare; 'fp32' is the baseline and always runs first.
+    :param n_runs: int - Timed forward passes per type.
+    :param quant_kwargs: dict - Extra quantizer options per type, e.g. {"int8_static": {"calibration_data": x}}.
+    :param timeout: float - Seconds allowed per process before the type is reported as an error.
+    :return: list[dict] - One result per type.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    quant_types = ["fp32"] + [q for q in quant_types if q != "fp32"]
+    context = multiprocessing.get_context("spawn")
+    results, baseline = [], None
+    for quant_type in quant_types:
+        args = (model_factory, sample_inputs, quant_type, output_dir, n_runs, baseline, quant_kwargs or {})
+        result = _in_process(context, _save_one, args, timeout) if quant_type in RELOADABLE_TYPES else {}
+        if "error" not in result:
+            result = _in_process(context, _run_one, args, timeout)
+        if baseline is None and "output" in result:
+            baseline = result.pop("output")
+            result["max_abs_diff"] = 0.0
+            result["relative_l2"] = 0.0
+        result.pop("output", None)
+        results.append(result)
+    return results
+
+def format_report(results):
+    """Render benchmark results as a plain-text table."""
+    columns = ("quant_type", "size_bytes", "load_seconds", "peak_rss_bytes", "latency_ms_p50",
+               "throughput_samples_per_sec", "max_abs_diff", "relative_l2")
+    rows = [columns]
+    for r in results:
+        if "error" in r:
+            rows.append((r["quant_type"], "error: " + r["error"]) + ("",) * (len(columns) - 2))
+            continue
+        rows.append(tuple(f"{r[c]:.4g}" if isinstance(r[c], float) else str(r[c]) for c in columns))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in rows)
+
+def _load_factory(spec):
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare quantization types on size, speed and accuracy.")
+    parser.add_argument("--factory", required=True, help="module:function returning a fresh fp32 model")
+    parser.add_argument("--inputs", required=True, help="torch.save'd list of input tensors")
+    parser.add_argument("--output-dir", default="quantization_benchmark")
+    parser.add_argument("--types", default=",".join(DEFAULT_TYPES))
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = benchmark_quantization(_load_factory(args.factory), torch.load(args.inputs), args.output_dir,
+                                     tuple(args.types.split(",")), args.runs)
+    print(format_report(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
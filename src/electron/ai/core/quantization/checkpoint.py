@@ -0,0 +1,220 @@
+# quantization/checkpoint.py
+
+import json
+import os
+import struct
+import weakref
+import torch
+from safetensors import safe_open
+from safetensors.torch import save_file
+
+INDEX_FILE = "model.safetensors.index.json"
+
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+_SIZE_UNITS = {"KB": 10 ** 3, "MB": 10 ** 6, "GB": 10 ** 9}
+
+def _parse_size(size):
+    if isinstance(size, int):
+        return size
+    size = size.upper().strip()
+    for unit, factor in _SIZE_UNITS.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+class ShardedCheckpointWriter:
+    def __init__(self, output_dir: str, max_shard_size="2GB"):
+        """
+        Write tensors into safetensors shards as they arrive.
+
+        At most one shard's worth of tensors is held at a time. Tensors that share storage
+        with one already written (tied weights) are stored once and recorded as aliases.
+
+        :param output_dir: Directory for the shards and the index file.
+        :param max_shard_size: Shard size limit, in bytes or as a string like '2GB'.
+        """
+        self.output_dir = output_dir
+        self.max_shard_size = _parse_size(max_shard_size)
+        self.weight_map = {}
+        self.aliases = {}
+        self.total_size = 0
+        self._storages = {}
+        self._buffer = {}
+        self._buffer_size = 0
+        self._shard_count = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, name: str, tensor: torch.Tensor):
+        key = (tensor.untyped_storage().data_ptr(), tensor.storage_offset(), tuple(tensor.shape), tensor.dtype)
+        seen = self._storages.get(key)
+        # The weakref guards against a freed tensor's address being reused by a new one
+        if seen is not None and seen[1]() is not None:
+            self.aliases[name] = seen[0]
+            return
+        self._storages[key] = (name, weakref.ref(tensor))
+        tensor = tensor.detach()
+        nbytes = tensor.numel() * tensor.element_size()
+        if self._buffer and self._buffer_size + nbytes > self.max_shard_size:
+            self._flush()
+        self._buffer[name] = tensor.cpu().contiguous()
+        self._buffer_size += nbytes
+        self.total_size += nbytes
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        self._shard_count += 1
+        shard_name = f"model-{self._shard_count:05d}.safetensors"
+        save_file(self._buffer, os.path.join(self.output_dir, shard_name), metadata={"format": "pt"})
+        for name in self._buffer:
+            self.weight_map[name] = shard_name
+        self._buffer = {}
+        self._buffer_size = 0
+
+    def close(self) -> str:
+        self._flush()
+        index_path = os.path.join(self.output_dir, INDEX_FILE)
+        with open(index_path, "w") as f:
+            json.dump({
+                "metadata": {"total_size": self.total_size, "aliases": self.aliases},
+                "weight_map": self.weight_map,
+            }, f, indent=2)
+        return index_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+def save_sharded(tensors, output_dir: str, max_shard_size="2GB") -> str:
+    """
+    Save a state dict (or an iterable of (name, tensor) pairs) as sharded safetensors.
+
+    :param tensors: dict or iterable of (name, tensor).
+    :param output_dir: Destination directory.
+    :param max_shard_size: Shard size limit.
+    :return: Path of the index file.
+    """
+    items = tensors.items() if isinstance(tensors, dict) else tensors
+    with ShardedCheckpointWriter(output_dir, max_shard_size) as writer:
+        for name, tensor in items:
+            writer.add(name, tensor)
+    return os.path.join(output_dir, INDEX_FILE)
+
+def _read_index(checkpoint_dir):
+    with open(os.path.join(checkpoint_dir, INDEX_FILE), "r") as f:
+        return json.load(f)
+
+def mmap_safetensors(path: str) -> dict:
+    """
+    Map a .safetensors file into tensors without copying the data.
+
+    The file is mapped copy-on-write, so tensors can be modified without touching
+    the file. Falls back to safe_open if a tensor is not aligned for a view.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+    data_start = 8 + header_size
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+
+    tensors = {}
+    misaligned = []
+    for name, info in header.items():
+        dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        begin, _ = info["data_offsets"]
+        offset = data_start + begin
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        if offset % itemsize:
+            misaligned.append(name)
+            continue
+        tensors[name] = torch.empty(0, dtype=dtype).set_(storage, offset // itemsize, info["shape"])
+    if misaligned:
+        with safe_open(path, framework="pt") as f:
+            for name in misaligned:
+                tensors[name] = f.get_tensor(name)
+    return tensors
+
+def iter_sharded(checkpoint_dir: str):
+    """Yield (name, tensor) pairs one shard at a time; tensors are memory-mapped."""
+    index = _read_index(checkpoint_dir)
+    for shard in sorted(set(index["weight_map"].values())):
+        yield from mmap_safetensors(os.path.join(checkpoint_dir, shard)).items()
+
+def load_sharded(checkpoint_dir: str) -> dict:
+    """Load a sharded checkpoint as a memory-mapped state dict, restoring tied aliases."""
+    state_dict = dict(iter_sharded(checkpoint_dir))
+    for alias, target in _read_index(checkpoint_dir)["metadata"].get("aliases", {}).items():
+        state_dict[alias] = state_dict[target]
+    return state_dict
+
+def load_state_dict(model_path: str) -> dict:
+    """
+    Load a state dict from a sharded directory, a .safetensors file or a torch.save file.
+
+    Sharded and safetensors checkpoints are memory-mapped; torch.save files are
+    opened with mmap=True so tensors are paged in on demand.
+    """
+    if os.path.isdir(model_path):
+        return load_sharded(model_path)
+    if model_path.endswith(".safetensors"):
+        return mmap_safetensors(model_path)
+    return torch.load(model_path, map_location="cpu", mmap=True)
+
+def load_into_model(model: torch.nn.Module, model_path: str, strict: bool = True) -> torch.nn.Module:
+    """
+    Load a checkpoint into a model.
+
+    A model built on the meta device adopts the memory-mapped tensors instead of copying
+    them; a materialized model keeps its parameters, with each tensor cast to the dtype
+    of the parameter it is copied into.
+    """
+    state_dict = load_state_dict(model_path)
+    targets = model.state_dict(keep_vars=True)
+    if any(t.is_meta for t in targets.values() if isinstance(t, torch.Tensor)):
+        model.load_state_dict(state_dict, strict=strict, assign=True)
+    else:
+        for name, tensor in state_dict.items():
+            target = targets.get(name)
+            if isinstance(target, torch.Tensor) and tensor.is_floating_point() and target.is_floating_point():
+                state_dict[name] = tensor.to(target.dtype)
+        model.load_state_dict(state_dict, strict=strict)
+    if hasattr(model, "tie_weights"):
+        model.tie_weights()
+    return model
+
+def convert_sharded(src_dir: str, dst_dir: str, fn, max_shard_size="2GB") -> str:
+    """
+    Apply fn(name, tensor) -> tensor to every tensor of a sharded checkpoint, one shard at a time.
+
+    :return: Path of the new index file.
+    """
+    index = save_sharded(((name, fn(name, tensor)) for name, tensor in iter_sharded(src_dir)), dst_dir, max_shard_size)
+    aliases = _read_index(src_dir)["metadata"].get("aliases", {})
+    if aliases:
+        data = _read_index(dst_dir)
+        data["metadata"]["aliases"].update(aliases)
+        with open(index, "w") as f:
+            json.dump(data, f, indent=2)
+    return index
+
+def checkpoint_size(model_path: str) -> int:
+    """On-disk size of a checkpoint file or sharded directory, in bytes."""
+    if os.path.isdir(model_path):
+        return sum(os.path.getsize(os.path.join(model_path, f)) for f in os.listdir(model_path))
+    return os.path.getsize(model_path)
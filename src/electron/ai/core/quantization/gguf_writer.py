@@ -0,0 +1,296 @@
+# quantization/gguf_writer.py
+
+import glob
+import json
+import os
+import numpy as np
+import torch
+import gguf
+from gguf import GGMLQuantizationType as QType
+
+QUANT_TYPES = {
+    "F16": QType.F16,
+    "Q8_0": QType.Q8_0,
+    "Q5_K": QType.Q5_K,
+    "Q4_K": QType.Q4_K,
+}
+
+FILE_TYPES = {
+    "F16": gguf.LlamaFileType.MOSTLY_F16,
+    "Q8_0": gguf.LlamaFileType.MOSTLY_Q8_0,
+    "Q5_K": gguf.LlamaFileType.MOSTLY_Q5_K_M,
+    "Q4_K": gguf.LlamaFileType.MOSTLY_Q4_K_M,
+}
+
+SUPPORTED_ARCHITECTURES = ("LlamaForCausalLM", "MistralForCausalLM")
+
+QK_K = 256
+
+# ---------- k-quant block encoders ----------
+
+def _pack_kquant_scales(sc, m):
+    """Pack 8 six-bit scales and mins per super-block into 12 bytes (ggml get_scale_min_k4 layout)."""
+    out = np.empty((sc.shape[0], 12), dtype=np.uint8)
+    out[:, 0:4] = (sc[:, :4] & 63) | ((sc[:, 4:] >> 4) << 6)
+    out[:, 4:8] = (m[:, :4] & 63) | ((m[:, 4:] >> 4) << 6)
+    out[:, 8:12] = (sc[:, 4:] & 0xF) | ((m[:, 4:] & 0xF) << 4)
+    return out
+
+def _kquant_codes(blocks, nmax):
+    """
+    Asymmetric quantization of (n, 8, 32) sub-blocks to codes in [0, nmax].
+
+    :return: d, dmin (float16), 6-bit scales and mins (uint8), codes (uint8).
+    """
+    xmin = np.minimum(blocks.min(axis=-1), 0)
+    xmax = blocks.max(axis=-1)
+    scale = (xmax - xmin) / nmax
+    minv = -xmin
+
+    d = (scale.max(axis=-1, keepdims=True) / 63).astype(np.float16)
+    dmin = (minv.max(axis=-1, keepdims=True) / 63).astype(np.float16)
+    d32, dmin32 = d.astype(np.float32), dmin.astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sc = np.where(d32 > 0, np.rint(scale / d32), 0).clip(0, 63).astype(np.uint8)
+        m = np.where(dmin32 > 0, np.rint(minv / dmin32), 0).clip(0, 63).astype(np.uint8)
+        eff_scale = (d32 * sc)[..., None]
+        eff_min = (dmin32 * m)[..., None]
+        q = np.where(eff_scale > 0, np.rint((blocks + eff_min) / eff_scale), 0)
+    return d, dmin, sc, m, q.clip(0, nmax).astype(np.uint8)
+
+def quantize_q4_k(data):
+    """Quantize a float array whose last dimension is a multiple of 256 to Q4_K blocks."""
+    rows = data.reshape(-1, QK_K // 32, 32).astype(np.float32)
+    d, dmin, sc, m, q = _kquant_codes(rows, 15)
+    q = q.reshape(-1, 4, 2, 32)
+    qs = (q[:, :, 0] | (q[:, :, 1] << 4)).reshape(-1, 128)
+    out = np.concatenate([d.view(np.uint8), dmin.view(np.uint8), _pack_kquant_scales(sc, m), qs], axis=1)
+    return out.reshape(*data.shape[:-1], data.shape[-1] // QK_K * 144)
+
+def quantize_q5_k(data):
+    """Quantize a float array whose last dimension is a multiple of 256 to Q5_K blocks."""
+    rows = data.reshape(-1, QK_K // 32, 32).astype(np.float32)
+    d, dmin, sc, m, q = _kquant_codes(rows, 31)
+    low = (q & 0xF).reshape(-1, 4, 2, 32)
+    qs = (low[:, :, 0] | (low[:, :, 1] << 4)).reshape(-1, 128)
+    high = (q >> 4) & 1
+    qh = np.zeros((q.shape[0], 32), dtype=np.uint8)
+    for j in range(8):
+        qh |= high[:, j] << j
+    out = np.concatenate([d.view(np.uint8), dmin.view(np.uint8), _pack_kquant_scales(sc, m), qh, qs], axis=1)
+    return out.reshape(*data.shape[:-1], data.shape[-1] // QK_K * 176)
+
+_ENCODERS = {
+    QType.Q4_K: quantize_q4_k,
+    QType.Q5_K: quantize_q5_k,
+}
+
+def encode_tensor(data, qtype):
+    """Encode a float32 array as the given GGML type; quantized types come back as uint8 bytes."""
+    if qtype == QType.F32:
+        return data.astype(np.float32)
+    if qtype == QType.F16:
+        return data.astype(np.float16)
+    if qtype in _ENCODERS:
+        return _ENCODERS[qtype](data)
+    return gguf.quants.quantize(data.astype(np.float32), qtype)
+
+# ---------- tensor sources ----------
+
+class CheckpointSource:
+    def __init__(self, checkpoint_dir):
+        """
+        Lazily read tensors from a Hugging Face checkpoint directory, one at a time.
+
+        safetensors shards are memory-mapped; .bin shards are opened with torch.load(mmap=True).
+
+        :param checkpoint_dir: str - Directory with config.json and weight shards.
+        """
+        self.checkpoint_dir = checkpoint_dir
+        with open(os.path.join(checkpoint_dir, "config.json"), "r") as f:
+            self.config = json.load(f)
+        self.shapes = {}
+        self._files = {}
+        for path in sorted(glob.glob(os.path.join(checkpoint_dir, "*.safetensors"))):
+            from safetensors import safe_open
+            with safe_open(path, framework="pt") as f:
+                for name in f.keys():
+                    self.shapes[name] = tuple(f.get_slice(name).get_shape())
+                    self._files[name] = path
+        if not self.shapes:
+            for path in sorted(glob.glob(os.path.join(checkpoint_dir, "pytorch_model*.bin"))):
+                state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+                for name, tensor in state_dict.items():
+                    self.shapes[name] = tuple(tensor.shape)
+                    self._files[name] = path
+                del state_dict
+        if not self.shapes:
+            raise FileNotFoundError(f"No weight files found in {checkpoint_dir}")
+
+    def load(self, name):
+        path = self._files[name]
+        if path.endswith(".safetensors"):
+            from safetensors import safe_open
+            with safe_open(path, framework="pt") as f:
+                tensor = f.get_tensor(name)
+        else:
+            tensor = torch.load(path, map_location="cpu", mmap=True, weights_only=True)[name]
+        return tensor.float().numpy()
+
+    def source_bytes(self):
+        return sum(os.path.getsize(p) for p in set(self._files.values()))
+
+class StateDictSource:
+    def __init__(self, model):
+        """
+        Read tensors from an in-memory Hugging Face model without copying the state dict.
+
+        :param model: transformers.PreTrainedModel - Loaded model.
+        """
+        self.config = model.config.to_dict()
+        self._state_dict = model.state_dict()
+        self.shapes = {name: tuple(t.shape) for name, t in self._state_dict.items()}
+
+    def load(self, name):
+        return self._state_dict[name].detach().float().cpu().numpy()
+
+    def source_bytes(self):
+        return sum(t.numel() * t.element_size() for t in self._state_dict.values())
+
+# ---------- writer ----------
+
+def _permute_qk(weights, n_head, n_head_kv=None):
+    # HF stores rotary halves contiguously; llama.cpp expects them interleaved
+    if n_head_kv is not None and n_head != n_head_kv:
+        n_head = n_head_kv
+    return (weights.reshape(n_head, 2, weights.shape[0] // n_head // 2, *weights.shape[1:])
+            .swapaxes(1, 2)
+            .reshape(weights.shape))
+
+def _tensor_qtype(gguf_name, shape, quant_type):
+    if len(shape) == 1:
+        return QType.F32
+    qtype = QUANT_TYPES[quant_type]
+    if qtype in _ENCODERS and gguf_name in ("token_embd.weight", "output.weight"):
+        # Embedding and output projections are the most sensitive; keep them at 8 bits
+        qtype = QType.Q8_0
+    block_size = gguf.GGML_QUANT_SIZES[qtype][0]
+    if shape[-1] % block_size:
+        qtype = QType.Q8_0 if shape[-1] % 32 == 0 else QType.F16
+    return qtype
+
+def _add_metadata(writer, config, quant_type, name):
+    n_head = config["num_attention_heads"]
+    writer.add_name(name)
+    writer.add_context_length(config.get("max_position_embeddings", 2048))
+    writer.add_embedding_length(config["hidden_size"])
+    writer.add_block_count(config["num_hidden_layers"])
+    writer.add_feed_forward_length(config["intermediate_size"])
+    writer.add_head_count(n_head)
+    writer.add_head_count_kv(config.get("num_key_value_heads", n_head))
+    writer.add_rope_dimension_count(config.get("head_dim", config["hidden_size"] // n_head))
+    writer.add_rope_freq_base(config.get("rope_theta", 10000.0))
+    writer.add_layer_norm_rms_eps(config.get("rms_norm_eps", 1e-6))
+    writer.add_vocab_size(config["vocab_size"])
+    writer.add_file_type(FILE_TYPES[quant_type])
+    writer.add_quantization_version(gguf.GGML_QUANT_VERSION)
+
+def _add_tokenizer(writer, tokenizer_dir, n_vocab):
+    from pathlib import Path
+    path = Path(tokenizer_dir)
+    try:
+        vocab = gguf.vocab.LlamaHfVocab(path)
+    except (FileNotFoundError, TypeError):
+        try:
+            vocab = gguf.vocab.SentencePieceVocab(path)
+        except FileNotFoundError:
+            vocab = gguf.vocab.BpeVocab(path)
+    tokens, scores, toktypes = [], [], []
+    for text, score, toktype in vocab.all_tokens():
+        tokens.append(text)
+        scores.append(score)
+        toktypes.append(toktype)
+    writer.add_tokenizer_model(vocab.tokenizer_model)
+    if vocab.tokenizer_model == "gpt2":
+        writer.add_tokenizer_pre("default")
+    writer.add_token_list(tokens)
+    writer.add_token_scores(scores)
+    writer.add_token_types(toktypes)
+    gguf.SpecialVocab(path, load_merges=vocab.tokenizer_model == "gpt2", n_vocab=n_vocab).add_to_gguf(writer)
+
+def write_gguf(source, output_path, tokenizer_dir, quant_type="Q8_0", name=None):
+    """
+    Stream a llama-family checkpoint into a GGUF file llama.cpp can load directly.
+
+    Tensor infos are written first from shapes alone; tensor data is then loaded,
+    quantized and written one tensor at a time, so peak memory is about one tensor.
+
+    :param source: CheckpointSource or StateDictSource - Where the weights come from.
+    :param output_path: str - Destination .gguf file.
+    :param tokenizer_dir: str - Directory with the Hugging Face tokenizer files.
+    :param quant_type: str - One of QUANT_TYPES ('F16', 'Q8_0', 'Q5_K', 'Q4_K').
+    :param name: str - Model name stored in the metadata.
+    :return: dict - Output size, source size and tensor type counts.
+    """
+    config = source.config
+    if quant_type not in QUANT_TYPES:
+        raise ValueError(f"Unsupported GGUF quantization type: {quant_type}")
+    architectures = config.get("architectures") or []
+    if not any(a in SUPPORTED_ARCHITECTURES for a in architectures):
+        raise ValueError(f"Unsupported architecture for GGUF export: {architectures}")
+
+    n_blocks = config["num_hidden_layers"]
+    n_head = config["num_attention_heads"]
+    n_head_kv = config.get("num_key_value_heads", n_head)
+    name_map = gguf.get_tensor_name_map(gguf.MODEL_ARCH.LLAMA, n_blocks)
+
+    plan = []
+    for hf_name, shape in source.shapes.items():
+        if hf_name.endswith("rotary_emb.inv_freq"):
+            continue
+        gguf_name = name_map.get_name(hf_name, try_suffixes=(".weight", ".bias"))
+        if gguf_name is None:
+            raise ValueError(f"Cannot map tensor {hf_name} to a GGUF name")
+        plan.append((hf_name, gguf_name, shape, _tensor_qtype(gguf_name, shape, quant_type)))
+
+    writer = gguf.GGUFWriter(output_path, "llama")
+    _add_metadata(writer, config, quant_type, name or os.path.splitext(os.path.basename(output_path))[0])
+    _add_tokenizer(writer, tokenizer_dir, config["vocab_size"])
+
+    for _, gguf_name, shape, qtype in plan:
+        if qtype in (QType.F32, QType.F16):
+            dtype = np.float32 if qtype == QType.F32 else np.float16
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            writer.add_tensor_info(gguf_name, shape, np.dtype(dtype), nbytes)
+        else:
+            byte_shape = gguf.quant_shape_to_byte_shape(shape, qtype)
+            writer.add_tensor_info(gguf_name, byte_shape, np.dtype(np.uint8), int(np.prod(byte_shape)), raw_dtype=qtype)
+
+    writer.write_header_to_file()
+    writer.write_kv_data_to_file()
+    writer.write_ti_data_to_file()
+
+    type_counts = {}
+    for hf_name, gguf_name, shape, qtype in plan:
+        data = source.load(hf_name)
+        if hf_name.endswith("q_proj.weight"):
+            data = _permute_qk(data, n_head, n_head)
+        elif hf_name.endswith("k_proj.weight"):
+            data = _permute_qk(data, n_head, n_head_kv)
+        writer.write_tensor_data(np.ascontiguousarray(encode_tensor(data, qtype)))
+        type_counts[qtype.name] = type_counts.get(qtype.name, 0) + 1
+        del data
+    writer.close()
+
+    return {
+        "output_path": output_path,
+        "quant_type": quant_type,
+        "output_bytes": os.path.getsize(output_path),
+        "source_bytes": source.source_bytes(),
+        "tensor_types": type_counts,
+    }
+
+def convert_checkpoint_to_gguf(checkpoint_dir, output_path, quant_type="Q8_0", tokenizer_dir=None):
+    """Convert a Hugging Face checkpoint directory to GGUF without loading the full model."""
+    source = CheckpointSource(checkpoint_dir)
+    return write_gguf(source, output_path, tokenizer_dir or checkpoint_dir, quant_type)
@@ -2,15 +2,27 @@
 
 import torch
 from torch import nn
+from .checkpoint import convert_sharded, save_sharded
 
 def quantize_bf16(model: nn.Module, model_path: str) -> nn.Module:
     """
     Quantize the model to BF16 (Brain Floating Point 16).
 
     :param model: The model to quantize.
-    :param model_path: The path to save the quantized model.
+    :param model_path: Directory to save the quantized model to (sharded safetensors).
     :return: The quantized BF16 model.
     """
     model = model.to(torch.bfloat16)  # Convert model to BF16
-    torch.save(model.state_dict(), model_path)
+    save_sharded(model.state_dict(), model_path)
     return model
+
+def quantize_bf16_checkpoint(src_dir: str, dst_dir: str) -> str:
+    """
+    Convert a sharded checkpoint to BF16 shard by shard, without building the model.
+
+    :param src_dir: Sharded safetensors checkpoint to read.
+    :param dst_dir: Directory for the BF16 checkpoint.
+    :return: Path of the new index file.
+    """
+    return convert_sharded(src_dir, dst_dir,
+                           lambda name, tensor: tensor.to(torch.bfloat16) if tensor.is_floating_point() else tensor)
@@ -0,0 +1,28 @@
+# quantization/quantize_fp16.py
+
+import torch
+from torch import nn
+from .checkpoint import convert_sharded, save_sharded
+
+def quantize_fp16(model: nn.Module, model_path: str) -> nn.Module:
+    """
+    Quantize the model to FP16 (half precision).
+
+    :param model: The model to quantize.
+    :param model_path: Directory to save the quantized model to (sharded safetensors).
+    :return: The quantized FP16 model.
+    """
+    model = model.to(torch.float16)  # Convert model to FP16
+    save_sharded(model.state_dict(), model_path)
+    return model
+
+def quantize_fp16_checkpoint(src_dir: str, dst_dir: str) -> str:
+    """
+    Convert a sharded checkpoint to FP16 shard by shard, without building the model.
+
+    :param src_dir: Sharded safetensors checkpoint to read.
+    :param dst_dir: Directory for the FP16 checkpoint.
+    :return: Path of the new index file.
+    """
+    return convert_sharded(src_dir, dst_dir,
+                           lambda name, tensor: tensor.to(torch.float16) if tensor.is_floating_point() else tensor)
@@ -1,23 +1,93 @@
 # quantization/quantize_gguf.py
 
-import torch
+import math
 import os
+import numpy as np
+import torch
+from .gguf_writer import StateDictSource, convert_checkpoint_to_gguf, write_gguf
 
-def quantize_gguf(model: torch.nn.Module, model_path: str) -> torch.nn.Module:
+def quantize_gguf(model: torch.nn.Module, model_path: str, quant_type: str = "Q8_0", tokenizer_dir: str = None) -> torch.nn.Module:
     """
     Quantize the model to the GGUF (Generic Unified Format).
     
-    GGUF can support model compression and quantization methods
-    for a more efficient deployment and inference.
+    The weights are block-quantized (Q8_0, Q5_K or Q4_K; norms stay F32) and streamed
+    into a GGUF file that the llama.cpp loader in server.py can open directly.
+    Only llama-family Hugging Face causal LMs are supported.
     
     :param model: The model to quantize.
     :param model_path: The path where the quantized model will be saved.
-    :return: The quantized GGUF model.
+    :param quant_type: GGUF quantization type ('F16', 'Q8_0', 'Q5_K', 'Q4_K').
+    :param tokenizer_dir: Directory with the tokenizer files (defaults to the model's name_or_path).
+    :return: The (unchanged) source model.
     """
-    # Placeholder: Implement the actual GGUF-specific quantization logic
-    # This might involve using a custom serialization format or compression
     model.eval()  # Set model to evaluation mode for quantization
-    torch.save(model.state_dict(), model_path)
-    
-    # Assuming GGUF is just a different format
+    tokenizer_dir = tokenizer_dir or getattr(model.config, "_name_or_path", None)
+    if not tokenizer_dir or not os.path.isdir(tokenizer_dir):
+        raise ValueError("quantize_gguf needs a local tokenizer_dir so llama.cpp can load the vocabulary")
+    with torch.no_grad():
+        write_gguf(StateDictSource(model), model_path, tokenizer_dir, quant_type)
     return model
+
+def gguf_perplexity(gguf_path: str, text: str, n_ctx: int = 512) -> float:
+    """
+    Perplexity of a GGUF model on a text, evaluated in non-overlapping n_ctx windows.
+
+    :param gguf_path: Path to the GGUF file.
+    :param text: Evaluation corpus.
+    :param n_ctx: Window size in tokens.
+    :return: Perplexity.
+    """
+    from llama_cpp import Llama
+
+    llm = Llama(model_path=gguf_path, n_ctx=n_ctx, logits_all=True, verbose=False)
+    tokens = llm.tokenize(text.encode("utf-8"))
+    nll, count = 0.0, 0
+    for start in range(0, len(tokens) - 1, n_ctx):
+        window = tokens[start:start + n_ctx]
+        if len(window) < 2:
+            break
+        llm.reset()
+        llm.eval(window)
+        logits = np.asarray(llm.scores[:len(window) - 1], dtype=np.float64)
+        peak = logits.max(axis=1, keepdims=True)
+        log_norm = peak[:, 0] + np.log(np.exp(logits - peak).sum(axis=1))
+        targets = np.asarray(window[1:])
+        nll -= (logits[np.arange(len(targets)), targets] - log_norm).sum()
+        count += len(targets)
+    return math.exp(nll / count)
+
+def gguf_quantization_report(checkpoint_dir: str, output_dir: str, corpus_path: str,
+                             quant_types=("F16", "Q8_0", "Q5_K", "Q4_K"), n_ctx: int = 512) -> dict:
+    """
+    Convert a checkpoint to several GGUF types and report size reduction and perplexity delta.
+
+    The F16 file (converted first) is the perplexity baseline.
+
+    :param checkpoint_dir: Hugging Face checkpoint directory.
+    :param output_dir: Where the GGUF files are written.
+    :param corpus_path: Small local text file used for perplexity.
+    :param quant_types: GGUF types to produce.
+    :param n_ctx: Perplexity window size.
+    :return: Report keyed by quantization type.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(corpus_path, "r") as f:
+        corpus = f.read()
+
+    quant_types = ["F16"] + [q for q in quant_types if q != "F16"]
+    report = {}
+    baseline = None
+    for quant_type in quant_types:
+        output_path = os.path.join(output_dir, f"model-{quant_type}.gguf")
+        result = convert_checkpoint_to_gguf(checkpoint_dir, output_path, quant_type)
+        ppl = gguf_perplexity(output_path, corpus, n_ctx)
+        if baseline is None:
+            baseline = ppl
+        report[quant_type] = {
+            "path": output_path,
+            "size_bytes": result["output_bytes"],
+            "size_reduction": 1 - result["output_bytes"] / result["source_bytes"],
+            "perplexity": ppl,
+            "perplexity_delta": ppl - baseline,
+        }
+    return report
@@ -13,5 +13,6 @@ def quantize_int8(model: nn.Module, model_path: str) -> nn.Module:
     :return: The quantized INT8 model.
     """
     model = quantize_dynamic(model, dtype=torch.qint8)  # Convert to INT8
+    # Packed int8 params are not plain tensors, so this stays a torch.save file
     torch.save(model.state_dict(), model_path)
     return model
@@ -0,0 +1,105 @@
+# quantization/quantize_int8_static.py
+
+import copy
+import glob
+import os
+import numpy as np
+import torch
+from torch import nn
+from torch.utils.data import DataLoader, Dataset, TensorDataset
+from torch.ao.quantization import QConfig, HistogramObserver, default_per_channel_weight_observer, get_default_qconfig_mapping
+from torch.ao.quantization.fx.custom_config import PrepareCustomConfig
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+BACKENDS = ("x86", "fbgemm", "qnnpack")
+
+def _load_file(path):
+    if path.endswith(".npy"):
+        return torch.from_numpy(np.load(path))
+    return torch.load(path, map_location="cpu")
+
+def load_calibration_data(source, batch_size: int = 32, num_batches: int = None) -> list:
+    """
+    Load calibration batches for static quantization.
+
+    :param source: A tensor, a list of tensors, a Dataset, a DataLoader, or a directory of
+                   .pt/.npy files (each file is one batch).
+    :param batch_size: Batch size when source is a tensor or Dataset.
+    :param num_batches: Maximum number of batches to keep (None = all).
+    :return: List of batches (tensor, tuple of tensors or dict of tensors).
+    """
+    if isinstance(source, str):
+        files = sorted(glob.glob(os.path.join(source, "*.pt")) + glob.glob(os.path.join(source, "*.npy")))
+        if not files:
+            raise FileNotFoundError(f"No calibration files found in {source}")
+        batches = (_load_file(f) for f in files)
+    elif isinstance(source, torch.Tensor):
+        batches = (b[0] for b in DataLoader(TensorDataset(source), batch_size=batch_size))
+    elif isinstance(source, Dataset):
+        batches = iter(DataLoader(source, batch_size=batch_size))
+    else:
+        batches = iter(source)
+
+    result = []
+    for batch in batches:
+        if num_batches is not None and len(result) >= num_batches:
+            break
+        result.append(batch)
+    return result
+
+def _forward(model, batch):
+    if isinstance(batch, dict):
+        return model(**batch)
+    if isinstance(batch, (list, tuple)):
+        return model(*batch)
+    return model(batch)
+
+def _qconfig_mapping(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported quantization backend: {backend}")
+    mapping = get_default_qconfig_mapping(backend)
+    # fbgemm/x86 kernels need reduced activation range to avoid overflow on older CPUs
+    mapping.set_global(QConfig(
+        activation=HistogramObserver.with_args(reduce_range=backend != "qnnpack"),
+        weight=default_per_channel_weight_observer,
+    ))
+    return mapping
+
+def quantize_int8_static(model: nn.Module, model_path: str, calibration_data, backend: str = "x86",
+                         skip_modules=(), num_batches: int = 100) -> nn.Module:
+    """
+    Static post-training INT8 quantization with calibration (FX graph mode).
+
+    Unlike quantize_int8, convolutions and activations are quantized too, using
+    per-channel weight observers and histogram-calibrated activation ranges.
+
+    :param model: The model to quantize (must be FX-traceable apart from skip_modules).
+    :param model_path: The path to save the quantized model.
+    :param calibration_data: Anything load_calibration_data accepts.
+    :param backend: Quantized kernel backend ('x86', 'fbgemm' or 'qnnpack').
+    :param skip_modules: Qualified names of sensitive submodules kept in fp32.
+    :param num_batches: Maximum calibration batches.
+    :return: The quantized INT8 model.
+    """
+    torch.backends.quantized.engine = backend
+    batches = load_calibration_data(calibration_data, num_batches=num_batches)
+    if not batches:
+        raise ValueError("Static quantization needs at least one calibration batch")
+
+    qconfig_mapping = _qconfig_mapping(backend)
+    for name in skip_modules:
+        qconfig_mapping.set_module_name(name, None)
+    prepare_config = PrepareCustomConfig().set_non_traceable_module_names(list(skip_modules))
+
+    example = batches[0]
+    example_inputs = tuple(example) if isinstance(example, (list, tuple)) else (example,)
+    model = copy.deepcopy(model).eval()
+    prepared = prepare_fx(model, qconfig_mapping, example_inputs, prepare_custom_config=prepare_config)
+
+    with torch.inference_mode():
+        for batch in batches:
+            _forward(prepared, batch)  # Observers record activation ranges
+
+    quantized = convert_fx(prepared)
+    torch.save(quantized.state_dict(), model_path)
+    return quantized
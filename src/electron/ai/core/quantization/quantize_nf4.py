@@ -0,0 +1,88 @@
+# quantization/quantize_nf4.py
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+# The 16 NormalFloat4 levels (quantiles of N(0, 1) scaled to [-1, 1]) used by QLoRA
+NF4_LEVELS = torch.tensor([
+    -1.0, -0.6961928009986877, -0.5250730514526367, -0.39491748809814453,
+    -0.28444138169288635, -0.18477343022823334, -0.09105003625154495, 0.0,
+    0.07958029955625534, 0.16093020141124725, 0.24611230194568634, 0.33791524171829224,
+    0.44070982933044434, 0.5626170039176941, 0.7229568362236023, 1.0,
+])
+_NF4_MIDPOINTS = (NF4_LEVELS[1:] + NF4_LEVELS[:-1]) / 2
+
+def quantize_nf4_tensor(weight: torch.Tensor, block_size: int = 64):
+    """
+    Quantize a tensor to NF4 with one absmax scale per block.
+
+    :param weight: Tensor to quantize.
+    :param block_size: Values per scale (must be even).
+    :return: (packed uint8 codes, two per byte; float16 absmax per block)
+    """
+    flat = weight.detach().float().reshape(-1)
+    pad = (-flat.numel()) % block_size
+    if pad:
+        flat = torch.cat([flat, flat.new_zeros(pad)])
+    blocks = flat.view(-1, block_size)
+    absmax = blocks.abs().amax(dim=1).clamp_min(1e-12)
+    codes = torch.bucketize(blocks / absmax[:, None], _NF4_MIDPOINTS.to(flat.device)).to(torch.uint8).view(-1)
+    packed = (codes[0::2] << 4) | codes[1::2]
+    return packed, absmax.to(torch.float16)
+
+def dequantize_nf4(packed: torch.Tensor, absmax: torch.Tensor, shape, dtype=torch.float32) -> torch.Tensor:
+    """Inverse of quantize_nf4_tensor."""
+    codes = torch.stack([packed >> 4, packed & 0x0F], dim=1).view(-1).long()
+    values = NF4_LEVELS.to(packed.device)[codes].view(absmax.numel(), -1) * absmax.float()[:, None]
+    numel = 1
+    for dim in shape:
+        numel *= dim
+    return values.view(-1)[:numel].view(shape).to(dtype)
+
+class Int4Linear(nn.Linear):
+    def __init__(self, linear: nn.Linear, block_size: int = 64, compute_dtype: torch.dtype = None):
+        """
+        Frozen linear layer holding NF4 weights, dequantized on the fly in forward.
+
+        It subclasses nn.Linear so PEFT can wrap it with LoRA like any other linear layer;
+        the weight property returns the dequantized matrix.
+
+        :param linear: Layer to quantize.
+        :param block_size: Values per absmax scale.
+        :param compute_dtype: Dtype of the dequantized weight (defaults to the layer's dtype).
+        """
+        nn.Module.__init__(self)
+        self.in_features = linear.in_features
+        self.out_features = linear.out_features
+        self.compute_dtype = compute_dtype or linear.weight.dtype
+        packed, absmax = quantize_nf4_tensor(linear.weight, block_size)
+        self.register_buffer("packed_weight", packed)
+        self.register_buffer("absmax", absmax)
+        if linear.bias is not None:
+            self.bias = nn.Parameter(linear.bias.detach().clone(), requires_grad=False)
+        else:
+            self.register_parameter("bias", None)
+
+    @property
+    def weight(self) -> torch.Tensor:
+        return dequantize_nf4(self.packed_weight, self.absmax, (self.out_features, self.in_features), self.compute_dtype)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        bias = None if self.bias is None else self.bias.to(x.dtype)
+        return F.linear(x, self.weight.to(x.dtype), bias)
+
+def replace_linear_with_nf4(model: nn.Module, skip_modules=("classifier", "score", "lm_head"), block_size: int = 64,
+                            compute_dtype: torch.dtype = None) -> nn.Module:
+    """
+    Swap every nn.Linear of a model for an Int4Linear, in place.
+
+    :param skip_modules: Module names kept in full precision (task heads that stay trainable).
+    :return: The model.
+    """
+    for name, module in list(model.named_modules()):
+        for child_name, child in list(module.named_children()):
+            path = f"{name}.{child_name}" if name else child_name
+            if type(child) is nn.Linear and not set(path.split(".")) & set(skip_modules):
+                setattr(module, child_name, Int4Linear(child, block_size, compute_dtype))
+    return model
@@ -0,0 +1,70 @@
+import time
+from transformers import TrainerCallback
+from .resources import current_rss_bytes, peak_rss_bytes
+
+# TrainingArguments fields recorded as experiment parameters
+_LOGGED_ARGS = ("learning_rate", "per_device_train_batch_size", "gradient_accumulation_steps", "num_train_epochs",
+                "weight_decay", "warmup_steps", "bf16", "fp16", "gradient_checkpointing", "seed")
+
+class TrackerCallback(TrainerCallback):
+    def __init__(self, tracker, log_every=10):
+        """
+        Stream Trainer telemetry into an ExperimentTracker.
+
+        Everything the Trainer logs (loss, learning rate, eval metrics) is forwarded as is.
+        Every log_every optimizer steps the callback also logs step time, samples/sec,
+        tokens/sec and memory. Tokens are counted by the Trainer itself when
+        include_num_input_tokens_seen is set (build_trainer sets it when this callback is
+        attached); the count is of input_ids elements, so it includes padding tokens.
+        The tracker buffers writes, so this stays cheap.
+
+        :param tracker: ExperimentTracker - Destination experiment.
+        :param log_every: int - Optimizer steps between throughput/memory points.
+        """
+        self.tracker = tracker
+        self.log_every = log_every
+        self._step_start = None
+        self._window_start = None
+        self._window_steps = 0
+        self._window_tokens = 0
+
+    def on_train_begin(self, args, state, control, model=None, **kwargs):
+        params = {name: getattr(args, name) for name in _LOGGED_ARGS if hasattr(args, name)}
+        params["effective_batch_size"] = args.train_batch_size * args.gradient_accumulation_steps * args.world_size
+        if model is not None:
+            params["model_class"] = type(model).__name__
+            params["trainable_params"] = sum(p.numel() for p in model.parameters() if p.requires_grad)
+        self.tracker.log_parameters(params)
+        self._window_start = time.perf_counter()
+        self._window_tokens = getattr(state, "num_input_tokens_seen", 0)
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        self._step_start = time.perf_counter()
+
+    def on_step_end(self, args, state, control, **kwargs):
+        step_seconds = time.perf_counter() - self._step_start
+        self._window_steps += 1
+        if state.global_step % self.log_every:
+            return
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        samples = self._window_steps * args.train_batch_size * args.gradient_accumulation_steps * args.world_size
+        tokens = getattr(state, "num_input_tokens_seen", 0)
+        metrics = {
+            "step_time_ms": step_seconds * 1000,
+            "samples_per_sec": samples / elapsed,
+            "rss_bytes": current_rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        if tokens:
+            metrics["tokens_per_sec"] = (tokens - self._window_tokens) / elapsed
+        self.tracker.log_metrics(metrics, step=state.global_step)
+        self._window_start, self._window_steps, self._window_tokens = now, 0, tokens
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        metrics = {k: v for k, v in (logs or {}).items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+        if metrics:
+            self.tracker.log_metrics(metrics, step=state.global_step)
+
+    def on_train_end(self, args, state, control, **kwargs):
+        self.tracker.flush()
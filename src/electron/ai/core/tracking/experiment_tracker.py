@@ -1,33 +1,80 @@
 import os
+import re
 import json
+import atexit
+import threading
+import time
 import subprocess
 from datetime import datetime
 
+METADATA_FILE = "experiment_metadata.json"
+COMPACTED_FILE = "metrics.compacted.json"
+_LOG_PATTERN = re.compile(r"^metrics\.(\d+)\.jsonl$")
+
 class ExperimentTracker:
-    def __init__(self, experiment_name, experiment_dir="ai/core/tracking/experiments"):
+    def __init__(self, experiment_name, experiment_dir="ai/core/tracking/experiments", flush_interval=1.0,
+                 flush_size=10000, compact_threshold=200000):
+        """
+        Track parameters and metric series of one experiment.
+
+        Metric points are buffered in memory and appended to a JSONL log by a background
+        thread, so log_metric only costs a list append. Every point keeps its step and
+        timestamp. Logs are periodically compacted into one per-metric file, so loading
+        history stays fast no matter how many points were logged.
+
+        :param experiment_name: Name of the experiment (also its directory name).
+        :param experiment_dir: Parent directory of all experiments.
+        :param flush_interval: Seconds between background flushes.
+        :param flush_size: Buffered points that trigger an early flush.
+        :param compact_threshold: Logged points after which the log is compacted.
+        """
         self.experiment_name = experiment_name
         self.experiment_dir = experiment_dir
         self.experiment_path = os.path.join(experiment_dir, self.experiment_name)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.compact_threshold = compact_threshold
         self.metrics = {}
         self.parameters = {}
+        self._buffer = []
+        self._steps = {}
+        self._log_points = 0
+        self._dirty = False
+        self._lock = threading.Lock()           # guards the buffer and in-memory state
+        self._io_lock = threading.Lock()        # serializes flushes and compactions
+        self._wake = threading.Event()
+        self._closed = False
         self._initialize_experiment()
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"tracker-{experiment_name}", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
 
     def _initialize_experiment(self):
-        """Initialize experiment folder and log details."""
+        """Initialize the experiment folder, or reopen an existing experiment."""
         if not os.path.exists(self.experiment_path):
             os.makedirs(self.experiment_path)
 
-        # Initialize experiment metadata
-        self.metadata = {
-            "experiment_name": self.experiment_name,
-            "date": str(datetime.now()),
-            "git_commit": self._get_git_commit(),
-            "metrics": self.metrics,
-            "parameters": self.parameters
-        }
+        metadata_file = os.path.join(self.experiment_path, METADATA_FILE)
+        if os.path.exists(metadata_file):
+            with open(metadata_file, "r") as f:
+                self.metadata = json.load(f)
+            self.metrics.update(self.metadata.get("metrics", {}))
+            self.parameters.update(self.metadata.get("parameters", {}))
+            self.metadata["metrics"] = self.metrics
+            self.metadata["parameters"] = self.parameters
+        else:
+            self.metadata = {
+                "experiment_name": self.experiment_name,
+                "date": str(datetime.now()),
+                "git_commit": self._get_git_commit(),
+                "metrics": self.metrics,
+                "parameters": self.parameters
+            }
+            self._save_metadata()
 
-        # Save metadata
-        self._save_metadata()
+        generations = self._log_generations()
+        self._generation = (generations[-1] if generations else self._compacted_generation()) + 1
+        self._recover_steps()
 
     def _get_git_commit(self):
         """Get current git commit hash for versioning."""
@@ -38,23 +85,171 @@ class ExperimentTracker:
         return git_commit
 
     def _save_metadata(self):
-        """Save experiment metadata as a JSON file."""
-        metadata_file = os.path.join(self.experiment_path, "experiment_metadata.json")
-        with open(metadata_file, "w") as f:
+        """Save experiment metadata as a JSON file (atomically)."""
+        metadata_file = os.path.join(self.experiment_path, METADATA_FILE)
+        with open(metadata_file + ".tmp", "w") as f:
             json.dump(self.metadata, f, indent=4)
+        os.replace(metadata_file + ".tmp", metadata_file)
+
+    # ---------- logging ----------
+
+    def log_metric(self, metric_name, value, step=None):
+        """
+        Log one metric point.
 
-    def log_metric(self, metric_name, value):
-        """Log a metric during the experiment."""
-        self.metrics[metric_name] = value
-        self.metadata["metrics"] = self.metrics
-        self._save_metadata()
+        :param metric_name: Name of the metric.
+        :param value: Value (any JSON-serializable value; usually a number).
+        :param step: Training step; defaults to one past the metric's previous step.
+        :return: The step the point was logged at.
+        """
+        with self._lock:
+            if step is None:
+                step = self._steps.get(metric_name, -1) + 1
+            self._steps[metric_name] = step
+            self.metrics[metric_name] = value
+            self._buffer.append((metric_name, value, step, time.time()))
+            self._dirty = True
+            if len(self._buffer) >= self.flush_size:
+                self._wake.set()
+        if self._closed:
+            # No flusher anymore (e.g. closed by a cache eviction mid-request): write through
+            self.flush()
+        return step
+
+    def log_metrics(self, metrics, step=None):
+        """Log several metrics at the same step."""
+        for metric_name, value in metrics.items():
+            self.log_metric(metric_name, value, step)
 
     def log_parameters(self, params):
         """Log hyperparameters for the experiment."""
-        self.parameters.update(params)
-        self.metadata["parameters"] = self.parameters
-        self._save_metadata()
+        with self._lock:
+            self.parameters.update(params)
+            self._dirty = True
+        self._wake.set()
+        if self._closed:
+            self.flush()
 
     def get_experiment_info(self):
-        """Return the experiment metadata."""
-        return self.metadata
+        """Return the experiment metadata (with the latest value of every metric)."""
+        with self._lock:
+            return json.loads(json.dumps(self.metadata))
+
+    # ---------- storage ----------
+
+    def _log_path(self, generation):
+        return os.path.join(self.experiment_path, f"metrics.{generation}.jsonl")
+
+    def _log_generations(self):
+        return sorted(int(m.group(1)) for m in map(_LOG_PATTERN.match, os.listdir(self.experiment_path)) if m)
+
+    def _read_compacted(self):
+        path = os.path.join(self.experiment_path, COMPACTED_FILE)
+        if not os.path.exists(path):
+            return {"generation": 0, "series": {}}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _compacted_generation(self):
+        return self._read_compacted()["generation"]
+
+    def _read_logs(self, after_generation):
+        for generation in self._log_generations():
+            if generation <= after_generation:
+                continue
+            with open(self._log_path(generation), "r") as f:
+                for line in f:
+                    # A crash can leave a partial last line
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+
+    def _recover_steps(self):
+        for name, series in self._read_compacted()["series"].items():
+            if series["step"]:
+                self._steps[name] = series["step"][-1]
+        for point in self._read_logs(self._compacted_generation()):
+            self._steps[point["name"]] = point["step"]
+            self._log_points += 1
+
+    def flush(self):
+        """Write buffered points (and changed metadata) to disk."""
+        with self._io_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, []
+                dirty, self._dirty = self._dirty, False
+                metadata = json.loads(json.dumps(self.metadata)) if dirty else None
+            if buffer:
+                lines = "".join(json.dumps({"name": n, "value": v, "step": s, "time": t}) + "\n"
+                                for n, v, s, t in buffer)
+                with open(self._log_path(self._generation), "a") as f:
+                    f.write(lines)
+                self._log_points += len(buffer)
+            if metadata is not None:
+                metadata_file = os.path.join(self.experiment_path, METADATA_FILE)
+                with open(metadata_file + ".tmp", "w") as f:
+                    json.dump(metadata, f, indent=4)
+                os.replace(metadata_file + ".tmp", metadata_file)
+
+    def compact(self):
+        """
+        Merge the JSONL logs into the compacted per-metric file and delete them.
+
+        New points go to a fresh log generation first, and the compacted file records the
+        last generation it contains, so a crash at any point loses or duplicates nothing.
+        """
+        self.flush()
+        with self._io_lock:
+            compacted = self._read_compacted()
+            merged_up_to = self._generation
+            self._generation += 1
+            series = compacted["series"]
+            for point in self._read_logs(compacted["generation"]):
+                entry = series.setdefault(point["name"], {"step": [], "time": [], "value": []})
+                entry["step"].append(point["step"])
+                entry["time"].append(point["time"])
+                entry["value"].append(point["value"])
+            path = os.path.join(self.experiment_path, COMPACTED_FILE)
+            with open(path + ".tmp", "w") as f:
+                json.dump({"generation": merged_up_to, "series": series}, f)
+            os.replace(path + ".tmp", path)
+            for generation in self._log_generations():
+                if generation <= merged_up_to:
+                    os.remove(self._log_path(generation))
+            self._log_points = 0
+
+    def history(self, metric_name):
+        """
+        Full series of a metric.
+
+        :return: list of {"step", "time", "value"} in logging order.
+        """
+        self.flush()
+        with self._io_lock:
+            compacted = self._read_compacted()
+            points = []
+            series = compacted["series"].get(metric_name)
+            if series:
+                points = [{"step": s, "time": t, "value": v}
+                          for s, t, v in zip(series["step"], series["time"], series["value"])]
+            for point in self._read_logs(compacted["generation"]):
+                if point["name"] == metric_name:
+                    points.append({"step": point["step"], "time": point["time"], "value": point["value"]})
+        return points
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self._log_points >= self.compact_threshold:
+                self.compact()
+
+    def close(self):
+        """Stop the background flusher and write everything out."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        atexit.unregister(self.close)
@@ -0,0 +1,207 @@
+import os
+import json
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    name TEXT PRIMARY KEY,
+    date TEXT,
+    git_commit TEXT
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    experiment TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value_text TEXT,
+    value_num REAL,
+    PRIMARY KEY (experiment, key)
+);
+CREATE INDEX IF NOT EXISTS parameters_by_text ON parameters (key, value_text);
+CREATE INDEX IF NOT EXISTS parameters_by_num ON parameters (key, value_num);
+CREATE TABLE IF NOT EXISTS latest_metrics (
+    experiment TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL,
+    step INTEGER,
+    PRIMARY KEY (experiment, name)
+);
+CREATE INDEX IF NOT EXISTS latest_metrics_by_name ON latest_metrics (name, value);
+"""
+
+_OPERATORS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+def _as_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+class ExperimentIndex:
+    def __init__(self, db_path):
+        """
+        SQLite index over experiments for listing, filtering and comparing them.
+
+        The tracker files stay the source of truth; the index holds each experiment's
+        parameters and latest metric values so queries over thousands of runs don't
+        have to open every experiment directory.
+
+        :param db_path: Path of the SQLite database (created if missing).
+        """
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def upsert_experiment(self, metadata):
+        """Index an experiment from its tracker metadata."""
+        name = metadata["experiment_name"]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO experiments (name, date, git_commit) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET date=excluded.date, git_commit=excluded.git_commit",
+                (name, metadata.get("date"), metadata.get("git_commit")))
+        self.set_parameters(name, metadata.get("parameters", {}))
+        self.update_metrics(name, {k: (v, None) for k, v in metadata.get("metrics", {}).items()})
+
+    def set_parameters(self, name, params):
+        rows = [(name, key, json.dumps(value), _as_number(value)) for key, value in params.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO parameters (experiment, key, value_text, value_num) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(experiment, key) DO UPDATE SET value_text=excluded.value_text, value_num=excluded.value_num",
+                rows)
+
+    def update_metrics(self, name, latest):
+        """
+        Record the latest value of metrics.
+
+        :param latest: dict - {metric: (value, step)}.
+        """
+        rows = [(name, metric, _as_number(value), step) for metric, (value, step) in latest.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO latest_metrics (experiment, name, value, step) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(experiment, name) DO UPDATE SET value=excluded.value, step=excluded.step",
+                rows)
+
+    def rebuild(self, experiment_dir):
+        """Index every experiment directory under experiment_dir that has metadata."""
+        if not os.path.isdir(experiment_dir):
+            return 0
+        count = 0
+        for name in os.listdir(experiment_dir):
+            metadata_file = os.path.join(experiment_dir, name, "experiment_metadata.json")
+            if os.path.exists(metadata_file):
+                with open(metadata_file, "r") as f:
+                    self.upsert_experiment(json.load(f))
+                count += 1
+        return count
+
+    def list_experiments(self, filters=None, order_by=None, descending=False, limit=100, offset=0):
+        """
+        List experiments matching parameter filters.
+
+        :param filters: dict - {key: value} for equality or {key__gt|gte|lt|lte: number} for ranges.
+                        String values that parse as JSON numbers are compared numerically, and
+                        'true', 'false' and 'null' match the corresponding JSON values.
+        :param order_by: str - Metric to sort by (experiments without it come last).
+        :param descending: bool - Sort order for order_by.
+        :param limit: int - Page size.
+        :param offset: int - Page offset.
+        :return: list of experiment names.
+        """
+        sql = ["SELECT e.name FROM experiments e"]
+        args = []
+        if order_by:
+            sql.append("LEFT JOIN latest_metrics m ON m.experiment = e.name AND m.name = ?")
+            args.append(order_by)
+        where = []
+        for key, value in (filters or {}).items():
+            key, _, op = key.partition("__")
+            number = _as_number(value)
+            if number is None and isinstance(value, str):
+                try:
+                    parsed = json.loads(value)
+                except ValueError:
+                    pass
+                else:
+                    number = _as_number(parsed)
+                    # Query strings carry true/false/null as text; stored values are their JSON
+                    if isinstance(parsed, bool) or parsed is None:
+                        value = parsed
+            if op:
+                if op not in _OPERATORS or number is None:
+                    raise ValueError(f"Unsupported filter: {key}__{op}={value}")
+                where.append(f"e.name IN (SELECT experiment FROM parameters WHERE key = ? AND value_num {_OPERATORS[op]} ?)")
+                args += [key, number]
+            elif number is not None:
+                where.append("e.name IN (SELECT experiment FROM parameters WHERE key = ? AND value_num = ?)")
+                args += [key, number]
+            else:
+                where.append("e.name IN (SELECT experiment FROM parameters WHERE key = ? AND value_text = ?)")
+                args += [key, json.dumps(value)]
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        if order_by:
+            sql.append(f"ORDER BY m.value IS NULL, m.value {'DESC' if descending else 'ASC'}")
+        else:
+            sql.append("ORDER BY e.date DESC")
+        sql.append("LIMIT ? OFFSET ?")
+        args += [limit, offset]
+        with self._lock:
+            return [row[0] for row in self._conn.execute(" ".join(sql), args)]
+
+    def compare(self, names, metrics=None):
+        """
+        Parameters and latest metrics of several experiments side by side.
+
+        :param names: list - Experiment names; names that are not indexed are left out.
+        :param metrics: list - Metrics to include (all if None).
+        :return: dict - {name: {"parameters": {...}, "metrics": {metric: {"value", "step"}}}}.
+        """
+        marks = ",".join("?" * len(names))
+        with self._lock:
+            known = {row[0] for row in self._conn.execute(f"SELECT name FROM experiments WHERE name IN ({marks})", names)}
+            result = {name: {"parameters": {}, "metrics": {}} for name in names if name in known}
+            for experiment, key, value in self._conn.execute(
+                    f"SELECT experiment, key, value_text FROM parameters WHERE experiment IN ({marks})", names):
+                result[experiment]["parameters"][key] = json.loads(value)
+            sql = f"SELECT experiment, name, value, step FROM latest_metrics WHERE experiment IN ({marks})"
+            args = list(names)
+            if metrics:
+                sql += f" AND name IN ({','.join('?' * len(metrics))})"
+                args += list(metrics)
+            for experiment, metric, value, step in self._conn.execute(sql, args):
+                result[experiment]["metrics"][metric] = {"value": value, "step": step}
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def downsample(points, max_points=500):
+    """
+    Reduce a metric series to at most max_points buckets.
+
+    Each bucket reports its last step and time plus the mean, min and max value, so
+    spikes stay visible in plots.
+
+    :param points: list - {"step", "time", "value"} dicts in order.
+    :return: list - Bucketed points.
+    """
+    numeric = [p for p in points if _as_number(p["value"]) is not None]
+    if len(numeric) <= max_points:
+        return [dict(p, min=p["value"], max=p["value"]) for p in numeric]
+    bucket = len(numeric) / max_points
+    result = []
+    for i in range(max_points):
+        chunk = numeric[int(i * bucket):int((i + 1) * bucket)]
+        if not chunk:
+            continue
+        values = [p["value"] for p in chunk]
+        result.append({"step": chunk[-1]["step"], "time": chunk[-1]["time"], "value": sum(values) / len(values),
+                       "min": min(values), "max": max(values)})
+    return result
@@ -0,0 +1,36 @@
+# tracking/resources.py
+
+import os
+import platform
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def peak_rss_bytes():
+    """Peak resident set size of this process (0 where it cannot be read)."""
+    if resource is not None:
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if platform.system() == "Darwin" else peak * 1024
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        # peak_wset is the Windows peak working set
+        return getattr(memory, "peak_wset", memory.rss)
+    return 0
+
+def current_rss_bytes():
+    """Current resident set size of this process (falls back to the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        return peak_rss_bytes()
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import pandas as pd
 import numpy as np
@@ -10,8 +11,18 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import uuid
 import os
+import sys
+from typing import Optional
+
+# The servers share the core package one directory up (python dataset.py / uvicorn dataset:app from here)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.monitoring.metrics import REGISTRY, CONTENT_TYPE, instrument_fastapi, register_process_metrics
+from core.monitoring.tracing import TRACER, PROFILER, span, trace_fastapi
 
 app = FastAPI()
+register_process_metrics()
+instrument_fastapi(app, "dataset")
+trace_fastapi(app)
 
 # ========== MODELS ==========
 
@@ -27,9 +38,17 @@ class ModelRequest(BaseModel):
 class TuneRequest(ModelRequest):
     param_grid: dict
 
+class TracingRequest(BaseModel):
+    enabled: Optional[bool] = None
+    slow_ms: Optional[float] = None
+
+class ProfilerRequest(BaseModel):
+    interval_ms: Optional[float] = None
+
 # ========== GLOBAL STATE ==========
 
 test_data_cache = {}
+REGISTRY.gauge("cached_test_sets", "Test splits cached for /visualize.").set_function(lambda: len(test_data_cache))
 
 # ========== UTILS ==========
 
@@ -51,14 +70,54 @@ def generate_eda(df):
 
 # ========== ROUTES ==========
 
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/debug/tracing")
+async def get_tracing(limit: int = 20):
+    return dict(TRACER.state(), traces=TRACER.recent(limit))
+
+@app.post("/debug/tracing")
+async def set_tracing(req: TracingRequest):
+    try:
+        TRACER.configure(req.enabled, req.slow_ms / 1000 if req.slow_ms is not None else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return dict(TRACER.state(), traces=TRACER.recent())
+
+@app.post("/debug/profiler/start")
+async def profiler_start(req: ProfilerRequest = ProfilerRequest()):
+    try:
+        PROFILER.start(req.interval_ms / 1000 if req.interval_ms is not None else None)
+    except ValueError as e:
+        raise HTTPException(status_code=409 if PROFILER.running else 400, detail=str(e))
+    return {"message": "Profiler started.", "interval_ms": PROFILER.interval * 1000}
+
+@app.post("/debug/profiler/stop")
+async def profiler_stop():
+    """Stop the profiler and return collapsed stacks (feed to flamegraph.pl or speedscope)."""
+    try:
+        return PlainTextResponse(PROFILER.stop())
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/debug/profiler")
+async def profiler_snapshot():
+    return PlainTextResponse(PROFILER.collapsed(), headers={"X-Profiler-Samples": str(PROFILER.samples)})
+
 @app.post("/upload-data/")
 async def upload_data(file: UploadFile = File(...)):
     try:
         filename = f"{uuid.uuid4().hex}_{file.filename}"
-        save_file(file, filename)
+        with span("save_upload"):
+            save_file(file, filename)
         file_path = os.path.join(UPLOAD_DIR, filename)
-        df = pd.read_csv(file_path)
-        return {"filename": filename, "eda": generate_eda(df)}
+        with span("read_csv"):
+            df = pd.read_csv(file_path)
+        with span("eda"):
+            eda = generate_eda(df)
+        return {"filename": filename, "eda": eda}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -71,12 +130,14 @@ async def load_data(req: FilePathModel):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail="File not found.")
 
-        try:
-            df = pd.read_csv(full_path)
-        except UnicodeDecodeError:
-            df = pd.read_csv(full_path, encoding="ISO-8859-1")
+        with span("read_csv"):
+            try:
+                df = pd.read_csv(full_path)
+            except UnicodeDecodeError:
+                df = pd.read_csv(full_path, encoding="ISO-8859-1")
 
-        eda_result = generate_eda(df)
+        with span("eda"):
+            eda_result = generate_eda(df)
 
         # Replace NaN, inf, -inf with None (valid JSON null)
         def clean_for_json(obj):
@@ -100,27 +161,32 @@ async def load_data(req: FilePathModel):
 @app.post("/train-model/")
 async def train_model(model_req: ModelRequest):
     try:
-        df = pd.read_csv(os.path.join(UPLOAD_DIR, model_req.file_name))
+        with span("read_csv"):
+            df = pd.read_csv(os.path.join(UPLOAD_DIR, model_req.file_name))
         if model_req.target_column not in df.columns:
             raise HTTPException(status_code=400, detail="Target column not found in the dataset.")
         
-        X = df.drop(columns=[model_req.target_column])
-        y = df[model_req.target_column]
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=model_req.test_size, random_state=42)
+        with span("preprocess"):
+            X = df.drop(columns=[model_req.target_column])
+            y = df[model_req.target_column]
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=model_req.test_size, random_state=42)
 
         if model_req.model_type == "logistic_regression":
             model = LogisticRegression(max_iter=200)
         else:
             raise HTTPException(status_code=400, detail="Unsupported model type.")
         
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
-        conf_matrix = confusion_matrix(y_test, y_pred).tolist()
+        with span("fit"):
+            model.fit(X_train, y_train)
+        with span("score"):
+            y_pred = model.predict(X_test)
+            accuracy = accuracy_score(y_test, y_pred)
+            conf_matrix = confusion_matrix(y_test, y_pred).tolist()
 
         # Save model
         model_filename = f"{uuid.uuid4().hex}_model.pkl"
-        joblib.dump(model, os.path.join(UPLOAD_DIR, model_filename))
+        with span("save_model"):
+            joblib.dump(model, os.path.join(UPLOAD_DIR, model_filename))
 
         # Cache test data for visualization
         test_data_cache[model_filename] = (X_test, y_test)
@@ -157,11 +223,12 @@ async def visualize(model_filename: str):
 @app.post("/hyperparameter-tune/")
 async def hyperparameter_tune(req: TuneRequest):
     try:
-        df = pd.read_csv(os.path.join(UPLOAD_DIR, req.file_name))
-        X = df.drop(columns=[req.target_column])
-        y = df[req.target_column]
-
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=req.test_size, random_state=42)
+        with span("read_csv"):
+            df = pd.read_csv(os.path.join(UPLOAD_DIR, req.file_name))
+        with span("preprocess"):
+            X = df.drop(columns=[req.target_column])
+            y = df[req.target_column]
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=req.test_size, random_state=42)
 
         if req.model_type == "logistic_regression":
             model = LogisticRegression(max_iter=200)
@@ -169,7 +236,8 @@ async def hyperparameter_tune(req: TuneRequest):
             raise HTTPException(status_code=400, detail="Unsupported model type.")
 
         grid_search = GridSearchCV(model, req.param_grid, cv=5, scoring="accuracy")
-        grid_search.fit(X_train, y_train)
+        with span("fit"):
+            grid_search.fit(X_train, y_train)
 
         return {
             "best_params": grid_search.best_params_,
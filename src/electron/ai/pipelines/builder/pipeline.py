@@ -0,0 +1,139 @@
+# pipelines/builder/pipeline.py
+
+import importlib
+import json
+
+def load_callable(spec):
+    """Resolve a 'module:function' spec."""
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Expected 'module:function', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+def reads_paths(*names):
+    """Mark arguments of a step function that name files or directories; their contents are part of the cache key."""
+    def mark(fn):
+        fn.path_params = tuple(names)
+        return fn
+    return mark
+
+class Step:
+    def __init__(self, name, fn, inputs=None, params=None, path_params=None):
+        """
+        One node of a pipeline.
+
+        :param name: str - Unique step name.
+        :param fn: callable or 'module:function' - Top-level function (steps may run in worker processes).
+        :param inputs: dict - {argument: upstream step name}; the upstream output is passed as that argument
+                       ('step.key' passes one key of a dict output).
+        :param params: dict - Constant keyword arguments (JSON-serializable, they are part of the cache key).
+        :param path_params: list - Params naming files whose contents are hashed into the cache key, in
+                            addition to those the function marks with reads_paths.
+        """
+        if not name or "." in name:
+            raise ValueError(f"Invalid step name {name!r} (dots select output keys in inputs)")
+        self.name = name
+        self.fn = load_callable(fn) if isinstance(fn, str) else fn
+        self.inputs = dict(inputs or {})
+        self.params = dict(params or {})
+        self.extra_path_params = list(path_params or [])
+        overlap = self.inputs.keys() & self.params.keys()
+        if overlap:
+            raise ValueError(f"Step {name}: arguments given as both inputs and params: {sorted(overlap)}")
+
+    @property
+    def fn_name(self):
+        return f"{self.fn.__module__}:{self.fn.__qualname__}"
+
+    @property
+    def path_params(self):
+        return sorted(set(getattr(self.fn, "path_params", ())) | set(self.extra_path_params))
+
+    def to_dict(self):
+        spec = {"fn": self.fn_name, "inputs": self.inputs, "params": self.params}
+        if self.extra_path_params:
+            spec["path_params"] = self.extra_path_params
+        return spec
+
+class Pipeline:
+    def __init__(self, name="pipeline"):
+        """
+        A DAG of steps wired by name.
+
+        Example (ingest -> preprocess -> AutoML -> evaluate):
+
+            pipeline = Pipeline("churn")
+            pipeline.add("ingest", steps.ingest_csv, path="data/churn.csv")
+            pipeline.add("preprocess", steps.preprocess, inputs={"data": "ingest"}, target_column="churned")
+            pipeline.add("train", steps.train_automl, inputs={"dataset": "preprocess"}, model_type="xgboost")
+            pipeline.add("evaluate", steps.evaluate_automl, inputs={"model_path": "train", "dataset": "preprocess"})
+
+        :param name: str - Pipeline name.
+        """
+        self.name = name
+        self.steps = {}
+
+    def add(self, name, fn, inputs=None, path_params=None, **params):
+        """Add a step and return its name (so it can be used in later inputs)."""
+        if name in self.steps:
+            raise ValueError(f"Duplicate step name: {name}")
+        self.steps[name] = Step(name, fn, inputs, params, path_params)
+        return name
+
+    def dependencies(self, name):
+        return sorted({ref.partition(".")[0] for ref in self.steps[name].inputs.values()})
+
+    def topological_order(self, targets=None):
+        """
+        Steps needed for targets (all steps if None), dependencies first.
+
+        :raise ValueError: On unknown steps or cycles.
+        """
+        order, state = [], {}
+
+        def visit(name, path):
+            if name not in self.steps:
+                raise ValueError(f"Unknown step {name!r}" + (f" (input of {path[-1]!r})" if path else ""))
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dependency in self.dependencies(name):
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in targets or self.steps:
+            visit(name, [])
+        return order
+
+    def sinks(self):
+        """Steps no other step consumes."""
+        consumed = {dependency for name in self.steps for dependency in self.dependencies(name)}
+        return [name for name in self.steps if name not in consumed]
+
+    def to_dict(self):
+        return {"name": self.name, "steps": {name: step.to_dict() for name, step in self.steps.items()}}
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Build a pipeline from a dict:
+
+            {"name": "...", "steps": {"ingest": {"fn": "pipelines.builder.steps:ingest_csv",
+                                                 "params": {"path": "data.csv"}, "path_params": ["path"]},
+                                      "preprocess": {"fn": "...", "inputs": {"data": "ingest"}, "params": {...}}}}
+        """
+        pipeline = cls(spec.get("name", "pipeline"))
+        for name, step in spec["steps"].items():
+            if "fn" not in step:
+                raise ValueError(f"Step {name} has no fn")
+            pipeline.steps[name] = Step(name, step["fn"], step.get("inputs"), step.get("params"), step.get("path_params"))
+        pipeline.topological_order()
+        return pipeline
+
+def load_pipeline(path):
+    """Load a pipeline spec from a JSON file."""
+    with open(path, "r") as f:
+        return Pipeline.from_spec(json.load(f))
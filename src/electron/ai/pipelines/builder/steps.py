@@ -0,0 +1,110 @@
+# pipelines/builder/steps.py
+
+# Pipeline steps over the existing core modules. Steps are top-level functions so they
+# can run in worker processes; the runtime passes `output_dir` to steps that write files.
+# Arguments marked with reads_paths are keyed by the contents of the files they name.
+
+import os
+from .pipeline import load_callable, reads_paths
+
+@reads_paths("path")
+def ingest_csv(path, encoding=None):
+    """
+    Read a CSV into a DataFrame (falling back to ISO-8859-1 like the dataset server).
+
+    :param path: str - CSV file; its contents are part of the cache key.
+    :param encoding: str - Encoding, or None to try UTF-8 first.
+    :return: pd.DataFrame
+    """
+    import pandas as pd
+    try:
+        return pd.read_csv(path, encoding=encoding)
+    except UnicodeDecodeError:
+        if encoding is not None:
+            raise
+        return pd.read_csv(path, encoding="ISO-8859-1")
+
+def preprocess(data, target_column, test_size=0.2, random_state=42):
+    """
+    AutoML preprocessing (mean imputation, standardization) and a train/test split.
+
+    :return: dict - X_train, X_test, y_train, y_test.
+    """
+    from sklearn.model_selection import train_test_split
+    from core.automl.automl import AutoML
+    X, y = AutoML().preprocess_data(data.copy(), target_column)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+
+def train_automl(dataset, output_dir, model_type="random_forest", tuning=False, ensemble=False):
+    """
+    Train an AutoML model on the training split.
+
+    :param dataset: dict - Output of preprocess.
+    :return: str - Path of the saved model.
+    """
+    from core.automl.automl import AutoML
+    automl = AutoML(model_type=model_type, tuning=tuning, ensemble=ensemble,
+                    model_filename=os.path.join(output_dir, "model.pkl"))
+    automl.choose_model()
+    automl.train_model(dataset["X_train"], dataset["y_train"])
+    automl.save_model()
+    return automl.model_filename
+
+def evaluate_automl(model_path, dataset):
+    """
+    Accuracy of a saved AutoML model on the test split.
+
+    :return: dict - {"accuracy": float}.
+    """
+    from core.automl.automl import AutoML
+    automl = AutoML(model_filename=model_path)
+    automl.load_model()
+    return {"accuracy": float(automl.evaluate_model(dataset["X_test"], dataset["y_test"]))}
+
+@reads_paths("checkpoint")
+def quantize(model_factory, quantization_type, output_dir, checkpoint=None, **kwargs):
+    """
+    Quantize a PyTorch model with core.quantization.
+
+    :param model_factory: str - 'module:function' returning a fresh fp32 model.
+    :param quantization_type: str - 'fp16', 'bf16', 'int8', 'int8_static' or 'gguf'.
+    :param checkpoint: str - Weights to load into the model first (e.g. a finetuned checkpoint).
+    :param kwargs: Extra options for the quantizer.
+    :return: str - Path of the quantized model.
+    """
+    from core.quantization.quantize import quantize_model
+    from core.quantization.checkpoint import load_into_model
+    model = load_callable(model_factory)()
+    if checkpoint:
+        load_into_model(model, checkpoint)
+    model_path = os.path.join(output_dir, "model.gguf" if quantization_type == "gguf" else "model")
+    quantize_model(model.eval(), quantization_type, model_path, **kwargs)
+    return model_path
+
+@reads_paths("source_path")
+def convert(source_path, source_format, targets, output_dir, **context):
+    """
+    Convert a checkpoint to other formats with the conversion planner.
+
+    :param source_path: str - Checkpoint file or directory.
+    :param source_format: str - 'torch', 'hf', 'onnx' or 'tf'.
+    :param targets: list - Target formats.
+    :param context: Options for the conversion steps (model_factory, sample_batch, gguf_quant_type).
+    :return: dict - {target: output path}; select one in a later step's inputs with 'step.target'.
+    """
+    from core.conversion.planner import ConversionPlanner
+    planner = ConversionPlanner(cache_dir=os.path.join(output_dir, "cache"))
+    return planner.run(source_format, source_path, targets, output_dir, context)["outputs"]
+
+@reads_paths("gguf_path", "corpus_path")
+def evaluate_perplexity(gguf_path, corpus_path, n_ctx=512):
+    """
+    Perplexity of a GGUF model on a text corpus.
+
+    :return: dict - {"perplexity": float}.
+    """
+    from core.quantization.quantize_gguf import gguf_perplexity
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    return {"perplexity": gguf_perplexity(gguf_path, text, n_ctx)}
@@ -0,0 +1,92 @@
+# pipelines/runtime/cache.py
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+
+META_FILE = "meta.json"
+OUTPUT_FILE = "output.pkl"
+ARTIFACTS_DIR = "artifacts"
+
+def file_digest(path):
+    """sha256 over a file, or over every file (with its relative path) of a directory."""
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(root, f) for root, _, files in os.walk(path) for f in files)
+    else:
+        paths = [path]
+    for file_path in paths:
+        digest.update(os.path.relpath(file_path, path).encode() if file_path != path else b"")
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def function_digest(fn):
+    """Hash of a step function's source, so editing a step invalidates its cached outputs."""
+    try:
+        source = inspect.getsource(fn).encode("utf-8")
+    except (OSError, TypeError):
+        source = getattr(getattr(fn, "__code__", None), "co_code", repr(fn).encode("utf-8"))
+    return hashlib.sha256(source).hexdigest()
+
+def _fingerprint(value):
+    # A path param (or a list/dict of paths) is keyed by the file contents, not just the path
+    if isinstance(value, str):
+        return {"path": value, "sha256": file_digest(value)} if os.path.exists(value) else value
+    if isinstance(value, dict):
+        return {str(k): _fingerprint(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_fingerprint(v) for v in value]
+    return value
+
+def step_key(step, input_digests):
+    """
+    Cache key of a step: its name, function source, parameters (with the files named by
+    its path params hashed) and the content digests of its inputs.
+
+    :param step: Step - The step.
+    :param input_digests: dict - {argument: (reference, digest of the upstream output or of the selected key)}.
+    :return: str - Hex key.
+    """
+    path_params = step.path_params
+    params = {name: _fingerprint(value) if name in path_params else value for name, value in step.params.items()}
+    parts = [step.name, step.fn_name, function_digest(step.fn), params,
+             sorted((arg, ref, digest) for arg, (ref, digest) in input_digests.items())]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=repr).encode()).hexdigest()[:24]
+
+class StepCache:
+    def __init__(self, cache_dir):
+        """
+        Step outputs on disk, one directory per cache key:
+
+            <cache_dir>/<key>/output.pkl   pickled return value
+            <cache_dir>/<key>/artifacts/   files the step wrote (its output_dir)
+            <cache_dir>/<key>/meta.json    timing, memory and output digest; written last
+
+        A directory without meta.json is an interrupted run and is never reused.
+
+        :param cache_dir: str - Root directory of the cache.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def step_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def output_path(self, key):
+        return os.path.join(self.step_dir(key), OUTPUT_FILE)
+
+    def lookup(self, key):
+        """Metadata of a completed step, or None."""
+        meta_path = os.path.join(self.step_dir(key), META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r") as f:
+            return json.load(f)
+
+    def load(self, key):
+        with open(self.output_path(key), "rb") as f:
+            return pickle.load(f)
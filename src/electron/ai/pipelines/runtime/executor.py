@@ -0,0 +1,235 @@
+# pipelines/runtime/executor.py
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from core.tracking.resources import current_rss_bytes, peak_rss_bytes
+from ..builder.pipeline import load_pipeline
+from .cache import StepCache, step_key, META_FILE, OUTPUT_FILE, ARTIFACTS_DIR
+
+def _split_ref(ref):
+    """'train' -> ('train', None); 'convert.gguf' -> ('convert', 'gguf') to pick one key of a dict output."""
+    name, _, field = ref.partition(".")
+    return name, field or None
+
+class _MemoryWatcher:
+    def __init__(self, interval=0.01):
+        """Peak RSS while a step runs: sampled by a thread, or exact when the process peak grew."""
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.start_rss = current_rss_bytes()
+        self.start_peak = peak_rss_bytes()
+        self.peak = self.start_rss
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end_rss = current_rss_bytes()
+        end_peak = peak_rss_bytes()
+        self.peak = max(self.peak, self.end_rss, end_peak if end_peak > self.start_peak else 0)
+
+def _execute_step(name, key, fn, params, input_refs, step_dir):
+    """
+    Run one step (in a worker process or inline) and store its output in step_dir.
+
+    :param input_refs: dict - {argument: (path of the upstream output.pkl, field or None)}.
+    :return: dict - The step's metadata.
+    """
+    if os.path.exists(step_dir):
+        shutil.rmtree(step_dir)
+    artifacts = os.path.join(step_dir, ARTIFACTS_DIR)
+    os.makedirs(artifacts)
+
+    kwargs = dict(params)
+    for arg, (path, field) in input_refs.items():
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+        kwargs[arg] = value[field] if field is not None else value
+    if "output_dir" in inspect.signature(fn).parameters:
+        kwargs["output_dir"] = artifacts
+
+    with _MemoryWatcher() as memory:
+        start = time.perf_counter()
+        output = fn(**kwargs)
+        seconds = time.perf_counter() - start
+
+    payload = pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(step_dir, OUTPUT_FILE), "wb") as f:
+        f.write(payload)
+    if isinstance(output, dict):
+        # Consumers of 'step.key' are keyed by that value only, not by the whole output
+        field_digests = {str(k): hashlib.sha256(pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+                         for k, v in output.items()}
+    else:
+        field_digests = None
+    meta = {
+        "step": name,
+        "key": key,
+        "seconds": seconds,
+        "peak_rss_bytes": memory.peak,
+        "rss_delta_bytes": memory.end_rss - memory.start_rss,
+        "output_bytes": len(payload),
+        "output_digest": hashlib.sha256(payload).hexdigest(),
+        "field_digests": field_digests,
+        "pid": os.getpid(),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    # meta.json marks the step as complete, so it is written last and atomically
+    meta_path = os.path.join(step_dir, META_FILE)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    return meta
+
+class PipelineRunner:
+    def __init__(self, cache_dir="pipeline_cache", max_workers=None, use_cache=True):
+        """
+        Execute pipelines with a content-addressed step cache.
+
+        Steps run as soon as their inputs are ready, independent branches in parallel in a
+        process pool. Every step is keyed by its function source, parameters and the
+        content digest of its inputs; a step whose key already has an output in the cache
+        is skipped, and so are its dependents unless something else they read changed.
+        Step outputs move between processes through the cache, not through the parent.
+
+        :param cache_dir: str - Step outputs, artifacts and run reports.
+        :param max_workers: int - Process pool size (None = CPU count, 1 = run steps inline).
+        :param use_cache: bool - Set False to rerun every step (outputs are still stored).
+        """
+        self.cache = StepCache(cache_dir)
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+
+    def run(self, pipeline, targets=None):
+        """
+        Run the steps needed for targets.
+
+        :param pipeline: Pipeline - The DAG.
+        :param targets: list - Steps whose outputs are wanted (default: the pipeline's sinks).
+        :return: dict - Target outputs, per-step records (timing, memory, cached flag) and the report path.
+            The run report is also written when a step fails.
+        """
+        targets = list(targets or pipeline.sinks())
+        order = pipeline.topological_order(targets)
+        keys, records = {}, {}
+        pending = list(order)
+        running = {}
+        started_at = datetime.now().isoformat(timespec="seconds")
+        started = time.perf_counter()
+
+        def finish(name, meta, cached):
+            keys[name] = meta["key"]
+            records[name] = dict(meta, cached=cached)
+
+        def input_digest(upstream, field):
+            meta = records[upstream]
+            if field is not None and meta.get("field_digests") and field in meta["field_digests"]:
+                return meta["field_digests"][field]
+            return meta["output_digest"]
+
+        pool = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers != 1 else None
+        error = "interrupted"
+        try:
+            while pending or running:
+                for name in [n for n in pending if all(d in records for d in pipeline.dependencies(n))]:
+                    pending.remove(name)
+                    step = pipeline.steps[name]
+                    refs = {arg: _split_ref(ref) for arg, ref in step.inputs.items()}
+                    key = step_key(step, {arg: (ref, input_digest(*refs[arg])) for arg, ref in step.inputs.items()})
+                    meta = self.cache.lookup(key) if self.use_cache else None
+                    if meta is not None:
+                        finish(name, meta, cached=True)
+                        continue
+                    args = (name, key, step.fn, step.params,
+                            {arg: (self.cache.output_path(keys[upstream]), field) for arg, (upstream, field) in refs.items()},
+                            self.cache.step_dir(key))
+                    if pool is None:
+                        finish(name, self._result(name, _execute_step, *args), cached=False)
+                    else:
+                        running[pool.submit(_execute_step, *args)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    finish(name, self._result(name, future.result), cached=False)
+            error = None
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            report = {
+                "pipeline": pipeline.name,
+                "started_at": started_at,
+                "wall_seconds": time.perf_counter() - started,
+                "status": "failed" if error else "ok",
+                "steps": [records[name] for name in order if name in records],
+            }
+            if error:
+                report["error"] = error
+            report_path = self._save_report(report)
+        return {
+            "outputs": {name: self.cache.load(keys[name]) for name in targets},
+            "steps": report["steps"],
+            "report_path": report_path,
+        }
+
+    @staticmethod
+    def _result(name, fn, *args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            raise RuntimeError(f"Pipeline step {name!r} failed: {e}") from e
+
+    def _save_report(self, report):
+        runs_dir = os.path.join(self.cache.cache_dir, "runs")
+        os.makedirs(runs_dir, exist_ok=True)
+        path = os.path.join(runs_dir, f"{report['pipeline']}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+def format_report(steps):
+    """Render per-step records as a plain-text table."""
+    columns = ("step", "cached", "seconds", "peak_rss_mb", "output_kb")
+    rows = [columns]
+    for record in steps:
+        rows.append((record["step"], "yes" if record["cached"] else "no", f"{record['seconds']:.3f}",
+                     f"{record['peak_rss_bytes'] / 2**20:.1f}", f"{record['output_bytes'] / 1024:.1f}"))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a pipeline spec (from the ai directory: python -m pipelines.runtime.executor).")
+    parser.add_argument("spec", help="Pipeline JSON spec")
+    parser.add_argument("--targets", help="Comma-separated steps to produce (default: all sinks)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default="pipeline_cache")
+    parser.add_argument("--no-cache", action="store_true", help="Rerun every step")
+    args = parser.parse_args()
+
+    runner = PipelineRunner(args.cache_dir, args.workers, use_cache=not args.no_cache)
+    result = runner.run(load_pipeline(args.spec), args.targets.split(",") if args.targets else None)
+    print(format_report(result["steps"]))
+    print(f"Report written to {result['report_path']}")
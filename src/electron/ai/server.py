@@ -1,54 +1,128 @@
 from flask import Flask, request, jsonify
-from llama_cpp import Llama
+from llama_cpp import Llama, LlamaRAMCache
 from huggingface_hub import HfApi
+from core.prompts.templates import registry as prompt_templates
+from core.deployment.adapters import AdapterManager
+from core.tracking.experiment_tracker import ExperimentTracker
+from core.tracking.index import ExperimentIndex, downsample
+from core.monitoring.metrics import REGISTRY, CONTENT_TYPE, instrument_flask, register_process_metrics
+from core.monitoring.tracing import TRACER, PROFILER, span, trace_flask, tracing_active
 import os
 import json
+import time
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
 
 app = Flask(__name__)
 
 MODEL_FOLDER = "models"
 CONFIG_PATH = "config/settings.json"
-MODEL_STATE = {"llm": None, "model_name": None}
+TEMPLATE_FOLDER = "config/prompt_templates"
+ADAPTER_FOLDER = "adapters"
+EXPERIMENT_FOLDER = "experiments"
+MAX_OPEN_TRACKERS = 32
+MODEL_STATE = {"llm": None, "model_name": None, "adapters": None}
 api = HfApi()
-experiment_trackers = {}
-
-# Simple ExperimentTracker class
-class ExperimentTracker:
-    def __init__(self, experiment_name):
-        self.name = experiment_name
-        self.metrics = {}
-        self.parameters = {}
-
-    def log_metric(self, name, value):
-        self.metrics[name] = value
-
-    def log_parameters(self, params):
-        self.parameters.update(params)
-
-    def get_experiment_info(self):
-        return {
-            "experiment_name": self.name,
-            "metrics": self.metrics,
-            "parameters": self.parameters
-        }
+experiment_trackers = OrderedDict()
+experiment_trackers_lock = threading.Lock()
+prompt_templates.load_dir(TEMPLATE_FOLDER)
+
+experiment_index = ExperimentIndex(os.path.join(EXPERIMENT_FOLDER, "index.sqlite"))
+experiment_index.rebuild(EXPERIMENT_FOLDER)
+
+register_process_metrics()
+instrument_flask(app, "server")
+trace_flask(app)
+MODEL_LOAD_SECONDS = REGISTRY.histogram("model_load_seconds", "Time to load a model in seconds.", ("model",))
+PROMPT_TOKENS = REGISTRY.counter("prompt_tokens_total", "Prompt tokens evaluated by /generate.", ("model",))
+GENERATED_TOKENS = REGISTRY.counter("generated_tokens_total", "Tokens generated by /generate.", ("model",))
+GENERATE_QUEUE_DEPTH = REGISTRY.gauge("generate_queue_depth", "Requests waiting for the model.")
+REGISTRY.gauge("model_loaded", "Whether a model is running.").set_function(lambda: MODEL_STATE["llm"] is not None)
+
+
+def get_tracker(experiment_name, create=False):
+    """
+    Open tracker for an experiment, reopening it from disk if needed; None if it doesn't exist (and not create).
+
+    At most MAX_OPEN_TRACKERS stay open; opening another closes (and flushes) the least recently used.
+    """
+    if not experiment_name or os.path.basename(experiment_name) != experiment_name:
+        return None
+    with experiment_trackers_lock:
+        tracker = experiment_trackers.get(experiment_name)
+        if tracker is not None:
+            experiment_trackers.move_to_end(experiment_name)
+            return tracker
+        if not create and not os.path.isdir(os.path.join(EXPERIMENT_FOLDER, experiment_name)):
+            return None
+        tracker = experiment_trackers[experiment_name] = ExperimentTracker(experiment_name, EXPERIMENT_FOLDER)
+        while len(experiment_trackers) > MAX_OPEN_TRACKERS:
+            experiment_trackers.popitem(last=False)[1].close()
+    return tracker
+
+
+def int_arg(name, default):
+    """Integer query argument; ValueError with the argument's name if it is not one."""
+    value = request.args.get(name, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
 
 
 def list_gguf_models():
     return [f for f in os.listdir(MODEL_FOLDER) if f.endswith(".gguf")]
 
 
+def list_adapters():
+    if not os.path.isdir(ADAPTER_FOLDER):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(ADAPTER_FOLDER) if f.endswith(".gguf"))
+
+
 def load_model(model_name):
     model_path = os.path.join(MODEL_FOLDER, model_name)
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model not found: {model_name}")
 
-    return Llama(
+    llm = Llama(
         model_path=model_path,
         n_ctx=2048,
         n_threads=8,
         use_mlock=True,
         verbose=True
     )
+    # Reuse KV state for prompts sharing a prefix (e.g. the same template)
+    llm.set_cache(LlamaRAMCache())
+    return llm
+
+
+def complete(llm, prompt, max_tokens):
+    """
+    Run a completion and return (text, prompt tokens, completion tokens).
+
+    When the request is traced the completion is streamed, so the time until the first
+    chunk (prompt evaluation) is recorded separately from the decoding of the rest; each
+    streamed chunk is one generated token.
+    """
+    with span("tokenize"):
+        tokens = llm.tokenize(prompt.encode("utf-8"), special=True)
+    if not tracing_active():
+        output = llm(tokens, max_tokens=max_tokens, stop=["</s>"])
+        usage = output["usage"]
+        return output["choices"][0]["text"], usage["prompt_tokens"], usage["completion_tokens"]
+
+    chunks = llm(tokens, max_tokens=max_tokens, stop=["</s>"], stream=True)
+    with span("prompt_eval"):
+        first = next(chunks, None)
+    if first is None:
+        return "", len(tokens), 0
+    pieces = [first["choices"][0]["text"]]
+    with span("decode"):
+        for chunk in chunks:
+            pieces.append(chunk["choices"][0]["text"])
+    return "".join(pieces), len(tokens), len(pieces)
 
 
 @app.route("/get-models", methods=["GET"])
@@ -78,8 +152,11 @@ def start_model():
         if MODEL_STATE["llm"]:
             return jsonify({"error": "Model already running. Stop first."}), 400
 
+        start = time.perf_counter()
         MODEL_STATE["llm"] = load_model(model_name)
+        MODEL_LOAD_SECONDS.labels(model_name).observe(time.perf_counter() - start)
         MODEL_STATE["model_name"] = model_name
+        MODEL_STATE["adapters"] = AdapterManager(MODEL_STATE["llm"], ADAPTER_FOLDER)
         return jsonify({"message": f"{model_name} started successfully."})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -88,6 +165,8 @@ def start_model():
 @app.route("/stop", methods=["POST"])
 def stop_model():
     if MODEL_STATE["llm"]:
+        MODEL_STATE["adapters"].close()
+        MODEL_STATE["adapters"] = None
         MODEL_STATE["llm"] = None
         MODEL_STATE["model_name"] = None
         return jsonify({"message": "Model stopped."})
@@ -115,22 +194,74 @@ def generate():
         data = request.get_json()
         prompt = data.get("prompt", "")
         max_tokens = int(data.get("max_tokens", 100))
+        template_name = data.get("template")
+        adapter = data.get("adapter")
+        adapter_scale = float(data.get("adapter_scale", 1.0))
+
+        if template_name:
+            llm = MODEL_STATE["llm"]
+            try:
+                with span("template"):
+                    prompt, _, max_tokens = prompt_templates.budget_max_tokens(
+                        template_name,
+                        MODEL_STATE["model_name"],
+                        lambda text: llm.tokenize(text.encode("utf-8"), add_bos=True),
+                        lambda text: llm.tokenize(text.encode("utf-8"), add_bos=False),
+                        llm.n_ctx(),
+                        max_tokens,
+                        data.get("variables", {})
+                    )
+            except KeyError as e:
+                # Raised by the template for variables the request did not provide; the message names them
+                return jsonify({"error": e.args[0] if e.args else "Missing template variable"}), 400
+            except (TypeError, ValueError) as e:
+                # Unknown template, prompt over the context window, or variables that are not an object
+                return jsonify({"error": str(e)}), 400
 
         if not prompt:
             return jsonify({"error": "Prompt is required"}), 400
 
-        output = MODEL_STATE["llm"](prompt, max_tokens=max_tokens, stop=["</s>"])
-        generated = output["choices"][0]["text"].strip()
-
-        return jsonify({
-            "prompt": prompt,
-            "response": generated
-        })
+        # Generation is serialized on the model; requests waiting for it are the queue
+        with ExitStack() as stack:
+            GENERATE_QUEUE_DEPTH.inc()
+            try:
+                # Waiting for the model plus switching adapters
+                with span("acquire_model"):
+                    llm = stack.enter_context(MODEL_STATE["adapters"].use(adapter, adapter_scale))
+            finally:
+                GENERATE_QUEUE_DEPTH.dec()
+            text, prompt_tokens, completion_tokens = complete(llm, prompt, max_tokens)
+        generated = text.strip()
+        PROMPT_TOKENS.labels(MODEL_STATE["model_name"]).inc(prompt_tokens)
+        GENERATED_TOKENS.labels(MODEL_STATE["model_name"]).inc(completion_tokens)
+
+        with span("serialize"):
+            return jsonify({
+                "prompt": prompt,
+                "adapter": adapter,
+                "response": generated
+            })
+
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/adapters", methods=["GET"])
+def adapters():
+    manager = MODEL_STATE["adapters"]
+    if not manager:
+        return jsonify({"available": list_adapters(), "loaded": [], "active": None})
+    return jsonify({"available": list_adapters(), "loaded": manager.loaded(), "active": manager.active})
+
+
+@app.route("/templates", methods=["GET"])
+def templates():
+    return jsonify({"templates": prompt_templates.names()})
+
+
 @app.route("/settings", methods=["GET", "POST"])
 def settings():
     if request.method == "POST":
@@ -150,6 +281,59 @@ def health():
     return jsonify({"status": "ok"}), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return REGISTRY.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+
+@app.route("/debug/tracing", methods=["GET", "POST"])
+def debug_tracing():
+    """
+    GET: tracing state and the most recent slow traces (?limit=n).
+    POST {"enabled": bool, "slow_ms": number}: turn tracing on/off and set the slow threshold.
+    """
+    if request.method == "POST":
+        data = request.get_json() or {}
+        slow_ms = data.get("slow_ms")
+        try:
+            TRACER.configure(data.get("enabled"), float(slow_ms) / 1000 if slow_ms is not None else None)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+    try:
+        limit = int_arg("limit", 20)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(dict(TRACER.state(), traces=TRACER.recent(limit))), 200
+
+
+@app.route("/debug/profiler/start", methods=["POST"])
+def profiler_start():
+    data = request.get_json(silent=True) or {}
+    interval_ms = data.get("interval_ms")
+    try:
+        PROFILER.start(float(interval_ms) / 1000 if interval_ms is not None else None)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 409 if PROFILER.running else 400
+    return jsonify({"message": "Profiler started.", "interval_ms": PROFILER.interval * 1000}), 200
+
+
+@app.route("/debug/profiler/stop", methods=["POST"])
+def profiler_stop():
+    """Stop the profiler and return collapsed stacks (feed to flamegraph.pl or speedscope)."""
+    try:
+        collapsed = PROFILER.stop()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    return collapsed, 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+
+@app.route("/debug/profiler", methods=["GET"])
+def profiler_snapshot():
+    """Collapsed stacks sampled so far, without stopping the profiler."""
+    return PROFILER.collapsed(), 200, {"Content-Type": "text/plain; charset=utf-8",
+                                       "X-Profiler-Samples": str(PROFILER.samples)}
+
+
 @app.route('/start_experiment', methods=['POST'])
 def start_experiment():
     data = request.get_json()
@@ -157,55 +341,111 @@ def start_experiment():
         return jsonify({"error": "experiment_name is required"}), 400
 
     experiment_name = data['experiment_name']
-    tracker = ExperimentTracker(experiment_name)
-    experiment_trackers[experiment_name] = tracker
+    if not experiment_name or os.path.basename(experiment_name) != experiment_name:
+        return jsonify({"error": "Invalid experiment_name"}), 400
+    tracker = get_tracker(experiment_name, create=True)
+    experiment_index.upsert_experiment(tracker.get_experiment_info())
     return jsonify({"message": f"Experiment '{experiment_name}' started successfully!"}), 200
 
 
 @app.route('/log_metrics', methods=['POST'])
 def log_metrics():
+    """
+    Log metrics, either {"metrics": {name: value}, "step": n} for one step or
+    {"points": [{"step": n, "metrics": {name: value}}, ...]} for many steps at once.
+    """
     data = request.get_json()
-    experiment_name = data.get('experiment_name')
-    if not experiment_name or experiment_name not in experiment_trackers:
+    tracker = get_tracker(data.get('experiment_name'))
+    if tracker is None:
         return jsonify({"error": "Experiment not found"}), 404
 
-    metrics = data.get('metrics', {})
-    if not metrics:
+    points = data.get('points') or [{"step": data.get('step'), "metrics": data.get('metrics', {})}]
+    if not any(point.get('metrics') for point in points):
         return jsonify({"error": "No metrics provided"}), 400
 
-    tracker = experiment_trackers[experiment_name]
-    for metric_name, value in metrics.items():
-        tracker.log_metric(metric_name, value)
+    latest = {}
+    for point in points:
+        step = point.get('step')
+        for metric_name, value in point.get('metrics', {}).items():
+            latest[metric_name] = (value, tracker.log_metric(metric_name, value, step))
+    experiment_index.update_metrics(tracker.experiment_name, latest)
 
-    return jsonify({"message": "Metrics logged successfully!"}), 200
+    return jsonify({"message": "Metrics logged successfully!", "points": sum(len(p.get('metrics', {})) for p in points)}), 200
 
 
 @app.route('/log_parameters', methods=['POST'])
 def log_parameters():
     data = request.get_json()
-    experiment_name = data.get('experiment_name')
-    if not experiment_name or experiment_name not in experiment_trackers:
+    tracker = get_tracker(data.get('experiment_name'))
+    if tracker is None:
         return jsonify({"error": "Experiment not found"}), 404
 
     parameters = data.get('parameters', {})
     if not parameters:
         return jsonify({"error": "No parameters provided"}), 400
 
-    tracker = experiment_trackers[experiment_name]
     tracker.log_parameters(parameters)
+    experiment_index.set_parameters(tracker.experiment_name, parameters)
 
     return jsonify({"message": "Parameters logged successfully!"}), 200
 
 
 @app.route('/get_experiment_info', methods=['GET'])
 def get_experiment_info():
-    experiment_name = request.args.get('experiment_name')
-    if not experiment_name or experiment_name not in experiment_trackers:
+    tracker = get_tracker(request.args.get('experiment_name'))
+    if tracker is None:
         return jsonify({"error": "Experiment not found"}), 404
 
-    tracker = experiment_trackers[experiment_name]
     return jsonify(tracker.get_experiment_info()), 200
 
 
+@app.route('/experiments', methods=['GET'])
+def list_experiments():
+    """
+    List experiments. Query args: param.<key>=<value> (or param.<key>__gt/gte/lt/lte=<number>)
+    filters, order_by=<metric>, desc=1, limit, offset.
+    """
+    filters = {key[len("param."):]: value for key, value in request.args.items() if key.startswith("param.")}
+    try:
+        names = experiment_index.list_experiments(
+            filters,
+            order_by=request.args.get('order_by'),
+            descending=request.args.get('desc') == '1',
+            limit=int_arg('limit', 100),
+            offset=int_arg('offset', 0))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"experiments": names}), 200
+
+
+@app.route('/experiments/compare', methods=['GET'])
+def compare_experiments():
+    names = [n for n in request.args.get('names', '').split(',') if n]
+    if not names:
+        return jsonify({"error": "names is required"}), 400
+    metrics = [m for m in request.args.get('metrics', '').split(',') if m] or None
+    result = experiment_index.compare(names, metrics)
+    unknown = [n for n in names if n not in result]
+    if unknown:
+        return jsonify({"error": "Experiment not found", "experiments": unknown}), 404
+    return jsonify(result), 200
+
+
+@app.route('/experiments/<experiment_name>/series', methods=['GET'])
+def metric_series(experiment_name):
+    tracker = get_tracker(experiment_name)
+    if tracker is None:
+        return jsonify({"error": "Experiment not found"}), 404
+    metric = request.args.get('metric')
+    if not metric:
+        return jsonify({"error": "metric is required"}), 400
+    try:
+        max_points = int_arg('max_points', 500)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    points = downsample(tracker.history(metric), max_points)
+    return jsonify({"experiment_name": experiment_name, "metric": metric, "points": points}), 200
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
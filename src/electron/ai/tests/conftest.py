@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Tests import modules the way the servers do (core..., pipelines..., benchmarks...), from the ai directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
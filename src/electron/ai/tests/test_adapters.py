@@ -0,0 +1,95 @@
+# tests/test_adapters.py
+
+import importlib
+import sys
+import types
+import pytest
+
+class FakeLlama:
+    def __init__(self):
+        self.model = object()
+        self.ctx = object()
+        self.cache = "base-cache"
+        self.resets = 0
+
+    def reset(self):
+        self.resets += 1
+
+    def set_cache(self, cache):
+        self.cache = cache
+
+@pytest.fixture
+def adapters(monkeypatch):
+    # Minimal stand-in for the llama_cpp LoRA bindings AdapterManager resolves at import
+    fake = types.ModuleType("llama_cpp")
+    fake.attached = []
+    fake.freed = []
+    fake.set_result = 0
+    fake.llama_adapter_lora_init = lambda model, path: path
+    fake.llama_adapter_lora_free = fake.freed.append
+    fake.llama_set_adapter_lora = lambda ctx, adapter, scale: fake.attached.append((adapter, scale)) or fake.set_result
+    fake.llama_clear_adapter_lora = lambda ctx: fake.attached.clear()
+    fake.LlamaRAMCache = lambda capacity_bytes: object()
+    monkeypatch.setitem(sys.modules, "llama_cpp", fake)
+    sys.modules.pop("core.deployment.adapters", None)
+    module = importlib.import_module("core.deployment.adapters")
+    yield module, fake
+    sys.modules.pop("core.deployment.adapters", None)
+
+@pytest.fixture
+def manager(adapters, tmp_path):
+    module, _ = adapters
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.gguf").write_bytes(b"")
+    return module.AdapterManager(FakeLlama(), adapter_dir=str(tmp_path), max_loaded=2)
+
+def test_switch_attaches_one_adapter_with_its_own_cache(adapters, manager):
+    _, fake = adapters
+    with manager.use("a", 0.5) as llm:
+        assert manager.active == "a" and manager.active_scale == 0.5
+        assert len(fake.attached) == 1 and fake.attached[0][1] == 0.5
+        cache_a = llm.cache
+    with manager.use("b"):
+        assert manager.active == "b"
+        assert len(fake.attached) == 1
+    with manager.use(None) as llm:
+        assert manager.active is None and fake.attached == []
+        assert llm.cache == "base-cache"
+    with manager.use("a", 0.5) as llm:
+        assert llm.cache is cache_a
+
+def test_missing_adapter_keeps_current_state(manager, adapters):
+    _, fake = adapters
+    with manager.use("a"):
+        pass
+    with pytest.raises(FileNotFoundError):
+        with manager.use("missing"):
+            pass
+    assert manager.active == "a" and len(fake.attached) == 1
+
+def test_failed_attach_leaves_base_model_state(manager, adapters):
+    _, fake = adapters
+    with manager.use("a"):
+        pass
+    fake.set_result = -1
+    with pytest.raises(RuntimeError):
+        with manager.use("b"):
+            pass
+    assert manager.active is None and manager.active_scale is None
+    assert manager.llm.cache == "base-cache"
+    fake.set_result = 0
+    with manager.use("a"):
+        assert manager.active == "a" and len(fake.attached) == 1
+
+def test_lru_eviction_detaches_active_adapter(manager, adapters):
+    _, fake = adapters
+    with manager.use("a"):
+        pass
+    with manager.use("b"):
+        pass
+    with manager.use("c"):
+        pass
+    assert manager.loaded() == ["b", "c"]
+    assert len(fake.freed) == 1 and fake.freed[0].endswith(b"a.gguf")
+    manager.close()
+    assert manager.loaded() == [] and manager.active is None and fake.attached == []
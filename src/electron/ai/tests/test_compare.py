@@ -0,0 +1,52 @@
+# tests/test_compare.py
+
+from benchmarks.compare import compare_results, direction, flatten, format_comparison
+
+def results(**benchmarks):
+    return {"benchmarks": benchmarks}
+
+def statuses(rows):
+    return {(row["benchmark"], row["metric"]): row["status"] for row in rows}
+
+def test_direction_and_flatten():
+    assert direction("gen.tokens_per_sec") == 1
+    assert direction("gen.latency_ms_p50") == -1
+    assert direction("gen.n_items") == 0
+    assert flatten({"a": {"b": 1, "c": "x", "d": True}, "e": 2.5}) == {"a.b": 1.0, "e": 2.5}
+
+def test_threshold_and_direction():
+    base = results(gen={"params": {}, "metrics": {"tokens_per_sec": 100, "load_seconds": 1.0, "n": 5}})
+    cur = results(gen={"params": {}, "metrics": {"tokens_per_sec": 80, "load_seconds": 0.5, "n": 9}})
+    rows = compare_results(base, cur, threshold=0.1)
+    assert statuses(rows) == {("gen", "tokens_per_sec"): "regressed", ("gen", "load_seconds"): "improved",
+                              ("gen", "n"): "info"}
+    assert rows[0]["status"] == "regressed"
+    assert abs(rows[0]["change"] + 0.2) < 1e-9
+
+def test_small_change_is_unchanged():
+    base = results(gen={"metrics": {"tokens_per_sec": 100}})
+    cur = results(gen={"metrics": {"tokens_per_sec": 95}})
+    assert statuses(compare_results(base, cur)) == {("gen", "tokens_per_sec"): "unchanged"}
+
+def test_zero_baseline_does_not_hide_regression():
+    base = results(q={"metrics": {"max_abs_diff": 0.0, "error_bytes": 0, "recall": 0}})
+    cur = results(q={"metrics": {"max_abs_diff": 0.5, "error_bytes": 0, "recall": 0.3}})
+    rows = compare_results(base, cur)
+    assert statuses(rows) == {("q", "max_abs_diff"): "regressed", ("q", "error_bytes"): "unchanged",
+                              ("q", "recall"): "improved"}
+    assert rows[0]["change"] is None
+
+def test_failed_skipped_absent_and_dropped_metrics_are_missing():
+    base = results(a={"metrics": {"seconds": 1}}, b={"metrics": {"seconds": 1}}, c={"metrics": {"seconds": 1}},
+                   d={"metrics": {"seconds": 1, "bytes": 10}}, e={"skipped": "no model"})
+    cur = results(a={"error": "RuntimeError: boom"}, b={"skipped": "no gguf"},
+                  d={"metrics": {"seconds": 1}}, e={"metrics": {"seconds": 1}}, new={"metrics": {"seconds": 1}})
+    rows = compare_results(base, cur)
+    assert statuses(rows) == {("a", "error"): "missing", ("b", "skipped"): "missing", ("c", "absent"): "missing",
+                              ("d", "bytes"): "missing", ("d", "seconds"): "unchanged"}
+    assert "missing" in format_comparison(rows)
+
+def test_changed_params_are_incomparable():
+    base = results(a={"params": {"n": 1}, "metrics": {"seconds": 1}})
+    cur = results(a={"params": {"n": 2}, "metrics": {"seconds": 5}})
+    assert statuses(compare_results(base, cur)) == {("a", "params"): "incomparable"}
@@ -0,0 +1,36 @@
+# tests/test_conversion_cache.py
+
+import os
+import pytest
+
+pytest.importorskip("torch")
+from core.conversion.signature import cached_conversion
+
+def write_with_sidecar(calls):
+    def convert(path):
+        calls.append(path)
+        with open(path, "w") as f:
+            f.write("graph")
+        with open(os.path.join(os.path.dirname(path), "weights.bin"), "w") as f:
+            f.write("external data")
+    return convert
+
+def test_cache_hit_restores_sidecar_files(tmp_path):
+    calls = []
+    first = tmp_path / "first" / "model.onnx"
+    assert cached_conversion(str(tmp_path / "cache"), "key", str(first), write_with_sidecar(calls)) is False
+    assert first.read_text() == "graph" and (first.parent / "weights.bin").exists()
+
+    second = tmp_path / "second" / "model.onnx"
+    assert cached_conversion(str(tmp_path / "cache"), "key", str(second), write_with_sidecar(calls)) is True
+    assert len(calls) == 1
+    assert second.read_text() == "graph"
+    assert (second.parent / "weights.bin").read_text() == "external data"
+
+def test_failed_conversion_is_not_cached(tmp_path):
+    def fail(path):
+        raise RuntimeError("export failed")
+
+    with pytest.raises(RuntimeError):
+        cached_conversion(str(tmp_path / "cache"), "key", str(tmp_path / "out" / "model.onnx"), fail)
+    assert os.listdir(tmp_path / "cache") == []
@@ -0,0 +1,52 @@
+# tests/test_embedding_cache.py
+
+import numpy as np
+from core.prompts.embeddings import EmbeddingCache, content_hash
+
+DIM = 4
+
+def vectors(*values):
+    return np.array([[v] * DIM for v in values], dtype=np.float32)
+
+def test_rows_follow_vectors_and_skip_duplicates(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), DIM)
+    cache.add(["a", "b"], vectors(1, 2))
+    cache.add(["b", "c", "c"], vectors(20, 3, 30))
+    assert cache.rows == {"a": 0, "b": 1, "c": 2}
+    np.testing.assert_array_equal(cache.get(["c", "a", "b"]), vectors(3, 1, 2))
+
+def test_reopen_reads_same_rows(tmp_path):
+    EmbeddingCache(str(tmp_path), DIM).add([content_hash("x"), content_hash("y")], vectors(5, 6))
+    cache = EmbeddingCache(str(tmp_path), DIM)
+    np.testing.assert_array_equal(cache.get([content_hash("y")]), vectors(6))
+
+def test_two_writers_share_one_directory(tmp_path):
+    first = EmbeddingCache(str(tmp_path), DIM)
+    second = EmbeddingCache(str(tmp_path), DIM)
+    first.add(["a"], vectors(1))
+    second.add(["b"], vectors(2))
+    first.add(["c", "b"], vectors(3, 99))
+    assert first.rows == second.rows | {"c": 2}
+    np.testing.assert_array_equal(first.get(["a", "b", "c"]), vectors(1, 2, 3))
+    np.testing.assert_array_equal(EmbeddingCache(str(tmp_path), DIM).get(["b", "c"]), vectors(2, 3))
+
+def test_vectors_ahead_of_index_are_truncated(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), DIM)
+    cache.add(["a"], vectors(1))
+    # Simulate a crash after the vector append but before the index append
+    with open(cache.vectors_path, "ab") as f:
+        f.write(vectors(7).astype(np.float16).tobytes())
+    cache = EmbeddingCache(str(tmp_path), DIM)
+    cache.add(["b"], vectors(2))
+    assert cache.rows == {"a": 0, "b": 1}
+    np.testing.assert_array_equal(cache.get(["a", "b"]), vectors(1, 2))
+
+def test_index_ahead_of_vectors_is_truncated(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), DIM)
+    cache.add(["a"], vectors(1))
+    with open(cache.index_path, "a") as f:
+        f.write("orphan\n")
+    cache = EmbeddingCache(str(tmp_path), DIM)
+    assert cache.rows == {"a": 0}
+    cache.add(["b"], vectors(2))
+    np.testing.assert_array_equal(cache.get(["b"]), vectors(2))
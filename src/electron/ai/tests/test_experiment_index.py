@@ -0,0 +1,33 @@
+# tests/test_experiment_index.py
+
+import pytest
+from core.tracking.index import ExperimentIndex
+
+@pytest.fixture
+def index(tmp_path):
+    index = ExperimentIndex(str(tmp_path / "index.sqlite"))
+    runs = {
+        "lora": {"lora": True, "lr": 0.001, "optimizer": "adamw", "scheduler": None},
+        "full": {"lora": False, "lr": 0.0001, "optimizer": "adamw", "scheduler": "cosine"},
+    }
+    for date, (name, params) in enumerate(runs.items()):
+        index.upsert_experiment({"experiment_name": name, "date": str(date), "parameters": params,
+                                 "metrics": {}})
+    yield index
+    index.close()
+
+def test_bool_and_null_filters_from_query_strings(index):
+    assert index.list_experiments({"lora": "true"}) == ["lora"]
+    assert index.list_experiments({"lora": "false"}) == ["full"]
+    assert index.list_experiments({"lora": True}) == ["lora"]
+    assert index.list_experiments({"scheduler": "null"}) == ["lora"]
+
+def test_numeric_and_text_filters(index):
+    assert index.list_experiments({"lr__gt": "0.0005"}) == ["lora"]
+    assert index.list_experiments({"lr": "0.0001"}) == ["full"]
+    assert index.list_experiments({"optimizer": "adamw"}) == ["full", "lora"]
+    with pytest.raises(ValueError):
+        index.list_experiments({"optimizer__gt": "adamw"})
+
+def test_compare_leaves_out_unknown_names(index):
+    assert set(index.compare(["lora", "missing"])) == {"lora"}
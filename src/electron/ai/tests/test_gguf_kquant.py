@@ -0,0 +1,48 @@
+# tests/test_gguf_kquant.py
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+gguf = pytest.importorskip("gguf")
+from gguf import GGMLQuantizationType as QType
+from core.quantization.gguf_writer import _pack_kquant_scales, quantize_q4_k, quantize_q5_k, QK_K
+
+def unpack_scale_min(packed, j):
+    """ggml's get_scale_min_k4."""
+    if j < 4:
+        return packed[j] & 63, packed[j + 4] & 63
+    return ((packed[j + 4] & 0xF) | ((packed[j - 4] >> 6) << 4),
+            (packed[j + 4] >> 4) | ((packed[j] >> 6) << 4))
+
+def test_scale_packing_matches_ggml_layout():
+    rng = np.random.default_rng(0)
+    sc = rng.integers(0, 64, size=(16, 8), dtype=np.uint8)
+    m = rng.integers(0, 64, size=(16, 8), dtype=np.uint8)
+    packed = _pack_kquant_scales(sc, m)
+    assert packed.shape == (16, 12)
+    for row in range(16):
+        for j in range(8):
+            assert unpack_scale_min(packed[row].astype(np.int64), j) == (sc[row, j], m[row, j])
+
+@pytest.mark.parametrize("encode, qtype, block_bytes, tolerance", [
+    (quantize_q4_k, QType.Q4_K, 144, 0.12),
+    (quantize_q5_k, QType.Q5_K, 176, 0.06),
+])
+def test_round_trip_through_reference_dequantizer(encode, qtype, block_bytes, tolerance):
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal((4, 2 * QK_K)).astype(np.float32)
+    encoded = encode(data)
+    assert encoded.dtype == np.uint8 and encoded.shape == (4, 2 * block_bytes)
+    decoded = gguf.quants.dequantize(encoded, qtype)
+    assert decoded.shape == data.shape
+    relative_rmse = np.sqrt(np.mean((decoded - data) ** 2)) / np.sqrt(np.mean(data ** 2))
+    assert relative_rmse < tolerance
+
+@pytest.mark.parametrize("encode, qtype", [(quantize_q4_k, QType.Q4_K), (quantize_q5_k, QType.Q5_K)])
+def test_zero_and_positive_blocks(encode, qtype):
+    data = np.zeros((2, QK_K), dtype=np.float32)
+    data[1] = np.linspace(0.5, 2.0, QK_K)
+    decoded = gguf.quants.dequantize(encode(data), qtype)
+    np.testing.assert_array_equal(decoded[0], 0)
+    assert np.abs(decoded[1] - data[1]).max() < 0.1
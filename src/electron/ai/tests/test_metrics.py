@@ -0,0 +1,62 @@
+# tests/test_metrics.py
+
+import pytest
+from core.monitoring.metrics import MetricsRegistry, register_process_metrics
+
+def lines(registry):
+    return registry.render().splitlines()
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("method",))
+    requests.labels("GET").inc()
+    requests.labels(method="GET").inc(2)
+    requests.labels("POST").inc()
+    depth = registry.gauge("queue_depth", "Depth.")
+    depth.inc(3)
+    depth.dec()
+    assert lines(registry) == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{method="GET"} 3',
+        'requests_total{method="POST"} 1',
+        "# HELP queue_depth Depth.",
+        "# TYPE queue_depth gauge",
+        "queue_depth 2",
+    ]
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value)
+    assert lines(registry)[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 2.65",
+        "latency_seconds_count 4",
+    ]
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors.", ("message",)).labels('bad "quote"\n\\').inc()
+    assert lines(registry)[2] == 'errors_total{message="bad \\"quote\\"\\n\\\\"} 1'
+
+def test_registration_is_idempotent_per_type():
+    registry = MetricsRegistry()
+    assert registry.counter("x_total", "X.") is registry.counter("x_total", "X.")
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "X.")
+    with pytest.raises(ValueError):
+        registry.counter("x_total", "X.").inc(-1)
+    with pytest.raises(ValueError):
+        registry.counter("y_total", "Y.", ("a",)).labels("1", "2")
+
+def test_process_metrics_types():
+    registry = MetricsRegistry()
+    register_process_metrics(registry)
+    text = registry.render()
+    assert "# TYPE process_cpu_seconds_total counter" in text
+    assert "# TYPE process_resident_memory_bytes gauge" in text
+    assert registry.get("process_cpu_seconds_total").labels().get() >= 0
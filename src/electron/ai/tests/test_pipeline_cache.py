@@ -0,0 +1,92 @@
+# tests/test_pipeline_cache.py
+
+import json
+import os
+import pytest
+from pipelines.builder.pipeline import Pipeline, Step, reads_paths
+from pipelines.runtime.cache import step_key
+from pipelines.runtime.executor import PipelineRunner
+
+CALLS = []
+
+def split(a, b):
+    CALLS.append("split")
+    return {"a": a, "b": b}
+
+def use(value):
+    CALLS.append("use")
+    return value * 2
+
+@reads_paths("path")
+def read(path):
+    CALLS.append("read")
+    with open(path) as f:
+        return f.read()
+
+def fail(value):
+    raise ValueError("boom")
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CALLS.clear()
+
+def field_pipeline(b):
+    pipeline = Pipeline("fields")
+    pipeline.add("split", split, a=1, b=b)
+    pipeline.add("use", use, inputs={"value": "split.a"})
+    return pipeline
+
+def test_only_marked_params_hash_file_contents(tmp_path):
+    data = tmp_path / "data.txt"
+    data.write_text("one")
+    marked = Step("read", read, params={"path": str(data)})
+    unmarked = Step("use", use, params={"value": str(data)})
+    extra = Step("use", use, params={"value": str(data)}, path_params=["value"])
+    before = [step_key(s, {}) for s in (marked, unmarked, extra)]
+    data.write_text("two")
+    after = [step_key(s, {}) for s in (marked, unmarked, extra)]
+    assert before[0] != after[0]
+    assert before[1] == after[1]
+    assert before[2] != after[2]
+
+def test_inputs_are_keyed_by_selected_field(tmp_path):
+    runner = PipelineRunner(str(tmp_path / "cache"), max_workers=1)
+    assert runner.run(field_pipeline(b=1))["outputs"] == {"use": 2}
+    assert CALLS == ["split", "use"]
+    CALLS.clear()
+    # Changing a key 'use' does not read reruns 'split' but not 'use'
+    result = runner.run(field_pipeline(b=2))
+    assert CALLS == ["split"]
+    assert [s["cached"] for s in result["steps"]] == [False, True]
+
+def test_path_param_reruns_on_content_change(tmp_path):
+    data = tmp_path / "data.txt"
+    data.write_text("one")
+    pipeline = Pipeline("files")
+    pipeline.add("read", read, path=str(data))
+    runner = PipelineRunner(str(tmp_path / "cache"), max_workers=1)
+    runner.run(pipeline)
+    runner.run(pipeline)
+    data.write_text("two")
+    assert runner.run(pipeline)["outputs"] == {"read": "two"}
+    assert CALLS == ["read", "read"]
+
+def test_report_written_on_failure(tmp_path):
+    pipeline = Pipeline("broken")
+    pipeline.add("split", split, a=1, b=2)
+    pipeline.add("fail", fail, inputs={"value": "split.a"})
+    runner = PipelineRunner(str(tmp_path / "cache"), max_workers=1)
+    with pytest.raises(RuntimeError, match="fail"):
+        runner.run(pipeline)
+    runs_dir = tmp_path / "cache" / "runs"
+    (report_file,) = os.listdir(runs_dir)
+    with open(runs_dir / report_file) as f:
+        report = json.load(f)
+    assert report["status"] == "failed" and "boom" in report["error"]
+    assert [s["step"] for s in report["steps"]] == ["split"]
+
+def test_spec_round_trip_keeps_path_params():
+    pipeline = Pipeline("spec")
+    pipeline.add("use", use, path_params=["value"], value="x")
+    rebuilt = Pipeline.from_spec(json.loads(json.dumps(pipeline.to_dict())))
+    assert rebuilt.steps["use"].path_params == ["value"]
@@ -0,0 +1,25 @@
+# tests/test_resources.py
+
+import builtins
+import importlib
+from core.tracking import resources
+
+def test_reports_memory():
+    assert resources.peak_rss_bytes() > 0
+    assert resources.current_rss_bytes() > 0
+
+def test_imports_without_resource_module(monkeypatch):
+    real_import = builtins.__import__
+
+    def no_resource(name, *args, **kwargs):
+        if name in ("resource", "psutil"):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_resource)
+    try:
+        module = importlib.reload(resources)
+        assert module.resource is None and module.peak_rss_bytes() == 0
+    finally:
+        monkeypatch.undo()
+        importlib.reload(resources)
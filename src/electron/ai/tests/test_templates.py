@@ -0,0 +1,31 @@
+# tests/test_templates.py
+
+import pytest
+from core.prompts.templates import TemplateRegistry
+
+def tokenize(text):
+    return [0] + text.split()
+
+def tokenize_continuation(text):
+    return text.split()
+
+@pytest.fixture
+def registry():
+    return TemplateRegistry({"limit": "Answer in at most {max_tokens} words about {n_ctx}:"})
+
+def test_variables_may_share_parameter_names(registry):
+    prompt, n_prompt, max_tokens = registry.budget_max_tokens(
+        "limit", "model", tokenize, tokenize_continuation, 100, 50, {"max_tokens": 5, "n_ctx": "cats"})
+    assert prompt == "Answer in at most 5 words about cats:"
+    assert n_prompt == len(tokenize(prompt)) and max_tokens == 50
+
+def test_budget_errors(registry):
+    with pytest.raises(KeyError, match="n_ctx"):
+        registry.budget_max_tokens("limit", "model", tokenize, tokenize_continuation, 100, 50, {"max_tokens": 5})
+    with pytest.raises(ValueError, match="Unknown template"):
+        registry.budget_max_tokens("missing", "model", tokenize, tokenize_continuation, 100, 50, {})
+    with pytest.raises(ValueError, match="context window"):
+        registry.budget_max_tokens("limit", "model", tokenize, tokenize_continuation, 3, 50,
+                                   {"max_tokens": 5, "n_ctx": "cats"})
+    with pytest.raises(TypeError):
+        registry.budget_max_tokens("limit", "model", tokenize, tokenize_continuation, 100, 50, ["x"])
@@ -0,0 +1,56 @@
+# tests/test_vector_index.py
+
+import numpy as np
+from core.prompts.vector_index import VectorIndex
+
+DIM = 16
+
+def clustered(n, n_clusters=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, DIM))
+    return (centers[rng.integers(0, n_clusters, n)] + 0.1 * rng.standard_normal((n, DIM))).astype(np.float32)
+
+def test_brute_force_before_training():
+    index = VectorIndex(DIM, n_lists=4, train_size=100)
+    vectors = clustered(50)
+    index.add(list(range(50)), vectors)
+    assert index.centroids is None and len(index) == 50
+    (best_id, score), = index.search(vectors[7], k=1)
+    assert best_id == 7 and abs(score - 1.0) < 1e-5
+
+def test_full_probe_matches_brute_force_after_training():
+    index = VectorIndex(DIM, n_lists=8, nprobe=2, train_size=200)
+    vectors = clustered(400)
+    index.add([f"v{i}" for i in range(400)], vectors)
+    assert index.centroids is not None
+    query = clustered(1, seed=5)[0]
+    exact = index.brute_force_search(query, k=10)
+    assert index.search(query, k=10, nprobe=8) == exact
+    approx_ids = {i for i, _ in index.search(query, k=10)}
+    assert len(approx_ids & {i for i, _ in exact}) >= 8
+
+def test_replace_and_remove_keep_ids_consistent():
+    index = VectorIndex(DIM, n_lists=4, train_size=1000)
+    vectors = clustered(30)
+    index.add(list(range(30)), vectors)
+    index.add([3], vectors[10:11])
+    assert len(index) == 30
+    hits = dict(index.search(vectors[10], k=2))
+    assert set(hits) == {3, 10}
+    index.remove(list(range(15)))
+    # More than a third was removed, so storage is compacted
+    assert len(index.ids) == len(index) == 15 and index.alive.all()
+    assert all(index.ids[row] == i for i, row in index.id_to_row.items())
+    assert index.search(vectors[20], k=1)[0][0] == 20
+
+def test_save_and_load(tmp_path):
+    index = VectorIndex(DIM, n_lists=4, nprobe=4, train_size=50)
+    vectors = clustered(80)
+    index.add([f"id{i}" for i in range(80)], vectors)
+    index.remove(["id0"])
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = VectorIndex.load(path)
+    assert len(loaded) == 79 and "id0" not in loaded.id_to_row
+    query = vectors[42]
+    assert loaded.search(query, k=5) == index.search(query, k=5)